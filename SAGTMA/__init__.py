@@ -15,6 +15,38 @@ def flask_app(test_config=None):
         # Configuración de la base de datos
         DATABASE_NAME="SAGTMA",
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        # Perfil de pragmas de SQLite (ver utils/database.py) y pragmas que
+        # reemplazan a los del perfil (None deshabilita uno)
+        DATABASE_PROFILE="production",
+        SQLITE_PRAGMAS={},
+        # Usa una conexión de solo lectura para las requests GET
+        DATABASE_READ_ONLY=True,
+        # Escritura de eventos por lotes en segundo plano
+        EVENT_WRITER_ASYNC=True,
+        EVENT_WRITER_FLUSH_INTERVAL=1.0,
+        EVENT_WRITER_BATCH_SIZE=100,
+        # Fracción de eventos que se registra por nivel (0 los deshabilita)
+        EVENT_SAMPLING={"info": 1.0, "search": 1.0},
+        # Niveles de eventos cuyas repeticiones se agrupan en un solo evento,
+        # y ventana de tiempo en segundos para agruparlas (0 lo deshabilita)
+        EVENT_DEDUP_LEVELS=("search",),
+        EVENT_DEDUP_WINDOW=300,
+        # Cantidad de eventos por página del logger
+        EVENT_LOGGER_PAGE_SIZE=50,
+        # Intervalo en segundos entre consultas de eventos nuevos del logger en
+        # vivo, y duración en segundos de cada conexión antes de reconectarse
+        EVENT_STREAM_POLL_INTERVAL=1.0,
+        EVENT_STREAM_TIMEOUT=60.0,
+        # Cantidad máxima de sub-requests por request al endpoint batch de la API
+        API_BATCH_LIMIT=20,
+        # Tamaño mínimo en bytes de las respuestas a comprimir, y niveles de
+        # compresión gzip (1-9) y brotli (0-11) de las respuestas dinámicas
+        COMPRESS_MIN_SIZE=500,
+        COMPRESS_LEVEL=6,
+        COMPRESS_BROTLI_QUALITY=4,
+        # Tiempo en segundos que el navegador guarda los archivos estáticos
+        # pedidos con su versión
+        STATIC_MAX_AGE=365 * 24 * 60 * 60,
     )
 
     if test_config is not None:
@@ -22,9 +54,24 @@ def flask_app(test_config=None):
         app.config.from_mapping(test_config)
 
     # Configura la base de datos
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(
+    database_path = os.path.join(
         app.instance_path, f'{app.config["DATABASE_NAME"]}.sqlite'
     )
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + database_path
+
+    # Motor de solo lectura sobre el mismo archivo (ver models.RoutingSession)
+    if app.config["DATABASE_READ_ONLY"]:
+        from SAGTMA.models import READ_ONLY_BIND
+
+        app.config["SQLALCHEMY_BINDS"] = {
+            **app.config.get("SQLALCHEMY_BINDS", {}),
+            READ_ONLY_BIND: f"sqlite:///file:{database_path}?mode=ro&uri=true",
+        }
+
+    # Directorio de los segmentos de eventos archivados
+    app.config.setdefault(
+        "EVENT_ARCHIVE_DIR", os.path.join(app.instance_path, "event-archive")
+    )
 
     # Asegura que exista el directorio de la instancia
     try:
@@ -49,10 +96,37 @@ def flask_app(test_config=None):
 
         # Inicializa la base de datos
         from SAGTMA.models import db
+        from SAGTMA import migrations
 
         db.init_app(app)
+
+        # Aplica los pragmas de SQLite a cada conexión
+        from SAGTMA.utils import database
+
+        database.init_app(app)
+
         db.create_all()
 
+        # Lleva las bases de datos existentes al esquema actual
+        with db.engine.begin() as connection:
+            migrated = migrations.migrate(connection)
+
+        # Los conteos de eventos se vacían al migrar los módulos de eventos
+        if "event_modules" in migrated:
+            from SAGTMA.utils import event_stats
+
+            event_stats.rebuild_rollups()
+
+        # Inicia el escritor de eventos
+        from SAGTMA.utils import event_writer
+
+        event_writer.init_app(app)
+
+        # Comprime las respuestas y precomprime los archivos estáticos
+        from SAGTMA.utils import compression
+
+        compression.init_app(app)
+
     return app
 
 
@@ -76,5 +150,6 @@ def test_app():
             "APP_ENV": "testing",
             "DATABASE_NAME": "SAGTMA_test",
             "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+            "EVENT_WRITER_ASYNC": False,
         }
     )
@@ -1,7 +1,8 @@
 from itertools import product
 from random import randint, choice
-from datetime import date
+from datetime import date, datetime, timedelta
 
+import click
 from flask import current_app
 from sqlalchemy import func
 
@@ -17,6 +18,7 @@ from SAGTMA.models import (
     db,
 )
 from SAGTMA.utils.auth import hash_password
+from SAGTMA.utils import changes, event_archive, event_stats, project_plans
 
 
 @current_app.cli.command("init-db")
@@ -31,6 +33,59 @@ def init_db_command():
     populate_db()
 
 
+@current_app.cli.command("archive-events")
+@click.option(
+    "--older-than",
+    type=click.IntRange(min=0),
+    required=True,
+    help="Antigüedad mínima, en días, de los eventos a archivar.",
+)
+def archive_events_command(older_than: int):
+    """
+    Mueve los eventos con más de --older-than días de antigüedad a un segmento
+    comprimido en el directorio de la instancia.
+    """
+    count = event_archive.archive_events(datetime.now() - timedelta(days=older_than))
+    click.echo(f"{count} eventos archivados")
+
+
+@current_app.cli.command("prune-changes")
+@click.option(
+    "--older-than",
+    type=click.IntRange(min=0),
+    required=True,
+    help="Antigüedad mínima, en días, de los cambios a eliminar.",
+)
+def prune_changes_command(older_than: int):
+    """
+    Elimina del registro de cambios los cambios con más de --older-than días
+    de antigüedad. Los clientes con tokens anteriores deben recargar las
+    tablas.
+    """
+    count = changes.prune_changes(datetime.now() - timedelta(days=older_than))
+    click.echo(f"{count} cambios eliminados")
+
+
+@current_app.cli.command("rebuild-event-rollups")
+def rebuild_event_rollups_command():
+    """
+    Recalcula los conteos de eventos por módulo, usuario y hora a partir de
+    los eventos de la base de datos y de los segmentos archivados.
+    """
+    count = event_stats.rebuild_rollups()
+    click.echo(f"{count} conteos de eventos generados")
+
+
+@current_app.cli.command("recompute-costs")
+def recompute_costs_command():
+    """
+    Recalcula el total de cada plan de acción y el monto de cada detalle de
+    proyecto a partir de los costos de sus actividades.
+    """
+    count = project_plans.recompute_costs()
+    click.echo(f"{count} planes de acción y detalles de proyecto corregidos")
+
+
 def populate_db():
     """Prepuebla la base de datos."""
     # Crea los roles
@@ -0,0 +1,293 @@
+import secrets
+from typing import Callable, List, Tuple
+
+from sqlalchemy import event
+
+from SAGTMA.models import (
+    EVENT_FTS_DDL,
+    TABLE_EPOCH,
+    Client,
+    Event,
+    EventRollup,
+    TableVersion,
+    Vehicle,
+    compact_key,
+    db,
+    digits_key,
+    search_key,
+)
+from SAGTMA.utils import project_plans
+
+
+# ========== Creación del esquema ==========
+# Lo que db.create_all no crea a partir de los modelos: el índice de búsqueda
+# de eventos y el valor aleatorio de table_version. Se ejecuta al crear sus
+# tablas y desde las migraciones, para las bases de datos ya existentes.
+def create_event_fts(connection):
+    """
+    Crea la tabla de búsqueda de texto completo de eventos y sus triggers, si
+    no existen, y la puebla con los eventos que ya estén en la base de datos.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_fts'"
+    ).first()
+    if exists:
+        return
+
+    for ddl in EVENT_FTS_DDL:
+        connection.exec_driver_sql(ddl)
+
+    connection.exec_driver_sql("""
+        INSERT INTO event_fts (rowid, description, module, username)
+        SELECT event.id, event.description, event_module.name, user.username
+        FROM event
+        JOIN user ON user.id = event.user_id
+        JOIN event_module ON event_module.id = event.module_id
+        """)
+
+
+@event.listens_for(Event.__table__, "after_create")
+def _create_event_fts(target, connection, **kw):
+    create_event_fts(connection)
+
+
+@event.listens_for(Event.__table__, "before_drop")
+def _drop_event_fts(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS event_fts")
+
+
+def seed_table_epoch(connection) -> bool:
+    """
+    Guarda el valor aleatorio de la base de datos en table_version si no
+    existe. Retorna si lo guardó.
+    """
+    # INSERT OR IGNORE INTO table_version (name, version) VALUES (...)
+    stmt = (
+        db.insert(TableVersion)
+        .values(name=TABLE_EPOCH, version=secrets.randbits(31))
+        .prefix_with("OR IGNORE")
+    )
+    return connection.execute(stmt).rowcount > 0
+
+
+@event.listens_for(TableVersion.__table__, "after_create")
+def _seed_table_epoch(target, connection, **kw):
+    seed_table_epoch(connection)
+
+
+# ========== Pasos de migración ==========
+def _columns(connection, table: str) -> list:
+    """Retorna los nombres de las columnas de una tabla de SQLite."""
+    result = connection.exec_driver_sql(f"PRAGMA table_info({table})")
+    return [row[1] for row in result]
+
+
+def migrate_event_modules(connection) -> bool:
+    """
+    Migra las bases de datos en las que el módulo de cada evento se guardaba
+    como texto a la tabla de módulos de eventos.
+
+    Reconstruye la tabla de eventos con la clave foránea al módulo y vacía la
+    de conteos, que usa la misma clave. Retorna si se hizo la migración, en
+    cuyo caso los conteos deben recalcularse.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+
+    columns = _columns(connection, "event")
+    if "module" not in columns:
+        return False
+
+    # El índice de búsqueda y sus triggers se recrean junto con la tabla
+    connection.exec_driver_sql("DROP TABLE IF EXISTS event_fts")
+    for trigger in ("insert", "delete", "update", "username"):
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS event_fts_{trigger}")
+    for index in ("ix_event_time_id", "ix_event_user_id_time", "ix_event_module_time"):
+        connection.exec_driver_sql(f"DROP INDEX IF EXISTS {index}")
+
+    connection.exec_driver_sql("ALTER TABLE event RENAME TO event_old")
+    Event.__table__.create(connection)
+
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO event_module (name) SELECT DISTINCT module FROM event_old"
+    )
+    level = "event_old.level" if "level" in columns else "'info'"
+    count = "event_old.count" if "count" in columns else "1"
+    connection.exec_driver_sql(f"""
+        INSERT INTO event (id, user_id, module_id, description, time, level, count)
+        SELECT event_old.id, event_old.user_id, event_module.id,
+            event_old.description, event_old.time, {level}, {count}
+        FROM event_old JOIN event_module ON event_module.name = event_old.module
+        """)
+    connection.exec_driver_sql("DROP TABLE event_old")
+
+    if "module" in _columns(connection, "event_rollup"):
+        connection.exec_driver_sql("DROP TABLE event_rollup")
+        EventRollup.__table__.create(connection)
+
+    return True
+
+
+def migrate_search_keys(connection) -> bool:
+    """
+    Añade las claves de búsqueda de clientes y vehículos, y sus índices, a las
+    bases de datos anteriores a ellas, calculándolas para las filas existentes.
+    Retorna si se hizo la migración.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+
+    if "license_plate_key" in _columns(connection, "vehicle"):
+        return False
+
+    for table, column, length in [
+        ("client", "id_number_key", 10),
+        ("client", "name_key", 101),
+        ("client", "surname_key", 50),
+        ("vehicle", "license_plate_key", 10),
+    ]:
+        connection.exec_driver_sql(
+            f"ALTER TABLE {table} ADD COLUMN {column} "
+            f"VARCHAR({length}) NOT NULL DEFAULT ''"
+        )
+
+    clients = Client.__table__
+    rows = connection.execute(
+        db.select(
+            clients.c.id, clients.c.id_number, clients.c.names, clients.c.surnames
+        )
+    ).fetchall()
+    if rows:
+        connection.execute(
+            db.update(clients)
+            .where(clients.c.id == db.bindparam("_id"))
+            .values(
+                id_number_key=db.bindparam("_id_number_key"),
+                name_key=db.bindparam("_name_key"),
+                surname_key=db.bindparam("_surname_key"),
+            ),
+            [
+                {
+                    "_id": row.id,
+                    "_id_number_key": digits_key(row.id_number),
+                    "_name_key": search_key(f"{row.names} {row.surnames}"),
+                    "_surname_key": search_key(row.surnames),
+                }
+                for row in rows
+            ],
+        )
+
+    vehicles = Vehicle.__table__
+    rows = connection.execute(
+        db.select(vehicles.c.id, vehicles.c.license_plate)
+    ).fetchall()
+    if rows:
+        connection.execute(
+            db.update(vehicles)
+            .where(vehicles.c.id == db.bindparam("_id"))
+            .values(license_plate_key=db.bindparam("_license_plate_key")),
+            [
+                {"_id": row.id, "_license_plate_key": compact_key(row.license_plate)}
+                for row in rows
+            ],
+        )
+
+    for index in [*clients.indexes, *vehicles.indexes]:
+        index.create(connection, checkfirst=True)
+
+    return True
+
+
+# ========== Migraciones ==========
+# Cada migración lleva una base de datos existente al esquema actual sin
+# perder sus datos. Las tablas nuevas las crea db.create_all; las migraciones
+# se encargan de lo que create_all no cambia en las tablas que ya existen
+# (columnas, índices, tablas reconstruidas...). Deben poder ejecutarse sobre
+# una base de datos nueva o ya migrada sin hacer nada, y retornan si cambiaron
+# algo.
+def _event_fts(connection) -> bool:
+    """Crea el índice de búsqueda de eventos si no existe."""
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_fts'"
+    ).first()
+    create_event_fts(connection)
+    return not exists
+
+
+def _indexes(connection) -> bool:
+    """Crea los índices declarados en los modelos que no existan."""
+    existing = {
+        name
+        for name, in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    }
+
+    created = False
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(connection)
+                created = True
+    return created
+
+
+def _action_plan_costs(connection) -> bool:
+    """
+    Añade el total de cada plan de acción y lo calcula, junto con el monto de
+    los detalles de proyecto, a partir de los costos de las actividades.
+    """
+    if "cost" in _columns(connection, "action_plan"):
+        return False
+
+    connection.exec_driver_sql(
+        "ALTER TABLE action_plan ADD COLUMN cost FLOAT NOT NULL DEFAULT 0"
+    )
+    for stmt in project_plans.cost_rollup_statements():
+        connection.execute(stmt)
+    return True
+
+
+# Migraciones en orden, con su versión y su nombre. La versión de la base de
+# datos (PRAGMA user_version) es la de la última migración aplicada, así que
+# solo se agregan migraciones al final, con versiones crecientes.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "event_modules", migrate_event_modules),
+    (2, "event_fts", _event_fts),
+    (3, "search_keys", migrate_search_keys),
+    (4, "indexes", _indexes),
+    (5, "action_plan_costs", _action_plan_costs),
+    (6, "table_epoch", seed_table_epoch),
+]
+
+
+def get_version(connection) -> int:
+    """Retorna la versión del esquema de la base de datos."""
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(connection) -> List[str]:
+    """
+    Aplica, en la transacción de la conexión, las migraciones posteriores a
+    la versión de la base de datos y la actualiza. Retorna los nombres de las
+    migraciones que cambiaron algo.
+    """
+    if connection.dialect.name != "sqlite":
+        return []
+
+    version = get_version(connection)
+    changed = []
+    for migration_version, name, migration in MIGRATIONS:
+        if migration_version <= version:
+            continue
+
+        if migration(connection):
+            changed.append(name)
+        version = migration_version
+
+    connection.exec_driver_sql(f"PRAGMA user_version = {version}")
+    return changed
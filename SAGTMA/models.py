@@ -1,7 +1,73 @@
 import datetime
+import unicodedata
+from flask import has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
 
-db = SQLAlchemy()
+# Nombre del motor de solo lectura en SQLALCHEMY_BINDS, y métodos HTTP cuyas
+# requests solo leen de la base de datos
+READ_ONLY_BIND = "read_only"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class RoutingSession(Session):
+    """
+    Sesión que envía las consultas de las requests GET (incluidas las
+    sub-requests del endpoint batch de la API) al motor de solo lectura, si
+    está configurado. Las escrituras, y todo lo que le sigue a una escritura
+    en la misma transacción, usan el motor de lectura y escritura.
+    """
+
+    _writing = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and (self._flushing or isinstance(clause, UpdateBase)):
+            self._writing = True
+
+        read_only = self._db.engines.get(READ_ONLY_BIND)
+        if (
+            bind is None
+            and read_only is not None
+            and not self._writing
+            and has_request_context()
+            and request.method in READ_METHODS
+        ):
+            return read_only
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _end_writing(session, transaction):
+    """Vuelve a leer del motor de solo lectura al terminar la transacción."""
+    if transaction.parent is None:
+        session._writing = False
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+# ========== Claves de búsqueda ==========
+def search_key(text: str) -> str:
+    """
+    Normaliza un texto para buscarlo por prefijo: en minúsculas, sin acentos
+    y con los espacios colapsados.
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def compact_key(text: str) -> str:
+    """Normaliza un texto como search_key, pero solo con letras y números."""
+    return "".join(c for c in search_key(text) if c.isalnum())
+
+
+def digits_key(text: str) -> str:
+    """Retorna solo los dígitos de un texto (por ejemplo, de una cédula)."""
+    return "".join(c for c in text if c.isdigit())
 
 
 class Role(db.Model):
@@ -22,7 +88,9 @@ class User(db.Model):
     """Modelo de usuario."""
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    role_id = db.Column(db.Integer, db.ForeignKey("role.id"), nullable=False)
+    role_id = db.Column(
+        db.Integer, db.ForeignKey("role.id"), nullable=False, index=True
+    )
     id_number = db.Column(db.String(10), unique=True, nullable=False)
     username = db.Column(db.String(20), unique=True, nullable=False)
     names = db.Column(db.String(50), nullable=False)
@@ -90,12 +158,18 @@ class ProjectDetail(db.Model):
     """Modelo de detalles de proyectos."""
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    project_id = db.Column(db.Integer, db.ForeignKey("project.id"), nullable=False)
-    vehicle_id = db.Column(db.Integer, db.ForeignKey("vehicle.id"), nullable=False)
+    project_id = db.Column(
+        db.Integer, db.ForeignKey("project.id"), nullable=False, index=True
+    )
+    vehicle_id = db.Column(
+        db.Integer, db.ForeignKey("vehicle.id"), nullable=False, index=True
+    )
     department_id = db.Column(
-        db.Integer, db.ForeignKey("department.id"), nullable=False
+        db.Integer, db.ForeignKey("department.id"), nullable=False, index=True
+    )
+    project_manager_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
     )
-    project_manager_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     solution = db.Column(db.String(100), nullable=False)
     cost = db.Column(db.Float, nullable=False)
     observations = db.Column(db.String(100), nullable=False)
@@ -127,24 +201,75 @@ class ProjectDetail(db.Model):
         return f"ProjectDetail<{self.solution}: {self.cost} - {self.observations}>"
 
 
+class EventModule(db.Model):
+    """Modelo de módulo de eventos."""
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(80), unique=True, nullable=False)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"EventModule<{self.name}>"
+
+
 class Event(db.Model):
     """Modelo de evento."""
 
+    # Índices para el logger: paginación por (time, id) y filtros por usuario
+    # y por módulo
+    __table_args__ = (
+        db.Index("ix_event_time_id", "time", "id"),
+        db.Index("ix_event_user_id_time", "user_id", "time"),
+        db.Index("ix_event_module_id_time", "module_id", "time"),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    module = db.Column(db.String(80), nullable=False)
+    module_id = db.Column(db.Integer, db.ForeignKey("event_module.id"), nullable=False)
     description = db.Column(db.String(80), nullable=False)
     time = db.Column(db.DateTime(timezone=True), default=datetime.datetime.now)
+    # Nivel del evento ("info" o "search") y cantidad de veces que se repitió
+    level = db.Column(db.String(10), nullable=False, default="info")
+    count = db.Column(db.Integer, nullable=False, default=1)
+    event_module = db.relationship("EventModule", lazy="joined", innerjoin=True)
 
-    def __init__(self, user: User, module: str, description: str):
+    def __init__(self, user: User, module_id: int, description: str):
         self.user = user
-        self.module = module
-        self.description = (
-            description if len(description) <= 80 else f"{description[:77]}..."
-        )
+        self.module_id = module_id
+        self.description = Event.shorten(description)
+
+    @property
+    def module(self) -> str:
+        """Nombre del módulo del evento."""
+        return self.event_module.name
+
+    @staticmethod
+    def shorten(description: str) -> str:
+        """Recorta la descripción para que quepa en la columna."""
+        return description if len(description) <= 80 else f"{description[:77]}..."
 
     def __repr__(self) -> str:
-        return f"Event<{self.user.username}: {self.module} - {self.type}>"
+        return f"Event<{self.user.username}: {self.module} - {self.description}>"
+
+
+class EventRollup(db.Model):
+    """Modelo de conteo de eventos por módulo, usuario y hora."""
+
+    module_id = db.Column(
+        db.Integer, db.ForeignKey("event_module.id"), primary_key=True
+    )
+    # Sin clave foránea: los conteos se conservan aunque el usuario se elimine
+    user_id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True, index=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return (
+            f"EventRollup<{self.module_id} - {self.user_id} - {self.hour}: "
+            f"{self.count}>"
+        )
 
 
 class Client(db.Model):
@@ -159,6 +284,16 @@ class Client(db.Model):
     email = db.Column(db.String(80), nullable=False)
     address = db.Column(db.String(120), nullable=False)
 
+    # Claves normalizadas e indexadas para la búsqueda por prefijo de los
+    # vehículos por su dueño; se calculan al guardar el cliente
+    id_number_key = db.Column(
+        db.String(10), nullable=False, server_default="", index=True
+    )
+    name_key = db.Column(db.String(101), nullable=False, server_default="", index=True)
+    surname_key = db.Column(
+        db.String(50), nullable=False, server_default="", index=True
+    )
+
     # Relación 1:n entre clientes y vehículos
     vehicles = db.relationship("Vehicle", backref="owner", cascade="all, delete-orphan")
 
@@ -188,7 +323,9 @@ class Vehicle(db.Model):
     """Modelo de vehículo."""
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    owner_id = db.Column(db.Integer, db.ForeignKey("client.id"), nullable=False)
+    owner_id = db.Column(
+        db.Integer, db.ForeignKey("client.id"), nullable=False, index=True
+    )
     license_plate = db.Column(db.String(10), unique=True, nullable=False)
     brand = db.Column(db.String(50), nullable=False)
     model = db.Column(db.String(50), nullable=False)
@@ -198,6 +335,12 @@ class Vehicle(db.Model):
     color = db.Column(db.String(20), nullable=False)
     problem = db.Column(db.String(120), nullable=False)
 
+    # Placa normalizada e indexada para la búsqueda por prefijo; se calcula al
+    # guardar el vehículo
+    license_plate_key = db.Column(
+        db.String(10), nullable=False, server_default="", index=True
+    )
+
     # Relacion 1:N entre vehículos y detalles de proyectos (ojo con el cascade)
     project_details = db.relationship(
         "ProjectDetail", backref="vehicle", cascade="all, delete-orphan"
@@ -227,6 +370,22 @@ class Vehicle(db.Model):
         return f"Vehicle<{self.license_plate}: {self.brand} {self.model}>"
 
 
+@event.listens_for(Client, "before_insert")
+@event.listens_for(Client, "before_update")
+def _client_search_keys(mapper, connection, client: Client):
+    """Calcula las claves de búsqueda del cliente."""
+    client.id_number_key = digits_key(client.id_number)
+    client.name_key = search_key(f"{client.names} {client.surnames}")
+    client.surname_key = search_key(client.surnames)
+
+
+@event.listens_for(Vehicle, "before_insert")
+@event.listens_for(Vehicle, "before_update")
+def _vehicle_search_keys(mapper, connection, vehicle: Vehicle):
+    """Calcula la clave de búsqueda del vehículo."""
+    vehicle.license_plate_key = compact_key(vehicle.license_plate)
+
+
 class Department(db.Model):
     """Modelo de Departamento."""
 
@@ -271,9 +430,11 @@ class Activity(db.Model):
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     action_plan_id = db.Column(
-        db.Integer, db.ForeignKey("action_plan.id"), nullable=False
+        db.Integer, db.ForeignKey("action_plan.id"), nullable=False, index=True
+    )
+    charge_person_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
     )
-    charge_person_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     description = db.Column(db.String(100), nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     deadline = db.Column(db.Date, nullable=False)
@@ -317,10 +478,14 @@ class ActionPlan(db.Model):
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     project_detail_id = db.Column(
-        db.Integer, db.ForeignKey("project_detail.id"), nullable=False
+        db.Integer, db.ForeignKey("project_detail.id"), nullable=False, index=True
     )
     action = db.Column(db.String(100), nullable=False)
 
+    # Suma de los costos de sus actividades, que se actualiza con cada cambio
+    # de ellas (ver project_plans.add_activity_cost)
+    cost = db.Column(db.Float, nullable=False, default=0, server_default="0")
+
     # Relacion 1:N entre plan de acción y actividades
     activities = db.relationship(
         "Activity", backref="action_plan", cascade="all, delete-orphan"
@@ -335,7 +500,9 @@ class HumanTalent(db.Model):
     """Modelo de Talento Humano"""
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    activity_id = db.Column(db.Integer, db.ForeignKey("activity.id"), nullable=False)
+    activity_id = db.Column(
+        db.Integer, db.ForeignKey("activity.id"), nullable=False, index=True
+    )
     time = db.Column(db.Integer, nullable=False)
     amount = db.Column(db.Integer, nullable=False)
     cost = db.Column(db.Float, nullable=False)
@@ -354,9 +521,11 @@ class MaterialSupply(db.Model):
     """Modelo de Suministro de Materiales"""
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    activity_id = db.Column(db.Integer, db.ForeignKey("activity.id"), nullable=False)
+    activity_id = db.Column(
+        db.Integer, db.ForeignKey("activity.id"), nullable=False, index=True
+    )
     measure_unit_id = db.Column(
-        db.Integer, db.ForeignKey("measure_unit.id"), nullable=False
+        db.Integer, db.ForeignKey("measure_unit.id"), nullable=False, index=True
     )
     category = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(100), nullable=False)
@@ -381,3 +550,91 @@ class MaterialSupply(db.Model):
 
     def __repr__(self) -> str:
         return f"MaterialSupply<{self.description}: {self.amount} - {self.cost}>"
+
+
+class TableVersion(db.Model):
+    """
+    Modelo de versión de una tabla: un contador que aumenta con cada cambio
+    de sus filas.
+    """
+
+    name = db.Column(db.String(80), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"TableVersion<{self.name}: {self.version}>"
+
+
+# Fila de table_version con un valor aleatorio propio de cada base de datos,
+# para distinguir las versiones de una base de datos recreada, que vuelven a
+# empezar desde cero
+TABLE_EPOCH = "__epoch__"
+
+
+class Change(db.Model):
+    """
+    Modelo de cambio de una fila: registro de solo inserción de las filas
+    insertadas, actualizadas o eliminadas. El id de cada cambio sirve como
+    token de sincronización, ya que nunca se reutiliza.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(80), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    operation = db.Column(db.String(10), nullable=False)
+    time = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now)
+
+    def __repr__(self) -> str:
+        return f"Change<{self.id}: {self.operation} {self.table_name} {self.row_id}>"
+
+
+# ========== Búsqueda de texto completo de eventos ==========
+# Tabla virtual FTS5 que refleja la descripción, el módulo y el usuario de cada
+# evento (rowid = event.id). Se mantiene sincronizada mediante triggers, que
+# crea migrations.create_event_fts.
+event_fts = db.table(
+    "event_fts", db.column("rowid"), db.column("rank"), db.column("event_fts")
+)
+
+EVENT_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE event_fts USING fts5(
+        description, module, username,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_fts_insert AFTER INSERT ON event BEGIN
+        INSERT INTO event_fts (rowid, description, module, username)
+        SELECT new.id, new.description, event_module.name, user.username
+        FROM user, event_module
+        WHERE user.id = new.user_id AND event_module.id = new.module_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_fts_delete AFTER DELETE ON event BEGIN
+        DELETE FROM event_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_fts_update
+    AFTER UPDATE OF user_id, module_id, description ON event BEGIN
+        DELETE FROM event_fts WHERE rowid = old.id;
+        INSERT INTO event_fts (rowid, description, module, username)
+        SELECT new.id, new.description, event_module.name, user.username
+        FROM user, event_module
+        WHERE user.id = new.user_id AND event_module.id = new.module_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS event_fts_username AFTER UPDATE OF username ON user
+    BEGIN
+        UPDATE event_fts SET username = new.username
+        WHERE rowid IN (SELECT id FROM event WHERE user_id = new.id);
+    END
+    """,
+]
@@ -5,12 +5,26 @@ from flask import (
     redirect,
     render_template,
     request,
+    stream_with_context,
     url_for,
     session,
 )
 
-from SAGTMA.models import Event, Role, User, Department, MeasureUnit, db
-from SAGTMA.utils import events, profiles, departments, measurement_units
+from SAGTMA.models import (
+    Role,
+    User,
+    Department,
+    MeasureUnit,
+    ProjectDetail,
+    db,
+)
+from SAGTMA.utils import (
+    events,
+    event_archive,
+    profiles,
+    departments,
+    measurement_units,
+)
 from SAGTMA.utils.decorators import requires_roles
 
 
@@ -19,8 +33,12 @@ from SAGTMA.utils.decorators import requires_roles
 @requires_roles("Administrador")
 def users_profiles() -> Response:
     """Muestra la lista de usuarios registrados en el sistema"""
-    # SELECT * FROM user
-    stmt = db.select(User)
+    # SELECT * FROM user, cargando junto con los usuarios su rol y los
+    # proyectos de sus detalles de proyecto
+    stmt = db.select(User).options(
+        db.joinedload(User.role),
+        db.selectinload(User.project_details).joinedload(ProjectDetail.project),
+    )
 
     if request.method == "POST":
         # Obtiene los datos del formulario
@@ -45,6 +63,7 @@ def users_profiles() -> Response:
             "Perfiles de Usuarios",
             f"Buscar '{user}' en "
             + ("todos los roles" if not role else f"el rol '{role}'"),
+            events.SEARCH,
         )
 
     result = db.session.execute(stmt).fetchall()
@@ -126,33 +145,109 @@ def edit_user(user_id: int) -> Response:
 @current_app.route("/event-logger/", methods=["GET", "POST"])
 @requires_roles("Administrador")
 def logger() -> Response:
+    """Muestra una página de eventos registrados en el sistema."""
     if request.method == "POST":
         # Obtiene los datos del formulario
         event = request.form.get("event-filter", "").lower().strip()
+        start_date = request.form.get("start-date", "")
+        end_date = request.form.get("end-date", "")
 
-        # SELECT * FROM event JOIN user ON event.user_id = user.id
-        stmt = db.select(Event).join(User, Event.user_id == User.id)
+        # Añade el evento de búsqueda
         if event:
-            # WHERE description LIKE '%event%' OR
-            #     module LIKE '%event%' OR
-            #     user.username LIKE '%event%'
-            stmt = stmt.where(
-                db.or_(
-                    Event.description.like(f"%{event}%"),
-                    Event.module.like(f"%{event}%"),
-                    db.func.lower(User.username).like(f"%{event}%"),
-                )
-            )
-
-            # Añade el evento de búsqueda
-            events.add_event("Logger de Eventos", f"Buscar '{event}'")
+            events.add_event("Logger de Eventos", f"Buscar '{event}'", events.SEARCH)
     else:
-        # Selecciona los eventos de la base de datos
-        stmt = db.select(Event)
+        # Obtiene los filtros de la página anterior, si los hay
+        event = request.args.get("q", "").lower().strip()
+        start_date = request.args.get("start", "")
+        end_date = request.args.get("end", "")
+
+    # Obtiene la página indicada por el cursor
+    cursor = request.args.get("cursor")
+    direction = request.args.get("direction", "next")
+    page_size = current_app.config["EVENT_LOGGER_PAGE_SIZE"]
+    try:
+        start, end = events.parse_date_range(start_date, end_date)
+        _events, next_cursor, prev_cursor = events.paginate_events(
+            events.search_events(event, start, end), cursor, direction, page_size
+        )
+    except events.EventError as e:
+        flash(f"{e}")
+        return redirect(url_for("logger"))
 
-    result = db.session.execute(stmt).fetchall()
-    _events = [r for r, in result]
-    return render_template("admin/logger.html", events=_events)
+    # En la última página se buscan también los eventos archivados, solo si
+    # el rango de fechas los incluye. Las páginas siguientes de eventos
+    # archivados continúan desde archive_cursor
+    archive_cursor = request.args.get("archive_cursor")
+    archived_events, archive_next_cursor = [], None
+    if next_cursor is None and event_archive.needs_archive(start):
+        try:
+            before = events.decode_cursor(archive_cursor) if archive_cursor else None
+        except events.EventError as e:
+            flash(f"{e}")
+            return redirect(url_for("logger"))
+
+        # Se pide un evento de más para saber si hay otra página
+        archived_events = event_archive.search_archive(
+            event, start, end, page_size + 1, before
+        )
+        if len(archived_events) > page_size:
+            archived_events = archived_events[:page_size]
+            last = archived_events[-1]
+            archive_next_cursor = events.encode_position(last["time"], last["id"])
+
+    # En la primera página sin filtros, los eventos nuevos se añaden en vivo a
+    # partir del más reciente mostrado
+    stream_last_id = None
+    if not (cursor or archive_cursor or event or start_date or end_date):
+        stream_last_id = _events[0].id if _events else events.last_event_id()
+
+    return render_template(
+        "admin/logger.html",
+        events=_events,
+        archived_events=archived_events,
+        event_filter=event,
+        start_date=start_date,
+        end_date=end_date,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        archive_next_cursor=archive_next_cursor,
+        stream_last_id=stream_last_id,
+    )
+
+
+@current_app.route("/event-logger/export/<export_format>/")
+@requires_roles("Administrador")
+def export_events(export_format: str) -> Response:
+    """Descarga el log de eventos filtrado, en formato CSV o NDJSON."""
+    # Obtiene los mismos filtros que el logger
+    event = request.args.get("q", "").lower().strip()
+    start_date = request.args.get("start", "")
+    end_date = request.args.get("end", "")
+
+    try:
+        start, end = events.parse_date_range(start_date, end_date)
+        stmt = events.search_events(event, start, end)
+
+        # Los eventos archivados se exportan antes que los de la base de datos
+        archived = ()
+        if event_archive.needs_archive(start):
+            archived = event_archive.iter_archive(event, start, end)
+
+        lines = events.export_events(stmt, export_format, archived=archived)
+    except events.EventError as e:
+        flash(f"{e}")
+        return redirect(url_for("logger"))
+
+    # Añade el evento de exportación antes de comenzar a transmitir
+    events.add_event("Logger de Eventos", f"Exportar eventos '{event}'")
+
+    return Response(
+        stream_with_context(lines),
+        mimetype=events.EXPORT_FORMATS[export_format],
+        headers={
+            "Content-Disposition": f"attachment; filename=eventos.{export_format}"
+        },
+    )
 
 
 @current_app.route("/event-logger/delete/<int:event_id>/", methods=["POST"])
@@ -186,7 +281,7 @@ def ws_depts() -> Response:
             stmt = stmt.where(Department.description.like(f"%{dept}%"))
 
         # Añade el evento de búsqueda
-        events.add_event("Departamentos del Taller", f"Buscar '{dept}'")
+        events.add_event("Departamentos del Taller", f"Buscar '{dept}'", events.SEARCH)
 
     result = db.session.execute(stmt).fetchall()
     _depts = [r for r, in result]
@@ -260,7 +355,7 @@ def measure_units() -> Response:
             stmt = stmt.where(MeasureUnit.unit.like(f"%{uom}%"))
 
         # Añade el evento de búsqueda
-        events.add_event("Unidades de Medida", f"Buscar '{uom}'")
+        events.add_event("Unidades de Medida", f"Buscar '{uom}'", events.SEARCH)
 
     result = db.session.execute(stmt).fetchall()
     _uoms = [r for r, in result]
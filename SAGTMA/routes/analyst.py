@@ -47,7 +47,9 @@ def client_details() -> Response:
             )
 
         # Añade el evento de búsqueda
-        events.add_event("Detalles de los Clientes", f"Buscar '{client}'")
+        events.add_event(
+            "Detalles de los Clientes", f"Buscar '{client}'", events.SEARCH
+        )
 
     result = db.session.execute(stmt).fetchall()
     _clients = [r for r, in result]
@@ -189,6 +191,7 @@ def client_vehicles(client_id: int) -> Response:
         events.add_event(
             "Vehículos de los Clientes",
             f"Buscar '{vehicle}' del cliente '{client.id_number}'",
+            events.SEARCH,
         )
 
     result = db.session.execute(stmt).fetchall()
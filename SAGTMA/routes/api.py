@@ -1,6 +1,28 @@
-from flask import current_app, request, json
-
-from SAGTMA.utils.decorators import login_required, requires_roles
+import io
+from urllib.parse import urlencode
+
+from flask import (
+    Response,
+    current_app,
+    request,
+    json,
+    session,
+    stream_with_context,
+    url_for,
+)
+from werkzeug.exceptions import HTTPException
+
+from SAGTMA.utils import (
+    changes,
+    events,
+    event_stats,
+    lookups,
+    project_plans,
+    resources,
+    vehicles,
+)
+from SAGTMA.utils.resources import Resource, format_date
+from SAGTMA.utils.decorators import conditional, login_required, requires_roles
 
 from SAGTMA.models import (
     User,
@@ -18,362 +40,614 @@ from SAGTMA.models import (
     db,
 )
 
+# ========== Recursos de la API ==========
+USERS = Resource(
+    User,
+    {
+        "id": User.id,
+        "id_number": User.id_number,
+        "username": User.username,
+        "names": User.names,
+        "surnames": User.surnames,
+        "role_id": User.role_id,
+    },
+)
+
+ROLES = Resource(Role, {"id": Role.id, "name": Role.name})
+
+PROJECTS = Resource(
+    Project,
+    {
+        "id": Project.id,
+        "description": Project.description,
+        "start_date": Project.start_date,
+        "deadline": Project.end_date,
+    },
+    {"start_date": format_date, "deadline": format_date},
+)
+
+CLIENTS = Resource(
+    Client,
+    {
+        "id": Client.id,
+        "id_number": Client.id_number,
+        "names": Client.names,
+        "surnames": Client.surnames,
+        "birthdate": Client.birthdate,
+        "phone_number": Client.phone_number,
+        "email": Client.email,
+        "address": Client.address,
+    },
+    {"birthdate": format_date},
+)
+
+VEHICLES = Resource(
+    Vehicle,
+    {
+        "license_plate": Vehicle.license_plate,
+        "brand": Vehicle.brand,
+        "model": Vehicle.model,
+        "year": Vehicle.year,
+        "body_number": Vehicle.body_number,
+        "engine_number": Vehicle.engine_number,
+        "color": Vehicle.color,
+        "problem": Vehicle.problem,
+    },
+)
+
+DEPARTMENTS = Resource(
+    Department, {"id": Department.id, "description": Department.description}
+)
+
+PROJECT_DETAILS = Resource(
+    ProjectDetail,
+    {
+        "id": ProjectDetail.id,
+        "project_id": ProjectDetail.project_id,
+        "manager_id": ProjectDetail.project_manager_id,
+        "department_id": ProjectDetail.department_id,
+        "vehicle_id": ProjectDetail.vehicle_id,
+        "solution": ProjectDetail.solution,
+        "cost": ProjectDetail.cost,
+        "observations": ProjectDetail.observations,
+    },
+)
+
+MEASURE_UNITS = Resource(
+    MeasureUnit,
+    {
+        "id": MeasureUnit.id,
+        "dimension": MeasureUnit.dimension,
+        "unit": MeasureUnit.unit,
+    },
+)
+
+
+def _page_headers(next_cursor) -> dict:
+    """
+    Retorna el header Link con la URL de la página siguiente de la request
+    actual, si la hay.
+    """
+    if next_cursor is None:
+        return {}
+
+    url = url_for(request.endpoint, **{**request.args.to_dict(), "cursor": next_cursor})
+    return {"Link": f'<{url}>; rel="next"'}
+
+
+def _resource_response(resource: Resource, filters: list):
+    """
+    Retorna la respuesta con las filas de un recurso según los parámetros de
+    la request. Si no se pagina (sin limit), el arreglo JSON se transmite por
+    lotes en lugar de armarse completo en memoria.
+
+    Lanza una excepción ResourceError si algún parámetro no es válido.
+    """
+    if request.args.get("limit") is None:
+        rows = resources.iter_resource(resource, request.args, filters)
+        return Response(
+            stream_with_context(resources.stream_json(rows)),
+            mimetype="application/json",
+        )
+
+    rows, next_cursor = resources.list_resource(resource, request.args, filters)
+    return rows, _page_headers(next_cursor)
+
 
 @current_app.route("/api/v1/users")
 @requires_roles("Administrador")
+@conditional(User, Role)
 def api_users():
-    # SELECT * FROM user
-    stmt = db.select(User)
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
+    filters = []
     user_id = request.args.get("id")
     if user_id:
-        stmt = stmt.where(User.id == user_id)
+        filters.append(User.id == user_id)
 
     # Consulta los usuarios requeridos
-    result = db.session.execute(stmt).fetchall()
-    users = [
-        {
-            "id": user.id,
-            "id_number": user.id_number,
-            "username": user.username,
-            "names": user.names,
-            "surnames": user.surnames,
-            "role_id": user.role.id,
-        }
-        for user, in result
-    ]
+    try:
+        users, next_cursor = resources.list_resource(USERS, request.args, filters)
+    except resources.ResourceError as e:
+        return {"error": f"{e}"}, 400
 
     # Consulta los roles
-    stmt = db.select(Role).where(Role.id != 1)
-    result = db.session.execute(stmt).fetchall()
-    roles = [{"id": r.id, "name": r.name} for r, in result]
+    roles, _ = resources.list_resource(ROLES, filters=(Role.id != 1,))
 
-    return {"users": users, "roles": roles}
+    return {"users": users, "roles": roles}, _page_headers(next_cursor)
+
+
+@current_app.route("/api/v1/events")
+@requires_roles("Administrador")
+def api_events():
+    # Obtiene los parámetros de la request para filtrar y paginar
+    event = request.args.get("q", "").lower().strip()
+    module = request.args.get("module", "")
+    cursor = request.args.get("cursor")
+    direction = request.args.get("direction", "next")
+    order = request.args.get("order", "time")
+    limit = request.args.get("limit", current_app.config["EVENT_LOGGER_PAGE_SIZE"])
+
+    try:
+        limit = min(max(int(limit), 1), 500)
+
+        if order == "relevance" and event:
+            # Retorna los eventos más relevantes, sin paginar
+            stmt = events.search_events(event, ranked=True, module=module).limit(limit)
+            _events = [r for r, in db.session.execute(stmt).fetchall()]
+            next_cursor = prev_cursor = None
+        else:
+            _events, next_cursor, prev_cursor = events.paginate_events(
+                events.search_events(event, module=module), cursor, direction, limit
+            )
+    except (events.EventError, ValueError) as e:
+        return {"error": f"{e}"}, 400
+
+    return {
+        "events": [
+            {
+                "id": e.id,
+                "user_id": e.user_id,
+                "username": e.user.username,
+                "module": e.module,
+                "description": e.description,
+                "time": e.time.isoformat(),
+                "level": e.level,
+                "count": e.count,
+            }
+            for e in _events
+        ],
+        "next": next_cursor,
+        "prev": prev_cursor,
+    }
+
+
+@current_app.route("/api/v1/events/stream")
+@requires_roles("Administrador")
+def api_events_stream():
+    # Reanuda desde el último evento recibido: el navegador lo envía en el
+    # header Last-Event-ID al reconectarse
+    last_id = request.headers.get("Last-Event-ID", request.args.get("last_id"))
+    module = request.args.get("module", "")
+    username = request.args.get("user", "")
+
+    try:
+        last_id = events.last_event_id() if last_id is None else int(last_id)
+    except ValueError:
+        return {"error": "El id del último evento no es válido"}, 400
+
+    lines = events.stream_events(
+        last_id,
+        module,
+        username,
+        current_app.config["EVENT_STREAM_POLL_INTERVAL"],
+        current_app.config["EVENT_STREAM_TIMEOUT"],
+    )
+    return Response(
+        stream_with_context(lines),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@current_app.route("/api/v1/event-stats")
+@requires_roles("Administrador")
+def api_event_stats():
+    # Obtiene los parámetros de la request para agrupar y filtrar
+    groups = request.args.get("group", "module").split(",")
+    module = request.args.get("module", "")
+    start_date = request.args.get("start", "")
+    end_date = request.args.get("end", "")
+    limit = request.args.get("limit", 100)
+
+    try:
+        limit = min(max(int(limit), 1), 1000)
+        start, end = events.parse_date_range(start_date, end_date)
+        stats = event_stats.get_stats(groups, start, end, module, limit)
+    except (events.EventError, event_stats.EventStatsError, ValueError) as e:
+        return {"error": f"{e}"}, 400
+
+    return {"stats": stats}
+
+
+@current_app.route("/api/v1/cache-stats")
+@requires_roles("Administrador")
+def api_cache_stats():
+    # Aciertos y fallos de la caché de listas de este proceso
+    return {"lookups": lookups.stats()}
 
 
 @current_app.route("/api/v1/projects")
 @requires_roles("Gerente de Operaciones")
+@conditional(Project)
 def api_projects():
-    stmt = db.select(Project)
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
+    filters = []
     project_id = request.args.get("id")
     if project_id:
-        stmt = stmt.where(Project.id == project_id)
+        filters.append(Project.id == project_id)
 
     # Consulta los proyectos requeridos
-    result = db.session.execute(stmt).fetchall()
-    projects = [
-        {
-            "id": project.id,
-            "description": project.description,
-            "start_date": project.start_date.strftime("%Y-%m-%d"),
-            "deadline": project.end_date.strftime("%Y-%m-%d"),
-        }
-        for project, in result
-    ]
-
-    return projects
+    try:
+        return _resource_response(PROJECTS, filters)
+    except resources.ResourceError as e:
+        return {"error": f"{e}"}, 400
 
 
 @current_app.route("/api/v1/clients")
 @requires_roles("Analista de Operaciones")
+@conditional(Client)
 def api_clients():
-    stmt = db.select(Client)
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
+    filters = []
     client_id = request.args.get("id")
     if client_id:
-        stmt = stmt.where(Client.id == client_id)
+        filters.append(Client.id == client_id)
 
     # Consulta los clientes requeridos
-    result = db.session.execute(stmt).fetchall()
-    clients = [
-        {
-            "id": client.id,
-            "id_number": client.id_number,
-            "names": client.names,
-            "surnames": client.surnames,
-            "birthdate": client.birthdate.strftime("%Y-%m-%d"),
-            "phone_number": client.phone_number,
-            "email": client.email,
-            "address": client.address,
-        }
-        for client, in result
-    ]
-
-    return clients
+    try:
+        return _resource_response(CLIENTS, filters)
+    except resources.ResourceError as e:
+        return {"error": f"{e}"}, 400
 
 
 @current_app.route("/api/v1/vehicles")
 @requires_roles("Analista de Operaciones")
+@conditional(Vehicle)
 def api_vehicles():
-    stmt = db.select(Vehicle)
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
+    filters = []
     vehicle_id = request.args.get("id")
     if vehicle_id:
-        stmt = stmt.where(Vehicle.id == vehicle_id)
+        filters.append(Vehicle.id == vehicle_id)
 
-    # Consulta los clientes requeridos
-    result = db.session.execute(stmt).fetchall()
-    vehicles = [
-        {
-            "license_plate": vehicle.license_plate,
-            "brand": vehicle.brand,
-            "model": vehicle.model,
-            "year": vehicle.year,
-            "body_number": vehicle.body_number,
-            "engine_number": vehicle.engine_number,
-            "color": vehicle.color,
-            "problem": vehicle.problem,
-        }
-        for vehicle, in result
-    ]
+    # Consulta los vehículos requeridos
+    try:
+        return _resource_response(VEHICLES, filters)
+    except resources.ResourceError as e:
+        return {"error": f"{e}"}, 400
 
-    return vehicles
+
+@current_app.route("/api/v1/vehicles/search")
+@requires_roles("Gerente de Operaciones")
+@conditional(Vehicle, Client)
+def api_search_vehicles():
+    # Un id retorna solo ese vehículo, por ejemplo el ya seleccionado
+    vehicle_id = request.args.get("id")
+    if vehicle_id:
+        return {"vehicles": vehicles.get_vehicle_option(vehicle_id)}
+
+    # Obtiene el término de búsqueda y la cantidad de resultados
+    term = request.args.get("q", "")
+    try:
+        limit = int(request.args.get("limit", vehicles.SEARCH_LIMIT))
+    except ValueError:
+        return {"error": "El límite debe ser un número entero"}, 400
+
+    return {"vehicles": vehicles.search_vehicles(term, limit)}
 
 
 @current_app.route("/api/v1/departments")
 @requires_roles("Administrador")
+@conditional(Department)
 def api_departments():
-    stmt = db.select(Department)
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
+    filters = []
     dept_id = request.args.get("id")
     if dept_id:
-        stmt = stmt.where(Department.id == dept_id)
+        filters.append(Department.id == dept_id)
 
     # Consulta los departamentos requeridos
-    result = db.session.execute(stmt).fetchall()
-    depts = [
-        {
-            "id": dept.id,
-            "description": dept.description,
-        }
-        for dept, in result
-    ]
+    try:
+        return _resource_response(DEPARTMENTS, filters)
+    except resources.ResourceError as e:
+        return {"error": f"{e}"}, 400
 
-    return depts
+
+def _project_details_dropdown_data() -> dict:
+    """Retorna los datos de los dropdowns de los detalles de proyecto."""
+    # Los usuarios y departamentos se obtienen de la caché. Los vehículos se
+    # buscan a medida que se escriben en /api/v1/vehicles/search
+    return {
+        "users": lookups.users(),
+        "departments": lookups.departments(),
+    }
 
 
 @current_app.route("/api/v1/project-details-dropdown-data")
 @requires_roles("Gerente de Operaciones")
+@conditional(User, Department)
 def get_project_details_dropdown_data():
-    # SELECT * FROM user
-    stmt = db.select(User)
-    result = db.session.execute(stmt).fetchall()
-    users = [
-        {"id": u.id, "names": u.names, "surnames": u.surnames, "id_number": u.id_number}
-        for u, in result
-    ]
-
-    # SELECT * FROM department
-    stmt = db.select(Department)
-    result = db.session.execute(stmt).fetchall()
-    departments = [{"id": d.id, "description": d.description} for d, in result]
-
-    # SELECT * FROM vehicle
-    stmt = db.select(Vehicle)
-    result = db.session.execute(stmt).fetchall()
-    vehicles = [
-        {
-            "id": v.id,
-            "license_plate": v.license_plate,
-            "brand": v.brand,
-            "id_number": v.owner.id_number,
-            "names": v.owner.names,
-            "surnames": v.owner.surnames,
-            "problem": v.problem,
-        }
-        for v, in result
-    ]
-
-    data = {"users": users, "departments": departments, "vehicles": vehicles}
-
-    return data
+    return _project_details_dropdown_data()
 
 
 @current_app.route("/api/v1/project-details")
 @requires_roles("Gerente de Operaciones")
+@conditional(ProjectDetail, User, Department)
 def api_project_details():
-    # SELECT * FROM project_detail
-    stmt = db.select(ProjectDetail)
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
+    filters = []
     project_detail_id = request.args.get("id")
     if project_detail_id:
-        stmt = stmt.where(ProjectDetail.id == project_detail_id)
+        filters.append(ProjectDetail.id == project_detail_id)
 
     # Consulta los detalles de proyecto requeridos
-    result = db.session.execute(stmt).fetchall()
-    project_details = [
-        {
-            "id": pd.id,
-            "project_id": pd.project.id,
-            "manager_id": pd.manager.id,
-            "department_id": pd.department.id,
-            "vehicle_id": pd.vehicle.id,
-            "solution": pd.solution,
-            "cost": pd.cost,
-            "observations": pd.observations,
-        }
-        for pd, in result
-    ]
+    try:
+        project_details, next_cursor = resources.list_resource(
+            PROJECT_DETAILS, request.args, filters
+        )
+    except resources.ResourceError as e:
+        return {"error": f"{e}"}, 400
 
     # Obtiene los datos del dropdown
-    data = get_project_details_dropdown_data()
+    data = _project_details_dropdown_data()
 
-    return {"project_details": project_details, "dropdown_data": data}
+    return {
+        "project_details": project_details,
+        "dropdown_data": data,
+    }, _page_headers(next_cursor)
 
 
 @current_app.route("/api/v1/measurement-units/")
 @requires_roles("Gerente de Operaciones", "Administrador")
+@conditional(MeasureUnit)
 def api_measure_units():
-    stmt = db.select(MeasureUnit)
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
+    filters = []
     measure_unit_id = request.args.get("measurement-unit-id")
     if measure_unit_id:
-        stmt = stmt.where(MeasureUnit.id == measure_unit_id)
+        filters.append(MeasureUnit.id == measure_unit_id)
 
     # Consulta las unidades de medida requeridas
-    result = db.session.execute(stmt).fetchall()
-    measure_units = [
-        {
-            "id": uom.id,
-            "dimension": uom.dimension,
-            "unit": uom.unit,
-        }
-        for uom, in result
-    ]
-
-    return measure_units
-
+    try:
+        return _resource_response(MEASURE_UNITS, filters)
+    except resources.ResourceError as e:
+        return {"error": f"{e}"}, 400
 
-@current_app.route("/api/v1/action-plans-dropdown-data")
-@requires_roles("Gerente de Operaciones")
-def get_action_plans_dropdown_data():
-    # SELECT * FROM USER
-    stmt = db.select(User)
-    result = db.session.execute(stmt).fetchall()
-
-    users = [{"id": u.id, "names": u.names, "surnames": u.surnames} for u, in result]
 
+def _action_plans_dropdown_data() -> dict:
+    """Retorna los datos de los dropdowns de los planes de acción."""
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
     project_detail_id = request.args.get("id")
 
-    stmt = db.select(ActionPlan)
+    stmt = db.select(ActionPlan.id, ActionPlan.action)
     if project_detail_id:
         stmt = stmt.where(ActionPlan.project_detail_id == project_detail_id)
 
     # Consulta los planes de acción requeridos
     result = db.session.execute(stmt).fetchall()
-    actions = [{"id": a.id, "description": a.action} for a, in result]
+    actions = [{"id": a.id, "description": a.action} for a in result]
 
-    # Obtiene las unidades de medida
-    measure_units = api_measure_units()
+    # Los usuarios y las unidades de medida se obtienen de la caché
+    return {
+        "users": lookups.users(),
+        "actions": actions,
+        "measureUnits": lookups.measure_units(),
+    }
 
-    return {"users": users, "actions": actions, "measureUnits": measure_units}
+
+@current_app.route("/api/v1/action-plans-dropdown-data")
+@requires_roles("Gerente de Operaciones")
+@conditional(User, ActionPlan, MeasureUnit)
+def get_action_plans_dropdown_data():
+    return _action_plans_dropdown_data()
 
 
 @current_app.route("/api/v1/action-plans")
 @requires_roles("Gerente de Operaciones")
+@conditional(ActionPlan, Activity, HumanTalent, MaterialSupply, User, MeasureUnit)
 def api_action_plans():
-    # SELECT * FROM ActionPlan JOIN Activity ON ActionPlan.id = Activity.action_plan_id
-    stmt = db.select(ActionPlan, Activity).join(
-        Activity, ActionPlan.id == Activity.action_plan_id
-    )
-
     # Obtiene los parámetros de la request para filtrar por id
     # y filtra de ser necesario
-    action_plan_id = request.args.get("action_id")
-    activity_id = request.args.get("activity_id")
-    material_id = request.args.get("material_supply_id")
-    human_talent_id = request.args.get("human_talent_id")
+    action_plans = project_plans.get_action_plan_tree(
+        project_detail_id=request.args.get("id"),
+        action_plan_id=request.args.get("action_id"),
+        activity_id=request.args.get("activity_id"),
+        human_talent_id=request.args.get("human_talent_id"),
+        material_supply_id=request.args.get("material_supply_id"),
+    )
 
-    filters = []
+    # Los nombres de los usuarios y las unidades de medida se obtienen de la
+    # caché
+    return {
+        "actionPlans": action_plans,
+        "users": lookups.users(),
+        "measureUnits": lookups.measure_units(),
+    }
 
-    if action_plan_id:
-        filters.append(ActionPlan.id == action_plan_id)
 
-    if activity_id:
-        filters.append(Activity.id == activity_id)
+# ========== Sincronización de cambios ==========
+# Recursos cuyos cambios pueden sincronizarse, por tabla, y los roles que
+# pueden verlos (los mismos de su endpoint)
+CHANGE_FEEDS = {
+    "user": (USERS, ("Administrador",)),
+    "department": (DEPARTMENTS, ("Administrador",)),
+    "measure_unit": (MEASURE_UNITS, ("Gerente de Operaciones", "Administrador")),
+    "project": (PROJECTS, ("Gerente de Operaciones",)),
+    "project_detail": (PROJECT_DETAILS, ("Gerente de Operaciones",)),
+    "client": (CLIENTS, ("Analista de Operaciones",)),
+    "vehicle": (VEHICLES, ("Analista de Operaciones",)),
+}
+
+
+def _changed_rows(table: str, ids: list) -> dict:
+    """Retorna las filas actuales de la tabla con los ids indicados, por id."""
+    resource, _ = CHANGE_FEEDS[table]
+    fields = list(resource.fields)
+    serialize = resource.serializer(fields)
+
+    # SELECT key, fields... FROM table WHERE key IN (ids...)
+    stmt = db.select(resource.key, *(resource.fields[name] for name in fields)).where(
+        resource.key.in_(ids)
+    )
+    return {row[0]: serialize(row[1:]) for row in db.session.execute(stmt)}
+
+
+@current_app.route("/api/v1/changes")
+@login_required
+def api_changes():
+    # Tablas visibles para el rol del usuario
+    role = session["role"]
+    tables = [
+        table
+        for table, (_, roles) in CHANGE_FEEDS.items()
+        if any(role.startswith(r) for r in roles)
+    ]
 
-    if material_id:
-        filters.append(MaterialSupply.id == material_id)
+    requested = request.args.get("tables")
+    if requested:
+        requested = requested.split(",")
+        if not set(requested) <= set(tables):
+            return {"error": "Las tablas válidas son: " + ", ".join(tables)}, 400
+        tables = requested
+
+    # Sin token solo se retorna el actual, desde el que pedir los cambios
+    since = request.args.get("since")
+    if since is None:
+        return {"changes": [], "token": changes.latest_token(), "more": False}
+
+    try:
+        since = changes.parse_token(since)
+        limit = resources.parse_limit(request.args.get("limit")) or resources.MAX_LIMIT
+    except changes.ExpiredTokenError as e:
+        # Los cambios desde el token ya se eliminaron: hay que recargar todo
+        return {"error": f"{e}", "token": changes.latest_token()}, 410
+    except (changes.ChangeError, resources.ResourceError) as e:
+        return {"error": f"{e}"}, 400
+
+    changed, token, more = changes.get_changes(since, tables, limit)
+
+    # Consulta las filas insertadas o actualizadas con una consulta por tabla
+    ids = {}
+    for table, row_id, operation in changed:
+        if operation != changes.DELETE:
+            ids.setdefault(table, []).append(row_id)
+    rows = {table: _changed_rows(table, table_ids) for table, table_ids in ids.items()}
+
+    result = []
+    for table, row_id, operation in changed:
+        row = rows.get(table, {}).get(row_id)
+        if row is None:
+            # La fila se eliminó después del cambio
+            operation = changes.DELETE
+        result.append(
+            {"table": table, "id": row_id, "operation": operation, "row": row}
+        )
 
-    if human_talent_id:
-        filters.append(HumanTalent.id == human_talent_id)
+    return {"changes": result, "token": token, "more": more}
 
-    # Agrega las condiciones de filtrado a stmt
-    if filters:
-        stmt = (
-            db.session.query(ActionPlan, Activity, HumanTalent, MaterialSupply)
-            .join(Activity, ActionPlan.id == Activity.action_plan_id)
-            .join(HumanTalent, Activity.id == HumanTalent.activity_id)
-            .join(MaterialSupply, Activity.id == MaterialSupply.activity_id)
-            .filter(*filters)
-        )
 
-    # Consulta los planes de acción y actividades requeridas
-    results = db.session.execute(stmt).fetchall()
-
-    # Construye la lista de diccionarios con los resultados
-    action_plans = {}
-    for r in results:
-        ap = r[0]
-        act = r[1]
-        if ap.id not in action_plans:
-            # Si es la primera vez que se encuentra este ActionPlan,
-            # se crea un nuevo diccionario para almacenar sus datos
-            action_plans[ap.id] = {"id": ap.id, "action": ap.action, "activities": []}
-        # Se agrega la actividad correspondiente al diccionario del ActionPlan
-        action_plans[ap.id]["activities"].append(
-            {
-                "id": act.id,
-                "description": act.description,
-                "start_date": act.start_date.strftime("%Y-%m-%d"),
-                "deadline": act.deadline.strftime("%Y-%m-%d"),
-                "charge_person_id": act.charge_person_id,
-                "work_hours": act.work_hours,
-                "cost": act.cost,
-                "human_talents": [
-                    {
-                        "id": ht.id,
-                        "amount_persons": ht.amount,
-                        "cost_hl": ht.cost / act.work_hours,
-                    }
-                    for ht in act.human_talents
-                ],
-                "material_supplies": [
-                    {
-                        "id": ms.id,
-                        "category": ms.category,
-                        "description": ms.description,
-                        "amount": ms.amount,
-                        "unit_id": ms.measure_unit_id,
-                        "cost": ms.cost / ms.amount,
-                    }
-                    for ms in act.materials
-                ],
-            }
-        )
+# ========== Batch ==========
+# Rutas que no pueden ejecutarse dentro de un batch
+_NOT_BATCHABLE = ("/api/v1/batch", "/api/v1/events/stream")
+
+
+def _parse_batch(data) -> list:
+    """
+    Valida el cuerpo de una request al endpoint batch y retorna la lista de
+    sub-requests como pares (ruta, query string).
+
+    Lanza una excepción ValueError si el cuerpo no es válido.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("requests"), list):
+        raise ValueError("El cuerpo debe ser un objeto con la lista 'requests'")
+
+    subrequests = data["requests"]
+    limit = current_app.config["API_BATCH_LIMIT"]
+    if not 1 <= len(subrequests) <= limit:
+        raise ValueError(f"Se permiten entre 1 y {limit} sub-requests")
+
+    parsed = []
+    for sub in subrequests:
+        path = sub.get("path") if isinstance(sub, dict) else None
+        params = sub.get("params", {}) if isinstance(sub, dict) else None
+        if not isinstance(path, str) or not isinstance(params, dict):
+            raise ValueError("Cada sub-request debe tener una ruta y parámetros")
+
+        path, _, query = path.partition("?")
+        if not path.startswith("/api/v1/") or path.rstrip("/") in _NOT_BATCHABLE:
+            raise ValueError(f"La ruta '{path}' no puede ejecutarse en un batch")
 
-    # Obtiene los datos del dropdown para hallar los nombres de los usuarios
-    data = get_action_plans_dropdown_data()
+        if params:
+            query = "&".join(filter(None, [query, urlencode(params, doseq=True)]))
+        parsed.append((path, query))
 
+    return parsed
+
+
+def _run_subrequest(path: str, query: str) -> dict:
+    """
+    Ejecuta una sub-request GET con las cookies de la request actual, en la
+    misma sesión de la base de datos, y retorna su estado, headers y cuerpo.
+    """
+    environ = {
+        key: value
+        for key, value in request.environ.items()
+        if key not in ("CONTENT_TYPE", "HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE")
+    }
+    environ.update(
+        REQUEST_METHOD="GET",
+        PATH_INFO=path,
+        QUERY_STRING=query,
+        CONTENT_LENGTH="0",
+    )
+    environ["wsgi.input"] = io.BytesIO()
+
+    # El contexto de la sub-request comparte el contexto de la aplicación, y
+    # por lo tanto la sesión de la base de datos y el usuario actual
+    with current_app.request_context(environ):
+        try:
+            response = current_app.make_response(current_app.dispatch_request())
+        except HTTPException as e:
+            response = e.get_response()
+
+    headers = {
+        name: response.headers[name]
+        for name in ("ETag", "Link", "Location")
+        if name in response.headers
+    }
     return {
-        "actionPlans": action_plans,
-        "users": data["users"],
-        "measureUnits": data["measureUnits"],
+        "path": f"{path}?{query}" if query else path,
+        "status": response.status_code,
+        "headers": headers,
+        "body": response.get_json(silent=True) if response.is_json else None,
     }
+
+
+@current_app.route("/api/v1/batch", methods=["POST"])
+@login_required
+def api_batch():
+    # Cada sub-request verifica los roles de su ruta
+    try:
+        subrequests = _parse_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return {"error": f"{e}"}, 400
+
+    return {"responses": [_run_subrequest(path, query) for path, query in subrequests]}
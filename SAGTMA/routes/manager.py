@@ -48,7 +48,9 @@ def portfolio() -> Response:
         stmt = db.select(Project).where(Project.description.like(f"%{descrip}%"))
 
         # Añade el evento de búsqueda
-        events.add_event("Portafolio de Proyectos", f"Buscar '{descrip}'")
+        events.add_event(
+            "Portafolio de Proyectos", f"Buscar '{descrip}'", events.SEARCH
+        )
     else:
         # Selecciona los proyectos de la base de datos
         stmt = db.select(Project)
@@ -176,11 +178,19 @@ def project_data(project_id) -> Response:
         events.add_event(
             "Detalles de Proyecto",
             f"Buscar '{detail}' del proyecto '{_project.description}'",
+            events.SEARCH,
         )
     else:
         # Selecciona los datos del proyecto con el id indicado
         stmt = db.select(ProjectDetail).where(ProjectDetail.project_id == project_id)
 
+    # Carga el vehículo, el departamento y el gerente de cada detalle en la
+    # misma consulta
+    stmt = stmt.options(
+        db.joinedload(ProjectDetail.vehicle),
+        db.joinedload(ProjectDetail.department),
+        db.joinedload(ProjectDetail.manager),
+    )
     result = db.session.execute(stmt).fetchall()
     _project_details = [r for r, in result]
 
@@ -303,6 +313,7 @@ def action_plans(project_detail_id) -> Response:
         events.add_event(
             "Planes de Accion",
             f"Buscar '{plan}' del detalle de proyecto con id {project_detail_id}",
+            events.SEARCH,
         )
     else:
         # Selecciona los planes de accion del proyecto con el id indicado y
@@ -316,6 +327,15 @@ def action_plans(project_detail_id) -> Response:
             .distinct(ActionPlan.id)
         )
 
+    # Carga las actividades de los planes, con sus talentos humanos,
+    # materiales y responsables, en una consulta por tabla
+    stmt = stmt.options(
+        db.selectinload(ActionPlan.activities).options(
+            db.joinedload(Activity.charge_person),
+            db.selectinload(Activity.human_talents),
+            db.selectinload(Activity.materials),
+        )
+    )
     result = db.session.execute(stmt).fetchall()
     _action_plans = [r for r, in result]
 
@@ -496,10 +516,18 @@ def human_talents(project_detail_id) -> Response:
             )
 
         # Añade el evento de búsqueda
-        events.add_event("Talentos Humanos", f"Buscar '{human_talent}'")
+        events.add_event("Talentos Humanos", f"Buscar '{human_talent}'", events.SEARCH)
     else:
         pass
 
+    # Carga la actividad, el plan de acción y el responsable de cada talento
+    # humano en la misma consulta
+    stmt = stmt.options(
+        db.joinedload(HumanTalent.activity).options(
+            db.joinedload(Activity.action_plan),
+            db.joinedload(Activity.charge_person),
+        )
+    )
     result = db.session.execute(stmt).fetchall()
     _human_talents = [r for r, in result]
 
@@ -559,8 +587,19 @@ def materials_supplies(project_detail_id) -> Response:
             )
 
         # Añade el evento de búsqueda
-        events.add_event("Materiales y Suministros", f"Buscar '{material_supp}'")
+        events.add_event(
+            "Materiales y Suministros", f"Buscar '{material_supp}'", events.SEARCH
+        )
 
+    # Carga la unidad de medida, la actividad, el plan de acción y el
+    # responsable de cada material en la misma consulta
+    stmt = stmt.options(
+        db.joinedload(MaterialSupply.measure_unit),
+        db.joinedload(MaterialSupply.activity).options(
+            db.joinedload(Activity.action_plan),
+            db.joinedload(Activity.charge_person),
+        ),
+    )
     result = db.session.execute(stmt).fetchall()
     _materials_supplies = [r for r, in result]
 
@@ -0,0 +1,43 @@
+$(document).ready(function () {
+  // Logger en vivo: solo en la primera página sin filtros
+  var table = $("#events-table");
+  var url = table.data("stream-url");
+  if (!url || !window.EventSource) {
+    return;
+  }
+
+  // Trunca el texto igual que el filtro truncate de Jinja
+  function truncate(text, length) {
+    return text.length <= length ? text : text.slice(0, length - 3) + "...";
+  }
+
+  // El navegador reanuda la transmisión desde el último id recibido
+  var source = new EventSource(url);
+  source.onmessage = function (message) {
+    var event = JSON.parse(message.data);
+    // "YYYY-MM-DDTHH:MM:SS..." sin conversión de zona horaria
+    var date = event.time.slice(0, 10).split("-").reverse().join("/");
+    var time = event.time.slice(11, 19);
+
+    var description = $("<td>").text(truncate(event.description, 40));
+    if (event.count > 1) {
+      description.append(" ", $("<span>").addClass("badge bg-secondary").text("x" + event.count));
+    }
+
+    var row = $("<tr>").append(
+      $("<td>").text(event.id),
+      $("<td>").text(event.username),
+      description,
+      $("<td>").text(event.module),
+      $("<td>").text(date),
+      $("<td>").text(time),
+      $("<td>")
+    );
+
+    // Añade la fila al inicio de la tabla, que está ordenada del más reciente
+    // al más antiguo
+    $("#no-events").remove();
+    table.removeClass("d-none");
+    table.find("tbody").prepend(row);
+  };
+});
@@ -1,4 +1,8 @@
 $(document).ready(function () {
+  // Número de la última búsqueda de vehiculos; las respuestas de búsquedas
+  // anteriores se ignoran, aunque lleguen después
+  var vehicleSearchSeq = 0;
+
   // Agregar detalles de proyecto
   $(document).on("click", ".add-project-detail", function () {
     var form = $(this);
@@ -9,20 +13,13 @@ $(document).ready(function () {
       success: function (data) {
         $("#add-project-detail-modal").modal("show");
         var users = data.users;
-        var vehicles = data.vehicles;
         var departments = data.departments;
 
-        // Obtener el select de los vehiculos y vaciar su contenido
+        // Vaciar el select de los vehiculos, que se llena al buscarlos
         const addVehiclesSelect = $("#add-vehicle");
+        vehicleSearchSeq++;
         addVehiclesSelect.empty();
-
-        // Agregar una opción por cada vehiculo
-        vehicles.forEach(function (vehicle) {
-          const option = $("<option>").attr("value", vehicle.id).attr("data-problem", vehicle.problem).text(`${vehicle.license_plate} | ${vehicle.brand} | ${vehicle.id_number} | ${vehicle.names} ${vehicle.surnames}`);
-
-          // Agregar la opción al select
-          addVehiclesSelect.append(option);
-        });
+        $("#add-vehicle-search").val("");
 
         // Obtener el select de los departamentos y vaciar su contenido
         const addDepartmentsSelect = $("#add-department");
@@ -78,24 +75,23 @@ $(document).ready(function () {
         $("#edit-project-detail-modal").modal("show");
         var projectDetail = data.project_details[0];
         var users = data.dropdown_data.users;
-        var vehicles = data.dropdown_data.vehicles;
         var departments = data.dropdown_data.departments;
 
-        // Obtener el select de los vehiculos y vaciar su contenido
+        // Obtener el select de los vehiculos y agregar solo el vehiculo actual;
+        // los demás se obtienen al buscarlos
         const editVehiclesSelect = $("#edit-vehicle");
         editVehiclesSelect.empty();
-
-        // Agregar una opción por cada vehiculo
-        vehicles.forEach(function (vehicle) {
-          const option = $("<option>").attr("value", vehicle.id).attr("data-problem", vehicle.problem).text(`${vehicle.license_plate} | ${vehicle.brand} | ${vehicle.id_number} | ${vehicle.names} ${vehicle.surnames}`);
-
-          // Si el vehiculo es el actual, seleccionarlo por defecto
-          if (vehicle.id === projectDetail.vehicle_id) {
-            option.attr("selected", "selected");
-          }
-
-          // Agregar la opción al select
-          editVehiclesSelect.append(option);
+        $("#edit-vehicle-search").val("");
+
+        var seq = ++vehicleSearchSeq;
+        $.getJSON({
+          url: "/api/v1/vehicles/search",
+          data: { id: projectDetail.vehicle_id },
+          success: function (data) {
+            if (seq !== vehicleSearchSeq) return;
+            fillVehicleSelect(editVehiclesSelect, data.vehicles);
+            updateProblemField("vehicle-select-edit", "edit-problem-field");
+          },
         });
 
         // Obtener el select de los departamentos y vaciar su contenido
@@ -161,6 +157,26 @@ $(document).ready(function () {
     });
   });
 
+  // Buscar vehiculos a medida que se escribe, esperando a que se deje de escribir
+  var vehicleSearchTimeout;
+  $(document).on("input", ".vehicle-search", function () {
+    var search = $(this);
+    clearTimeout(vehicleSearchTimeout);
+
+    vehicleSearchTimeout = setTimeout(function () {
+      var seq = ++vehicleSearchSeq;
+      $.getJSON({
+        url: "/api/v1/vehicles/search",
+        data: { q: search.val() },
+        success: function (data) {
+          if (seq !== vehicleSearchSeq) return;
+          fillVehicleSelect($("." + search.data("select")), data.vehicles);
+          updateProblemField(search.data("select"), search.data("problem"));
+        },
+      });
+    }, 250);
+  });
+
   // Eliminar detalles de proyecto
   $(document).on("click", ".delete-project-detail", function () {
     var form = $(this);
@@ -171,10 +187,30 @@ $(document).ready(function () {
   });
 });
 
+// Reemplazar las opciones del select de vehículos por los vehículos dados
+function fillVehicleSelect(vehiclesSelect, vehicles) {
+  vehiclesSelect.empty();
+
+  // Agregar una opción por cada vehiculo
+  vehicles.forEach(function (vehicle) {
+    const option = $("<option>").attr("value", vehicle.id).attr("data-problem", vehicle.problem).text(`${vehicle.license_plate} | ${vehicle.brand} | ${vehicle.id_number} | ${vehicle.names} ${vehicle.surnames}`);
+
+    // Agregar la opción al select
+    vehiclesSelect.append(option);
+  });
+}
+
 // Actualizar el campo de problema al seleccionar un vehículo
 function updateProblemField(selectClass, selectId) {
   var vehicleSelect = document.getElementsByClassName(selectClass)[0];
   var selectedVehicleOption = vehicleSelect.options[vehicleSelect.selectedIndex];
+
+  // Sin vehículos encontrados no hay problema que mostrar
+  if (!selectedVehicleOption) {
+    clearProblemField(selectId);
+    return;
+  }
+
   var problem = selectedVehicleOption.getAttribute("data-problem");
 
   var problemField = document.getElementById(selectId);
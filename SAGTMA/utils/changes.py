@@ -0,0 +1,190 @@
+import datetime
+from typing import Collection, List, Tuple
+
+from SAGTMA.models import (
+    ActionPlan,
+    Activity,
+    Change,
+    Client,
+    Department,
+    HumanTalent,
+    MaterialSupply,
+    MeasureUnit,
+    Project,
+    ProjectDetail,
+    RoutingSession,
+    User,
+    Vehicle,
+    db,
+)
+
+# Operaciones del registro de cambios
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+# Tablas cuyos cambios se registran
+TRACKED = {
+    model.__tablename__
+    for model in [
+        User,
+        Project,
+        Client,
+        Vehicle,
+        Department,
+        ProjectDetail,
+        MeasureUnit,
+        ActionPlan,
+        Activity,
+        HumanTalent,
+        MaterialSupply,
+    ]
+}
+
+
+class ChangeError(ValueError):
+    pass
+
+
+class ExpiredTokenError(ChangeError):
+    pass
+
+
+@db.event.listens_for(RoutingSession, "after_flush")
+def _record_changes(session, flush_context):
+    """
+    Registra en el registro de cambios las filas insertadas, actualizadas o
+    eliminadas por los helpers de utils, en la misma transacción. Incluye las
+    filas eliminadas en cascada por el ORM.
+    """
+    # Durante after_flush new, dirty y deleted aún reflejan lo que se escribió
+    rows = []
+    for operation, instances in [
+        (INSERT, session.new),
+        (UPDATE, session.dirty),
+        (DELETE, session.deleted),
+    ]:
+        for instance in instances:
+            table = getattr(instance, "__tablename__", None)
+            if table not in TRACKED:
+                continue
+            if operation == UPDATE and not session.is_modified(
+                instance, include_collections=False
+            ):
+                continue
+            rows.append(
+                {"table_name": table, "row_id": instance.id, "operation": operation}
+            )
+
+    if rows:
+        # INSERT INTO change_log (table_name, row_id, operation) VALUES ...
+        session.connection().execute(db.insert(Change), rows)
+
+
+def record_updates(model, ids):
+    """
+    Registra como actualizadas las filas del modelo cuyos ids retorna la
+    consulta ids, para los cambios hechos con sentencias UPDATE que no pasan
+    por el ORM. No confirma la transacción.
+    """
+    # INSERT INTO change_log (table_name, row_id, operation, time)
+    #   SELECT table, id, 'update', now FROM (ids...)
+    ids = ids.subquery()
+    stmt = db.insert(Change).from_select(
+        ["table_name", "row_id", "operation"],
+        db.select(db.literal(model.__tablename__), *ids.c, db.literal(UPDATE)),
+    )
+    db.session.execute(stmt)
+
+
+def prune_changes(older_than: datetime.datetime) -> int:
+    """
+    Elimina los cambios registrados antes de la fecha indicada, salvo el
+    último, que conserva el token de sincronización actual.
+
+    Los tokens anteriores a los cambios eliminados expiran (ver
+    parse_token). Retorna la cantidad de cambios eliminados.
+    """
+    # DELETE FROM change_log WHERE time < older_than
+    #   AND id < (SELECT max(id) FROM change_log)
+    stmt = (
+        db.delete(Change)
+        .where(Change.time < older_than)
+        .where(Change.id < db.select(db.func.max(Change.id)).scalar_subquery())
+    )
+    count = db.session.execute(
+        stmt, execution_options={"synchronize_session": False}
+    ).rowcount
+    db.session.commit()
+
+    return count
+
+
+def parse_token(token: str) -> int:
+    """
+    Convierte un token de sincronización en el id del último cambio visto.
+
+    Lanza una excepción ChangeError si el token no es válido, y
+    ExpiredTokenError si los cambios posteriores a él ya se eliminaron del
+    registro y hay que volver a cargar las tablas.
+    """
+    try:
+        since = int(token)
+    except ValueError:
+        raise ChangeError("El token de sincronización no es válido")
+
+    if since < 0:
+        raise ChangeError("El token de sincronización no es válido")
+
+    # SELECT min(id) FROM change_log
+    oldest = db.session.execute(db.select(db.func.min(Change.id))).scalar()
+    if oldest is not None and since < oldest - 1:
+        raise ExpiredTokenError(
+            "El token de sincronización expiró, vuelva a cargar las tablas"
+        )
+    return since
+
+
+def latest_token() -> int:
+    """Retorna el token de sincronización actual: el id del último cambio."""
+    stmt = db.select(db.func.max(Change.id))
+    return db.session.execute(stmt).scalar() or 0
+
+
+def get_changes(
+    since: int, tables: Collection[str], limit: int
+) -> Tuple[List[Tuple[str, int, str]], int, bool]:
+    """
+    Retorna los cambios de las tablas indicadas posteriores al token, como
+    tuplas (tabla, id de la fila, operación), el token desde el que pedir los
+    siguientes y si quedan más cambios por leer.
+
+    Se leen a lo sumo limit cambios del registro. Si una fila cambió varias
+    veces solo se retorna su última operación.
+    """
+    latest = latest_token()
+
+    # SELECT id, table_name, row_id, operation FROM change_log
+    #   WHERE id > since AND id <= latest AND table_name IN (tables...)
+    #   ORDER BY id LIMIT limit + 1
+    stmt = (
+        db.select(Change.id, Change.table_name, Change.row_id, Change.operation)
+        .where(Change.id > since, Change.id <= latest, Change.table_name.in_(tables))
+        .order_by(Change.id)
+        .limit(limit + 1)
+    )
+    result = db.session.execute(stmt).fetchall()
+
+    more = len(result) > limit
+    result = result[:limit]
+    token = result[-1].id if more else max(since, latest)
+
+    operations = {}
+    for row in result:
+        key = (row.table_name, row.row_id)
+        # Reinsertar la clave la mueve al final, en el orden del último cambio
+        operations.pop(key, None)
+        operations[key] = row.operation
+
+    changes = [(table, row_id, op) for (table, row_id), op in operations.items()]
+    return changes, token, more
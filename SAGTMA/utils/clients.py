@@ -1,8 +1,17 @@
 import re
 import datetime
 
-from SAGTMA.models import Client, ProjectDetail, Vehicle, db
-from SAGTMA.utils import events
+from SAGTMA.models import (
+    Client,
+    ProjectDetail,
+    Vehicle,
+    ActionPlan,
+    Activity,
+    HumanTalent,
+    MaterialSupply,
+    db,
+)
+from SAGTMA.utils import events, versions
 from SAGTMA.utils.validations import validate_id, validate_name
 
 
@@ -132,6 +141,9 @@ def register_client(
 
     db.session.add(new_client)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Client)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Detalles de los Clientes", f"Agregar cliente '{new_client.id_number}'"
@@ -209,6 +221,9 @@ def edit_client(
     edited_client.email = email
     edited_client.address = address
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Client)
+
     # Registra el evento en la base de datos
     events.add_event("Detalles de los Clientes", f"Modificar cliente '{id_number}'")
 
@@ -242,6 +257,17 @@ def delete_client(client_id: int):
     # Elimina el cliente de la base de datos
     db.session.delete(client)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(
+        Client,
+        Vehicle,
+        ProjectDetail,
+        ActionPlan,
+        Activity,
+        HumanTalent,
+        MaterialSupply,
+    )
+
     # Registra el evento en la base de datos
     events.add_event(
         "Detalles de los Clientes", f"Eliminar cliente '{client.id_number}'"
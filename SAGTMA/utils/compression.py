@@ -0,0 +1,210 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from flask import Flask, Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se usa gzip
+    brotli = None
+
+# Tipos de contenido que vale la pena comprimir. Los eventos en vivo
+# (text/event-stream) no se comprimen para no retrasar su envío.
+COMPRESSIBLE = {
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+# Nivel de compresión de los archivos estáticos, que se comprimen una sola vez
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+
+class StaticFile:
+    """Archivo estático con su versión y sus versiones precomprimidas."""
+
+    def __init__(self, version: str, mimetype: str, encoded: Dict[str, bytes]):
+        self.version = version
+        self.mimetype = mimetype
+        self.encoded = encoded
+
+
+def encodings() -> List[str]:
+    """Retorna las codificaciones soportadas, en orden de preferencia."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def compress(data: bytes, encoding: str, level: int, brotli_quality: int) -> bytes:
+    """Comprime los datos con la codificación indicada ('br' o 'gzip')."""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _compress_stream(
+    chunks: Iterable, encoding: str, level: int, brotli_quality: int
+) -> Iterator[bytes]:
+    """Comprime una respuesta transmitida por partes, a medida que se produce."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=brotli_quality)
+        process, finish = compressor.process, compressor.finish
+    else:
+        # wbits 16 + MAX_WBITS produce el formato gzip
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        data = process(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def _negotiate(available: Iterable[str]) -> Optional[str]:
+    """Retorna la codificación preferida por el cliente entre las disponibles."""
+    return request.accept_encodings.best_match(list(available))
+
+
+# ========== Respuestas dinámicas ==========
+def compress_response(response: Response) -> Response:
+    """
+    Comprime la respuesta con la codificación preferida por el cliente si su
+    tipo de contenido es comprimible y su tamaño supera COMPRESS_MIN_SIZE.
+    Las respuestas transmitidas por partes se comprimen a medida que se
+    producen, sin importar su tamaño.
+    """
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE
+    ):
+        return response
+
+    # La respuesta depende del header Accept-Encoding de la request
+    response.vary.add("Accept-Encoding")
+
+    encoding = _negotiate(encodings())
+    if encoding is None:
+        return response
+
+    config = current_app.config
+    level, quality = config["COMPRESS_LEVEL"], config["COMPRESS_BROTLI_QUALITY"]
+    if response.is_streamed:
+        response.response = _compress_stream(
+            response.response, encoding, level, quality
+        )
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.set_data(compress(data, encoding, level, quality))
+
+    response.headers["Content-Encoding"] = encoding
+
+    # El ETag identifica el contenido, no sus bytes: pasa a ser débil
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+# ========== Archivos estáticos ==========
+def load_static_files(static_folder: str, min_size: int) -> Dict[str, StaticFile]:
+    """
+    Calcula la versión (hash del contenido) de cada archivo estático y
+    precomprime los que son comprimibles y superan el tamaño mínimo.
+    """
+    files = {}
+    for root, _, names in os.walk(static_folder):
+        for name in names:
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                data = f.read()
+
+            mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            encoded = {}
+            if mimetype in COMPRESSIBLE and len(data) >= min_size:
+                encoded = {
+                    encoding: compress(
+                        data, encoding, STATIC_GZIP_LEVEL, STATIC_BROTLI_QUALITY
+                    )
+                    for encoding in encodings()
+                }
+
+            version = hashlib.sha1(data).hexdigest()[:12]
+            files[filename] = StaticFile(version, mimetype, encoded)
+
+    return files
+
+
+def _static_view(app: Flask):
+    """
+    Retorna la vista de archivos estáticos que sirve las versiones
+    precomprimidas según el header Accept-Encoding, y permite guardarlos en
+    caché por mucho tiempo cuando se piden con su versión actual (?v=...).
+    """
+    send_static_file = app.view_functions["static"]
+    files: Dict[str, StaticFile] = app.extensions["static_files"]
+
+    def static(filename: str) -> Response:
+        static_file = files.get(filename)
+        encoding = static_file and _negotiate(static_file.encoded)
+
+        if encoding:
+            response = Response(
+                static_file.encoded[encoding], mimetype=static_file.mimetype
+            )
+            response.headers["Content-Encoding"] = encoding
+            response.set_etag(f"{static_file.version}-{encoding}")
+            response.make_conditional(request)
+        else:
+            response = send_static_file(filename=filename)
+
+        if static_file and static_file.encoded:
+            response.vary.add("Accept-Encoding")
+
+        # Las URLs con la versión del archivo nunca cambian de contenido
+        if static_file and request.args.get("v") == static_file.version:
+            max_age = app.config["STATIC_MAX_AGE"]
+            response.headers["Cache-Control"] = f"public, max-age={max_age}, immutable"
+
+        return response
+
+    return static
+
+
+def init_app(app: Flask):
+    """
+    Configura la compresión de las respuestas de la aplicación y precomprime
+    sus archivos estáticos. Debe llamarse después de registrar las vistas.
+    """
+    app.extensions["static_files"] = load_static_files(
+        app.static_folder, app.config["COMPRESS_MIN_SIZE"]
+    )
+    app.view_functions["static"] = _static_view(app)
+    app.after_request(compress_response)
+
+    @app.url_defaults
+    def add_static_version(endpoint: str, values: dict):
+        """Añade la versión del archivo a las URLs de archivos estáticos."""
+        if endpoint != "static" or "v" in values:
+            return
+
+        static_file = app.extensions["static_files"].get(values.get("filename"))
+        if static_file is not None:
+            values["v"] = static_file.version
@@ -0,0 +1,84 @@
+from typing import Dict, Union
+
+from flask import Flask
+
+from SAGTMA.models import READ_ONLY_BIND, db
+
+# Pragmas de SQLite que se aplican a cada conexión, por perfil:
+# - journal_mode WAL: los lectores no bloquean al escritor ni viceversa.
+# - synchronous NORMAL: en WAL solo sincroniza al hacer checkpoint, sin
+#   arriesgar la integridad de la base de datos.
+# - busy_timeout: milisegundos que se espera por un bloqueo antes de fallar.
+# - cache_size: páginas en caché por conexión (negativo: en KiB).
+# - mmap_size: bytes del archivo leídos con memoria mapeada.
+# - foreign_keys: verifica las claves foráneas.
+PROFILES: Dict[str, Dict[str, Union[str, int]]] = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "foreign_keys": "ON",
+    },
+}
+
+
+class DatabaseError(ValueError):
+    pass
+
+
+def get_pragmas(profile: str, overrides: dict) -> Dict[str, Union[str, int]]:
+    """
+    Retorna los pragmas del perfil indicado con los de overrides encima. Un
+    pragma en None en overrides no se aplica.
+
+    Lanza una excepción DatabaseError si el perfil no existe.
+    """
+    if profile not in PROFILES:
+        raise DatabaseError(f"El perfil de base de datos '{profile}' no existe")
+
+    pragmas = {**PROFILES[profile], **overrides}
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
+def apply_pragmas(dbapi_connection, pragmas: dict):
+    """Aplica los pragmas a una conexión de sqlite3."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def init_app(app: Flask):
+    """
+    Aplica los pragmas del perfil DATABASE_PROFILE, con los de SQLITE_PRAGMAS
+    encima, a cada conexión a la base de datos de la aplicación. Las
+    conexiones del motor de solo lectura, si lo hay, además usan query_only.
+    Debe llamarse después de db.init_app y antes de usar la base de datos.
+    """
+    pragmas = get_pragmas(app.config["DATABASE_PROFILE"], app.config["SQLITE_PRAGMAS"])
+    app.extensions["sqlite_pragmas"] = pragmas
+    if db.engine.dialect.name != "sqlite":
+        return
+
+    if pragmas:
+
+        @db.event.listens_for(db.engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            apply_pragmas(dbapi_connection, pragmas)
+
+    read_only = db.engines.get(READ_ONLY_BIND)
+    if read_only is not None:
+        # El modo del journal solo puede cambiarse con permiso de escritura
+        read_only_pragmas = {
+            **{k: v for k, v in pragmas.items() if k != "journal_mode"},
+            "query_only": "ON",
+        }
+
+        @db.event.listens_for(read_only, "connect")
+        def set_read_only_pragmas(dbapi_connection, connection_record):
+            apply_pragmas(dbapi_connection, read_only_pragmas)
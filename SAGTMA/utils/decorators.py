@@ -1,12 +1,24 @@
-from flask import session, flash, redirect, url_for, abort
+from flask import (
+    Response,
+    session,
+    flash,
+    redirect,
+    url_for,
+    abort,
+    make_response,
+    request,
+)
 from functools import wraps
 
+from SAGTMA.utils import versions
+
 
 def login_required(f):
     """Decorador de login requerido para rutas protegidas.
 
     Si el usuario no ha iniciado sesión, se redirige a la página de
-    inicio de sesión.
+    inicio de sesión. El usuario no se consulta aquí, sino la primera vez
+    que la ruta lo necesita (ver profiles.current_user).
     """
 
     @wraps(f)
@@ -62,3 +74,33 @@ def requires_roles(*roles):
         return wrapped
 
     return wrapper
+
+
+def conditional(*models):
+    """Decorador de GET condicional para rutas que retornan datos de tablas.
+
+    Calcula un ETag a partir de la URL y de la versión de las tablas de los
+    modelos indicados. Si coincide con el header If-None-Match de la request
+    retorna 304 sin ejecutar la ruta; si no, añade el ETag a la respuesta.
+    """
+
+    def wrapper(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            etag = versions.etag(request.full_path, *models)
+            # Comparación débil: el ETag de una respuesta comprimida es débil
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # El navegador debe revalidar la respuesta antes de reutilizarla
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        return wrapped
+
+    return wrapper
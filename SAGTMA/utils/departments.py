@@ -1,7 +1,7 @@
 import re
 
 from SAGTMA.models import Department, ProjectDetail, db
-from SAGTMA.utils import events
+from SAGTMA.utils import events, versions
 
 
 class DepartmentError(ValueError):
@@ -55,6 +55,9 @@ def register_dept(description: str):
 
     db.session.add(new_dept)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Department)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Departamentos del Taller", f"Agregar departamento '{new_dept.description}'"
@@ -85,6 +88,9 @@ def delete_dept(dept_id: int):
     # Elimina el departamento de la base de datos
     db.session.delete(dept)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Department)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Departamentos del Taller", f"Eliminar departamento '{dept.description}'"
@@ -126,6 +132,9 @@ def edit_dept(dept_id: int, description: str):
     # Modifica el departamento en la base de datos
     edited_dept.description = description
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Department)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Departamentos del Taller",
@@ -0,0 +1,327 @@
+import datetime
+import glob
+import gzip
+import heapq
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+
+from SAGTMA.models import Event, EventModule, User, db
+
+
+# ========== Segmentos ==========
+def _archive_dir() -> str:
+    """Retorna el directorio de segmentos, creándolo si no existe."""
+    path = current_app.config["EVENT_ARCHIVE_DIR"]
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _next_segment_name() -> str:
+    """
+    Retorna el nombre del siguiente segmento a escribir, numerado a partir del
+    mayor número existente para no sobrescribir ningún segmento.
+    """
+    numbers = [0]
+    for path in glob.glob(os.path.join(_archive_dir(), "segment-*")):
+        number = os.path.basename(path).split(".")[0][len("segment-") :]
+        if number.isdigit():
+            numbers.append(int(number))
+
+    return f"segment-{max(numbers) + 1:06d}"
+
+
+def load_index() -> List[dict]:
+    """
+    Retorna el índice de todos los segmentos archivados, del más reciente al
+    más antiguo.
+
+    Cada entrada tiene el archivo del segmento, el rango de tiempo que cubre,
+    los módulos que contiene y su cantidad de eventos.
+    """
+    index = []
+    for path in glob.glob(os.path.join(_archive_dir(), "segment-*.json")):
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+        entry["start"] = datetime.datetime.fromisoformat(entry["start"])
+        entry["end"] = datetime.datetime.fromisoformat(entry["end"])
+        index.append(entry)
+
+    index.sort(key=lambda entry: entry["end"], reverse=True)
+    return index
+
+
+# ========== Archivado ==========
+def archive_events(older_than: datetime.datetime) -> int:
+    """
+    Mueve los eventos anteriores a la fecha indicada a un nuevo segmento
+    comprimido y los elimina de la base de datos.
+
+    El segmento y su índice se escriben con nombres temporales y solo se
+    publican después de confirmar la eliminación, el índice al final: un
+    segmento sin índice se ignora. Solo se eliminan los eventos escritos en
+    el segmento, aunque se inserten otros anteriores a la fecha mientras se
+    archiva.
+
+    Retorna la cantidad de eventos archivados.
+    """
+    # SELECT event.*, user.username, event_module.name FROM event JOIN user
+    #   JOIN event_module WHERE time < older_than ORDER BY time, id
+    stmt = (
+        db.select(
+            Event.id,
+            Event.user_id,
+            User.username,
+            EventModule.name.label("module"),
+            Event.description,
+            Event.time,
+            Event.level,
+            Event.count,
+        )
+        .join(User, Event.user_id == User.id)
+        .join(EventModule, Event.module_id == EventModule.id)
+        .where(Event.time < older_than)
+        .order_by(Event.time, Event.id)
+        .execution_options(yield_per=1000)
+    )
+
+    name = _next_segment_name()
+    segment_path = os.path.join(_archive_dir(), f"{name}.ndjson.gz")
+    index_path = os.path.join(_archive_dir(), f"{name}.json")
+
+    count = 0
+    start = end = None
+    last_id = 0
+    modules = set()
+    with gzip.open(f"{segment_path}.tmp", "wt", encoding="utf-8") as f:
+        for row in db.session.execute(stmt):
+            f.write(
+                json.dumps(
+                    {
+                        "id": row.id,
+                        "user_id": row.user_id,
+                        "username": row.username,
+                        "module": row.module,
+                        "description": row.description,
+                        "time": row.time.isoformat(),
+                        "level": row.level,
+                        "count": row.count,
+                    },
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+            start = start or row.time
+            end = row.time
+            last_id = max(last_id, row.id)
+            modules.add(row.module)
+            count += 1
+
+    if not count:
+        os.remove(f"{segment_path}.tmp")
+        return 0
+
+    # Escribe el índice del segmento
+    with open(f"{index_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "file": os.path.basename(segment_path),
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "modules": sorted(modules),
+                "count": count,
+            },
+            f,
+            ensure_ascii=False,
+        )
+
+    # Elimina de la base de datos los eventos archivados. Los eventos
+    # insertados después de la consulta tienen un id mayor que last_id
+    try:
+        db.session.execute(
+            db.delete(Event)
+            .where(Event.time < older_than)
+            .where(Event.id <= last_id),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        os.remove(f"{segment_path}.tmp")
+        os.remove(f"{index_path}.tmp")
+        raise
+
+    # Publica el segmento y, al final, su índice
+    os.replace(f"{segment_path}.tmp", segment_path)
+    os.replace(f"{index_path}.tmp", index_path)
+
+    return count
+
+
+# ========== Búsqueda ==========
+# Fecha del evento archivado más reciente, por directorio de segmentos, junto
+# con los índices con los que se calculó. Se vuelve a calcular al publicarse
+# o eliminarse un segmento, también desde otro proceso, sin leer los índices
+# en cada búsqueda.
+_newest: Dict[str, Tuple[frozenset, Optional[datetime.datetime]]] = {}
+
+
+def _newest_end() -> Optional[datetime.datetime]:
+    """Retorna la fecha del evento archivado más reciente, o None si no hay."""
+    path = _archive_dir()
+    names = frozenset(glob.glob(os.path.join(path, "segment-*.json")))
+
+    cached = _newest.get(path)
+    if cached is None or cached[0] != names:
+        index = load_index()
+        cached = _newest[path] = (names, index[0]["end"] if index else None)
+    return cached[1]
+
+
+def needs_archive(start: Optional[datetime.datetime]) -> bool:
+    """
+    Indica si el rango de fechas que comienza en start incluye eventos
+    archivados.
+    """
+    newest = _newest_end()
+    return newest is not None and (start is None or start <= newest)
+
+
+def _tokens(text: str) -> List[str]:
+    """
+    Separa un texto en palabras como el tokenizador del índice de búsqueda de
+    eventos (unicode61 remove_diacritics 2): sin mayúsculas ni acentos, y
+    separadas por cualquier caracter que no sea letra o número.
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"[^\W_]+", text)
+
+
+def _query_words(term: str) -> List[List[str]]:
+    """
+    Convierte un término de búsqueda en sus palabras como events.fts_query,
+    cada una como la lista de sus tokens.
+    """
+    words = [_tokens(word) for word in term.replace('"', " ").split()]
+    return [word for word in words if word]
+
+
+def _matches(event: dict, words: List[List[str]]) -> bool:
+    """
+    Indica si cada palabra aparece como prefijo de alguna palabra de la
+    descripción, módulo o usuario del evento, como en la búsqueda de texto
+    completo. Una palabra con varios tokens debe aparecer como frase.
+    """
+    fields = [_tokens(event[field]) for field in ("description", "module", "username")]
+
+    def _matches_word(word: List[str]) -> bool:
+        *exact, prefix = word
+        for tokens in fields:
+            for i in range(len(tokens) - len(exact)):
+                if tokens[i : i + len(exact)] == exact and tokens[
+                    i + len(exact)
+                ].startswith(prefix):
+                    return True
+        return False
+
+    return all(_matches_word(word) for word in words)
+
+
+def search_archive(
+    term: str = "",
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    limit: int = 50,
+    before: Optional[Tuple[datetime.datetime, int]] = None,
+) -> List[dict]:
+    """
+    Busca en los segmentos archivados los eventos cuya descripción, módulo o
+    usuario contienen palabras que comienzan por las del término indicado,
+    como search_events, y que están en el rango [start, end).
+
+    Si se indica before, solo se buscan los eventos cuya posición (time, id)
+    es anterior a ella, para continuar una búsqueda a partir de su último
+    resultado.
+
+    Solo se descomprimen los segmentos cuyo rango se solapa con el indicado,
+    y de cada uno se guardan solo los eventos más recientes que hacen falta.
+    Retorna a lo sumo limit eventos, del más reciente al más antiguo.
+    """
+    words = _query_words(term)
+    found = []
+    for entry in load_index():
+        if start is not None and entry["end"] < start:
+            continue
+        if end is not None and entry["start"] >= end:
+            continue
+        if before is not None and entry["start"] > before[0]:
+            continue
+
+        found.extend(
+            heapq.nlargest(
+                limit - len(found),
+                _search_segment(entry["file"], words, start, end, before),
+                key=lambda event: (event["time"], event["id"]),
+            )
+        )
+
+        if len(found) >= limit:
+            break
+
+    return found
+
+
+def iter_archive(
+    term: str = "",
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+) -> Iterator[dict]:
+    """
+    Recorre, del más antiguo al más reciente, los eventos archivados que
+    cumplen los mismos filtros que search_archive.
+
+    Los segmentos se descomprimen uno a uno a medida que se itera.
+    """
+    words = _query_words(term)
+    for entry in reversed(load_index()):
+        if start is not None and entry["end"] < start:
+            continue
+        if end is not None and entry["start"] >= end:
+            continue
+
+        yield from _search_segment(entry["file"], words, start, end)
+
+
+def _search_segment(
+    file: str,
+    words: List[List[str]],
+    start: Optional[datetime.datetime],
+    end: Optional[datetime.datetime],
+    before: Optional[Tuple[datetime.datetime, int]] = None,
+) -> Iterator[dict]:
+    """Recorre un segmento y retorna los eventos que cumplen los filtros."""
+    for event in read_segment(file):
+        if start is not None and event["time"] < start:
+            continue
+        if end is not None and event["time"] >= end:
+            continue
+        if before is not None and (event["time"], event["id"]) >= before:
+            continue
+        if words and not _matches(event, words):
+            continue
+
+        yield event
+
+
+def read_segment(file: str) -> Iterator[dict]:
+    """Recorre todos los eventos de un segmento."""
+    with gzip.open(os.path.join(_archive_dir(), file), "rt", encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            event["time"] = datetime.datetime.fromisoformat(event["time"])
+            yield event
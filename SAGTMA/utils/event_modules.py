@@ -0,0 +1,88 @@
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from SAGTMA.models import EventModule, db
+
+# Caché en memoria de los ids de los módulos de eventos, por nombre. Solo
+# contiene módulos ya confirmados en la base de datos; los creados en una
+# transacción en curso se guardan en session.info hasta el commit.
+_ids: Dict[str, int] = {}
+_lock = threading.Lock()
+
+
+def module_id(name: str) -> int:
+    """
+    Retorna el id del módulo de eventos con el nombre indicado, creándolo si
+    no existe.
+
+    El id se toma de la caché en memoria cuando es posible, por lo que los
+    módulos ya conocidos no requieren consultas a la base de datos.
+    """
+    if name in _ids:
+        return _ids[name]
+
+    pending = db.session.info.setdefault("new_event_modules", {})
+    if name in pending:
+        return pending[name]
+
+    # INSERT OR IGNORE INTO event_module (name) VALUES (name)
+    result = db.session.execute(
+        insert(EventModule).values(name=name).on_conflict_do_nothing()
+    )
+    if result.rowcount:
+        # El módulo se creó en esta transacción y podría deshacerse
+        pending[name] = result.inserted_primary_key[0]
+        return pending[name]
+
+    stmt = db.select(EventModule.id).where(EventModule.name == name)
+    _id = db.session.execute(stmt).scalar_one()
+    with _lock:
+        _ids[name] = _id
+    return _id
+
+
+def find_module_id(name: str) -> Optional[int]:
+    """
+    Retorna el id del módulo de eventos con el nombre indicado, o None si no
+    existe. A diferencia de module_id nunca crea el módulo.
+    """
+    if name in _ids:
+        return _ids[name]
+
+    stmt = db.select(EventModule.id).where(EventModule.name == name)
+    _id = db.session.execute(stmt).scalar()
+    if _id is not None:
+        with _lock:
+            _ids[name] = _id
+    return _id
+
+
+def clear_cache():
+    """Vacía la caché de módulos de eventos."""
+    with _lock:
+        _ids.clear()
+
+
+@db.event.listens_for(Session, "after_commit")
+def _promote_new_modules(session):
+    """Pasa a la caché los módulos creados en la transacción confirmada."""
+    pending = session.info.pop("new_event_modules", None)
+    if pending:
+        with _lock:
+            _ids.update(pending)
+
+
+@db.event.listens_for(Session, "after_rollback")
+def _forget_new_modules(session):
+    """Descarta los módulos creados en la transacción deshecha."""
+    session.info.pop("new_event_modules", None)
+
+
+@db.event.listens_for(EventModule.__table__, "after_create")
+@db.event.listens_for(EventModule.__table__, "after_drop")
+def _reset_cache(target, connection, **kw):
+    """Vacía la caché cuando la tabla de módulos se crea o se elimina."""
+    clear_cache()
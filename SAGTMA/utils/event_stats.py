@@ -0,0 +1,163 @@
+import datetime
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from sqlalchemy.dialects.sqlite import insert
+
+from SAGTMA.models import Event, EventModule, EventRollup, User, db
+from SAGTMA.utils import event_archive, event_modules
+
+
+class EventStatsError(ValueError):
+    pass
+
+
+def hour_bucket(time: datetime.datetime) -> datetime.datetime:
+    """Trunca una fecha a la hora."""
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+# ========== Actualización de conteos ==========
+def add_to_rollups(rows: Iterable[dict]):
+    """
+    Suma a los conteos por módulo, usuario y hora los eventos indicados.
+
+    Cada fila debe tener las claves module_id (o module, con el nombre del
+    módulo), user_id y time, y opcionalmente count (las veces que se repitió
+    el evento). No confirma la transacción,
+    para que los conteos se escriban junto con los eventos.
+    """
+    counts = Counter()
+    for row in rows:
+        _module_id = row.get("module_id") or event_modules.module_id(row["module"])
+        key = (_module_id, row["user_id"], hour_bucket(row["time"]))
+        counts[key] += row.get("count", 1)
+
+    if not counts:
+        return
+
+    # INSERT INTO event_rollup VALUES (...), (...)
+    #   ON CONFLICT DO UPDATE SET count = count + excluded.count
+    stmt = insert(EventRollup).values(
+        [
+            {"module_id": module_id, "user_id": user_id, "hour": hour, "count": count}
+            for (module_id, user_id, hour), count in counts.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EventRollup.module_id, EventRollup.user_id, EventRollup.hour],
+        set_={"count": EventRollup.count + stmt.excluded.count},
+    )
+    db.session.execute(stmt)
+
+
+def remove_from_rollups(*conditions):
+    """
+    Resta de los conteos los eventos de la base de datos que cumplen las
+    condiciones, y elimina los conteos que quedan en cero. Debe llamarse
+    antes de eliminar los eventos; no confirma la transacción, para que los
+    conteos cambien junto con la eliminación.
+    """
+    # SELECT module_id, user_id, time, -count FROM event WHERE conditions...
+    stmt = db.select(
+        Event.module_id, Event.user_id, Event.time, (-Event.count).label("count")
+    ).where(*conditions)
+    add_to_rollups(db.session.execute(stmt).mappings())
+
+    # DELETE FROM event_rollup WHERE count <= 0
+    db.session.execute(
+        db.delete(EventRollup).where(EventRollup.count <= 0),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def rebuild_rollups() -> int:
+    """
+    Recalcula desde cero los conteos a partir de los eventos de la base de
+    datos y de los segmentos archivados.
+
+    Retorna la cantidad de filas de conteo generadas.
+    """
+    db.session.execute(db.delete(EventRollup))
+
+    # INSERT INTO event_rollup SELECT module_id, user_id, hour, sum(count)
+    #   FROM event GROUP BY module_id, user_id, hour
+    hour = db.func.strftime("%Y-%m-%d %H:00:00.000000", Event.time)
+    stmt = db.insert(EventRollup).from_select(
+        ["module_id", "user_id", "hour", "count"],
+        db.select(Event.module_id, Event.user_id, hour, db.func.sum(Event.count))
+        .where(Event.time.is_not(None))
+        .group_by(Event.module_id, Event.user_id, hour),
+    )
+    db.session.execute(stmt)
+
+    # Suma los eventos archivados, segmento a segmento
+    for entry in event_archive.load_index():
+        add_to_rollups(event_archive.read_segment(entry["file"]))
+
+    db.session.commit()
+
+    stmt = db.select(db.func.count()).select_from(EventRollup)
+    return db.session.execute(stmt).scalar()
+
+
+# ========== Consulta de estadísticas ==========
+GROUPS = {
+    "module": EventModule.name,
+    "user": User.username,
+    "day": db.func.date(EventRollup.hour),
+    "hour": EventRollup.hour,
+}
+
+
+def get_stats(
+    groups: List[str],
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    module: str = "",
+    limit: int = 100,
+) -> List[dict]:
+    """
+    Retorna la cantidad de eventos agrupada por los campos indicados (module,
+    user, day u hour), de mayor a menor, usando solo la tabla de conteos.
+
+    Lanza una excepción EventStatsError si algún campo no es válido.
+    """
+    if not groups or any(group not in GROUPS for group in groups):
+        raise EventStatsError(
+            "Los campos de agrupación válidos son: " + ", ".join(GROUPS)
+        )
+
+    columns = [GROUPS[group].label(group) for group in groups]
+    total = db.func.sum(EventRollup.count).label("count")
+
+    # SELECT groups..., sum(count) FROM event_rollup JOIN event_module
+    #   LEFT JOIN user GROUP BY groups... ORDER BY sum(count) DESC
+    stmt = (
+        db.select(*columns, total)
+        .select_from(EventRollup)
+        .join(EventModule, EventRollup.module_id == EventModule.id)
+        .outerjoin(User, EventRollup.user_id == User.id)
+        .group_by(*columns)
+        .order_by(total.desc())
+        .limit(limit)
+    )
+    if start is not None:
+        stmt = stmt.where(EventRollup.hour >= hour_bucket(start))
+    if end is not None:
+        stmt = stmt.where(EventRollup.hour < end)
+    if module:
+        # Filtra por el id del módulo para usar la clave primaria
+        stmt = stmt.where(EventRollup.module_id == event_modules.find_module_id(module))
+
+    result = db.session.execute(stmt).fetchall()
+    return [
+        {
+            **{
+                group: value.isoformat() if isinstance(value, datetime.date) else value
+                for group, value in zip(groups, row[:-1])
+            },
+            "count": row[-1],
+        }
+        for row in result
+    ]
@@ -0,0 +1,236 @@
+import atexit
+import datetime
+import queue
+import threading
+from typing import List
+
+from flask import Flask, current_app
+
+from SAGTMA.models import Event, db
+from SAGTMA.utils import event_modules, event_stats
+
+
+class EventWriter:
+    """
+    Escritor de eventos en segundo plano.
+
+    Los eventos se encolan en memoria y un hilo los inserta en la base de
+    datos por lotes, con un solo INSERT de varias filas y un solo commit por
+    lote. Los conteos de eventos se actualizan en la misma transacción.
+    """
+
+    def __init__(self, app: Flask, flush_interval: float, batch_size: int):
+        self.app = app
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Inicia el hilo escritor."""
+        self._thread = threading.Thread(
+            target=self._run, name="event-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, row: dict):
+        """Encola una fila de evento para ser escrita."""
+        self._queue.put(row)
+
+    def stop(self):
+        """Detiene el hilo escritor y escribe los eventos pendientes."""
+        if self._stopped.is_set():
+            return
+
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+        # Escribe lo que haya quedado en la cola
+        self._flush(self._drain(None))
+
+    def _run(self):
+        """Ciclo principal del hilo escritor."""
+        while not self._stopped.is_set():
+            batch = self._drain(self.flush_interval)
+            if batch:
+                self._flush(batch)
+
+    def _drain(self, timeout):
+        """
+        Saca de la cola a lo sumo batch_size filas.
+
+        Espera hasta timeout segundos por la primera fila; si timeout es None
+        no espera.
+        """
+        batch = []
+        try:
+            if timeout is None:
+                batch.append(self._queue.get_nowait())
+            else:
+                batch.append(self._queue.get(timeout=timeout))
+
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        return batch
+
+    def _flush(self, batch: list):
+        """
+        Inserta un lote de eventos en la base de datos.
+
+        Si un lote falla se deshace la transacción y sus filas se escriben una
+        a una, para descartar solo las que fallan (por ejemplo, las de un
+        usuario eliminado antes de escribirlas) sin detener el hilo escritor.
+        """
+        while batch:
+            with self.app.app_context():
+                try:
+                    write_events(batch)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self._write_each(batch)
+
+            batch = self._drain(None)
+
+    def _write_each(self, batch: list):
+        """Escribe las filas de un lote una a una, registrando las que fallan."""
+        for row in batch:
+            try:
+                write_events([row])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception(
+                    "No se pudo escribir un evento; se descarta: %r", row
+                )
+
+
+# ========== Escritura de eventos ==========
+def write_events(rows: List[dict]):
+    """
+    Escribe filas de eventos en la base de datos y las suma a los conteos de
+    eventos. No confirma la transacción.
+
+    Cada fila tiene las claves user_id, module (el nombre del módulo o, en su
+    lugar, module_id), description y time, y opcionalmente level y count.
+
+    Las repeticiones de un mismo evento de los niveles EVENT_DEDUP_LEVELS,
+    por el mismo usuario y dentro de EVENT_DEDUP_WINDOW segundos, se agrupan
+    en un solo evento cuyo contador aumenta.
+    """
+    window = current_app.config["EVENT_DEDUP_WINDOW"]
+    levels = current_app.config["EVENT_DEDUP_LEVELS"]
+
+    rows = [_normalize(row) for row in rows]
+
+    if window:
+        window = datetime.timedelta(seconds=window)
+        rows = _fold_rows(rows, window, levels)
+        new_rows = [
+            row
+            for row in rows
+            if row["level"] not in levels or not _fold_into_event(row, window)
+        ]
+    else:
+        new_rows = rows
+
+    if new_rows:
+        # INSERT INTO event (...) VALUES (...), (...), ...
+        db.session.execute(db.insert(Event).values(new_rows))
+
+    event_stats.add_to_rollups(rows)
+
+
+def _normalize(row: dict) -> dict:
+    """
+    Completa una fila de evento con los valores por defecto y reemplaza el
+    nombre del módulo por su id.
+    """
+    row = {"level": "info", "count": 1, **row}
+    if "module" in row:
+        row["module_id"] = event_modules.module_id(row.pop("module"))
+    return row
+
+
+def _dedup_key(row: dict) -> tuple:
+    return (row["user_id"], row["module_id"], row["description"], row["level"])
+
+
+def _fold_rows(rows: List[dict], window: datetime.timedelta, levels) -> List[dict]:
+    """Agrupa las repeticiones de un mismo evento dentro de un lote."""
+    folded = []
+    first = {}
+    for row in rows:
+        key = _dedup_key(row)
+        previous = first.get(key)
+        if (
+            row["level"] in levels
+            and previous is not None
+            and row["time"] - previous["time"] <= window
+        ):
+            previous["count"] += row["count"]
+            continue
+
+        row = dict(row)
+        first[key] = row
+        folded.append(row)
+
+    return folded
+
+
+def _fold_into_event(row: dict, window: datetime.timedelta) -> bool:
+    """
+    Suma la fila al contador del mismo evento escrito dentro de la ventana de
+    tiempo, si existe. Retorna si se pudo agrupar.
+    """
+    # SELECT id FROM event WHERE user_id = ? AND module = ? AND ...
+    #   AND time >= row.time - window ORDER BY time DESC LIMIT 1
+    user_id, module_id, description, level = _dedup_key(row)
+    latest = (
+        db.select(Event.id)
+        .where(Event.user_id == user_id)
+        .where(Event.module_id == module_id)
+        .where(Event.description == description)
+        .where(Event.level == level)
+        .where(Event.time >= row["time"] - window)
+        .order_by(Event.time.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    # UPDATE event SET count = count + row.count WHERE id = (...)
+    stmt = (
+        db.update(Event)
+        .where(Event.id == latest)
+        .values(count=Event.count + row["count"])
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).rowcount > 0
+
+
+def init_app(app: Flask):
+    """
+    Configura el escritor de eventos de la aplicación.
+
+    Si EVENT_WRITER_ASYNC es falso los eventos se escriben de forma síncrona
+    (útil para las pruebas) y no se inicia ningún hilo.
+    """
+    if not app.config["EVENT_WRITER_ASYNC"]:
+        return
+
+    writer = EventWriter(
+        app,
+        app.config["EVENT_WRITER_FLUSH_INTERVAL"],
+        app.config["EVENT_WRITER_BATCH_SIZE"],
+    )
+    writer.start()
+    app.extensions["event_writer"] = writer
+
+    # Escribe los eventos pendientes al cerrar la aplicación
+    atexit.register(writer.stop)
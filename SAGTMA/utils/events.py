@@ -1,18 +1,65 @@
-from flask import session
+import base64
+import binascii
+import csv
+import datetime
+import io
+import json
+import random
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from SAGTMA.models import Event, db
-from SAGTMA.utils import profiles
+from flask import current_app
+
+from SAGTMA.models import Event, EventModule, User, event_fts, db
+from SAGTMA.utils import event_modules, event_stats, event_writer, profiles
 
 
 class EventError(ValueError):
     pass
 
 
-def add_event(module: str, description: str):
-    """Crea y anade un nuevo evento en la base de datos"""
-    current_user = profiles.get_current_user(session["id"])
-    new_event = Event(current_user, module, description)
-    db.session.add(new_event)
+# Niveles de eventos
+INFO = "info"
+SEARCH = "search"
+
+
+def add_event(module: str, description: str, level: str = INFO):
+    """
+    Crea y anade un nuevo evento en la base de datos, y lo suma a los conteos
+    de eventos.
+
+    Solo se registra la fracción EVENT_SAMPLING[level] de los eventos de cada
+    nivel, y las repeticiones de los eventos de búsqueda se agrupan en un solo
+    evento (ver event_writer.write_events).
+
+    Si la aplicación tiene un escritor de eventos en segundo plano, el evento
+    se encola y se escribe luego junto con otros; en caso contrario se escribe
+    de inmediato. En ambos casos se confirman los cambios pendientes de la
+    sesión.
+    """
+    rate = current_app.config["EVENT_SAMPLING"].get(level, 1.0)
+    if rate < 1.0 and random.random() >= rate:
+        db.session.commit()
+        return
+
+    # Usa la identidad del usuario de la request para no recargarlo si el
+    # commit de un evento anterior expiró sus atributos
+    current_user = profiles.current_user()
+    row = {
+        "user_id": db.inspect(current_user).identity[0],
+        "module": module,
+        "description": Event.shorten(description),
+        "time": datetime.datetime.now(),
+        "level": level,
+        "count": 1,
+    }
+
+    writer = current_app.extensions.get("event_writer")
+    if writer is None:
+        event_writer.write_events([row])
+    else:
+        writer.put(row)
+
     db.session.commit()
 
 
@@ -32,9 +79,338 @@ def delete_event(event_id: int):
         raise EventError("El evento indicado no existe")
     (deleted_event,) = result
 
-    # Elimina el evento de la base de datos
+    # Elimina el evento de la base de datos y lo resta de los conteos
+    event_stats.remove_from_rollups(Event.id == deleted_event.id)
     db.session.delete(deleted_event)
     db.session.commit()
 
     # Añade el evento de eliminación
     add_event("Logger de eventos", f"Eliminar '{deleted_event.description}'")
+
+
+# ========== Consulta de eventos ==========
+def fts_query(term: str) -> str:
+    """
+    Convierte un término de búsqueda en una consulta MATCH de FTS5 en la que
+    cada palabra debe aparecer como prefijo de alguna palabra del evento.
+    """
+    words = term.replace('"', " ").split()
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def search_events(
+    term: str = "",
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    ranked: bool = False,
+    module: str = "",
+):
+    """
+    Retorna la consulta de eventos cuya descripción, módulo o usuario
+    contienen palabras que comienzan por las del término indicado y que están
+    en el rango [start, end). Si se indica un módulo, solo se retornan sus
+    eventos.
+
+    La búsqueda usa el índice de texto completo de eventos. Si ranked es
+    verdadero los eventos se ordenan por relevancia.
+    """
+    # SELECT * FROM event JOIN user ON event.user_id = user.id, cargando el
+    # usuario de cada evento desde la misma unión
+    stmt = (
+        db.select(Event)
+        .join(User, Event.user_id == User.id)
+        .options(db.contains_eager(Event.user))
+    )
+
+    query = fts_query(term)
+    if query:
+        # JOIN event_fts ON event_fts.rowid = event.id
+        #   WHERE event_fts MATCH '"word"* ...'
+        stmt = stmt.join(event_fts, event_fts.c.rowid == Event.id).where(
+            event_fts.c.event_fts.op("MATCH")(query)
+        )
+        if ranked:
+            # ORDER BY event_fts.rank
+            stmt = stmt.order_by(event_fts.c.rank)
+    if start is not None:
+        # WHERE time >= start
+        stmt = stmt.where(Event.time >= start)
+    if end is not None:
+        # WHERE time < end
+        stmt = stmt.where(Event.time < end)
+    if module:
+        # WHERE module_id = ?
+        stmt = stmt.where(Event.module_id == event_modules.find_module_id(module))
+
+    return stmt
+
+
+def parse_date_range(
+    start_date: str, end_date: str
+) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+    """
+    Convierte un rango de fechas 'YYYY-MM-DD' (ambas inclusive y opcionales)
+    en el rango de tiempo [start, end) correspondiente.
+
+    Lanza una excepción EventError si alguna fecha no es válida.
+    """
+    try:
+        start = datetime.datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise EventError("Las fechas indicadas no son válidas")
+
+    if end is not None:
+        end += datetime.timedelta(days=1)
+
+    if start is not None and end is not None and start >= end:
+        raise EventError("La fecha de inicio debe ser anterior a la fecha final")
+
+    return start, end
+
+
+def encode_cursor(event: Event) -> str:
+    """Codifica la posición (time, id) de un evento como un cursor opaco."""
+    return encode_position(event.time, event.id)
+
+
+def encode_position(time: datetime.datetime, event_id: int) -> str:
+    """Codifica una posición (time, id) como un cursor opaco."""
+    raw = f"{time.isoformat()}|{event_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """
+    Decodifica un cursor generado por encode_cursor.
+
+    Lanza una excepción EventError si el cursor no es válido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        time, event_id = raw.split("|")
+        return datetime.datetime.fromisoformat(time), int(event_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise EventError("El cursor indicado no es válido")
+
+
+def paginate_events(
+    stmt, cursor: Optional[str], direction: str, limit: int
+) -> Tuple[List[Event], Optional[str], Optional[str]]:
+    """
+    Pagina por conjunto de claves (time, id) una consulta de eventos, del más
+    reciente al más antiguo.
+
+    direction "next" retorna los eventos más antiguos que el cursor y "prev"
+    los más recientes. El costo de cada página no depende de su posición en
+    el log.
+
+    Retorna una tupla con los eventos de la página y los cursores de la página
+    siguiente y anterior (None si no existen).
+
+    Lanza una excepción EventError si el cursor o la dirección no son válidos.
+    """
+    if direction not in ("next", "prev"):
+        raise EventError("La dirección indicada no es válida")
+
+    key = db.tuple_(Event.time, Event.id)
+    backwards = cursor is not None and direction == "prev"
+
+    if cursor is not None:
+        position = db.tuple_(*decode_cursor(cursor))
+        stmt = stmt.where(key > position if backwards else key < position)
+
+    if backwards:
+        # ORDER BY time ASC, id ASC
+        stmt = stmt.order_by(Event.time.asc(), Event.id.asc())
+    else:
+        # ORDER BY time DESC, id DESC
+        stmt = stmt.order_by(Event.time.desc(), Event.id.desc())
+
+    # Se pide un evento de más para saber si hay otra página
+    result = db.session.execute(stmt.limit(limit + 1)).fetchall()
+    _events = [r for r, in result]
+    has_more = len(_events) > limit
+    _events = _events[:limit]
+
+    if backwards:
+        _events.reverse()
+        prev_cursor = encode_cursor(_events[0]) if has_more else None
+        next_cursor = encode_cursor(_events[-1]) if _events else cursor
+    else:
+        prev_cursor = encode_cursor(_events[0]) if cursor and _events else None
+        next_cursor = encode_cursor(_events[-1]) if has_more else None
+
+    return _events, next_cursor, prev_cursor
+
+
+# ========== Exportación de eventos ==========
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_events(
+    stmt, export_format: str, batch_size: int = 1000, archived: Iterable[dict] = ()
+) -> Iterator[str]:
+    """
+    Retorna un generador que recorre una consulta de eventos por lotes del lado
+    del servidor y produce el log, línea a línea, en formato CSV o NDJSON.
+
+    Los eventos archivados indicados, en orden cronológico, se producen antes
+    que los de la consulta, ya que son más antiguos.
+
+    La consulta no se ejecuta hasta que se comienza a iterar el generador.
+
+    Lanza una excepción EventError si el formato no es válido.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise EventError("El formato de exportación indicado no es válido")
+
+    # SELECT event.id, user.username, ... en lugar de objetos del ORM
+    stmt = (
+        stmt.with_only_columns(
+            Event.id,
+            User.username,
+            EventModule.name.label("module"),
+            Event.description,
+            Event.time,
+        )
+        .join(EventModule, Event.module_id == EventModule.id)
+        .order_by(Event.time, Event.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    if export_format == "ndjson":
+        return _export_ndjson(_export_rows(stmt, archived))
+    return _export_csv(_export_rows(stmt, archived))
+
+
+def _export_rows(stmt, archived: Iterable[dict]) -> Iterator[tuple]:
+    """
+    Recorre los eventos archivados y luego los de la consulta como tuplas
+    (id, username, module, description, time).
+    """
+    for event in archived:
+        yield (
+            event["id"],
+            event["username"],
+            event["module"],
+            event["description"],
+            event["time"],
+        )
+
+    yield from db.session.execute(stmt)
+
+
+def _export_ndjson(rows: Iterator[tuple]) -> Iterator[str]:
+    """Convierte las filas de eventos en líneas JSON."""
+    for event_id, username, module, description, time in rows:
+        yield json.dumps(
+            {
+                "id": event_id,
+                "username": username,
+                "module": module,
+                "description": description,
+                "time": time.isoformat(),
+            },
+            ensure_ascii=False,
+        ) + "\n"
+
+
+def _export_csv(rows: Iterator[tuple]) -> Iterator[str]:
+    """Convierte las filas de eventos en líneas CSV, comenzando por el header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def _line(values: list) -> str:
+        writer.writerow(values)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield _line(["id", "username", "module", "description", "time"])
+    for event_id, username, module, description, time in rows:
+        yield _line([event_id, username, module, description, time.isoformat()])
+
+
+# ========== Transmisión de eventos en vivo ==========
+def last_event_id() -> int:
+    """Retorna el id del último evento registrado, o 0 si no hay eventos."""
+    return db.session.execute(db.select(db.func.max(Event.id))).scalar() or 0
+
+
+def stream_events(
+    last_id: int,
+    module: str = "",
+    username: str = "",
+    poll_interval: float = 1.0,
+    timeout: float = 60.0,
+    batch_size: int = 100,
+) -> Iterator[str]:
+    """
+    Retorna un generador que produce, como mensajes Server-Sent Events, los
+    eventos con id mayor a last_id a medida que se escriben en la base de
+    datos, filtrados opcionalmente por módulo y usuario.
+
+    Cada mensaje lleva el id del evento, para que el cliente pueda reanudar la
+    transmisión desde el último evento recibido. La transmisión termina tras
+    timeout segundos; el cliente se reconecta por sí solo.
+    """
+    # SELECT event.id, user.username, event_module.name, ... FROM event
+    #   JOIN user JOIN event_module ORDER BY event.id LIMIT batch_size
+    stmt = (
+        db.select(
+            Event.id,
+            Event.user_id,
+            User.username,
+            EventModule.name.label("module"),
+            Event.description,
+            Event.time,
+            Event.level,
+            Event.count,
+        )
+        .join(User, Event.user_id == User.id)
+        .join(EventModule, Event.module_id == EventModule.id)
+        .order_by(Event.id)
+        .limit(batch_size)
+    )
+    if module:
+        stmt = stmt.where(EventModule.name == module)
+    if username:
+        stmt = stmt.where(User.username == username)
+
+    return _stream_events(stmt, last_id, poll_interval, timeout, batch_size)
+
+
+def _stream_events(
+    stmt, last_id: int, poll_interval: float, timeout: float, batch_size: int
+) -> Iterator[str]:
+    """Consulta periódicamente los eventos nuevos y los convierte en mensajes."""
+    deadline = time.monotonic() + timeout
+
+    # Indica al cliente cuánto esperar antes de reconectarse
+    yield f"retry: {int(poll_interval * 1000)}\n\n"
+
+    while True:
+        # WHERE event.id > last_id
+        rows = db.session.execute(stmt.where(Event.id > last_id)).fetchall()
+        # Termina la transacción de lectura para ver los eventos siguientes
+        db.session.rollback()
+
+        for row in rows:
+            last_id = row.id
+            data = json.dumps(
+                {**row._asdict(), "time": row.time.isoformat()}, ensure_ascii=False
+            )
+            yield f"id: {row.id}\ndata: {data}\n\n"
+
+        # Si el lote se llenó quedan eventos pendientes
+        if len(rows) == batch_size:
+            continue
+        if time.monotonic() >= deadline:
+            return
+        if not rows:
+            # Comentario que mantiene viva la conexión
+            yield ": keepalive\n\n"
+
+        time.sleep(poll_interval)
@@ -0,0 +1,103 @@
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from SAGTMA.models import (
+    Department,
+    MeasureUnit,
+    TableVersion,
+    User,
+    db,
+)
+from SAGTMA.utils import versions
+
+# Caché en memoria de listas de consulta frecuente (usuarios, unidades de
+# medida...), por nombre. Cada lista se guarda junto con la versión de las
+# tablas con la que se consultó, así que basta con que los helpers de utils
+# aumenten la versión (versions.bump) al registrar, editar o eliminar para que
+# se vuelva a consultar, también en los demás procesos.
+_cache: Dict[str, Tuple[tuple, list]] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def _cached(name: str, models: tuple, load: Callable[[], list]) -> list:
+    """
+    Retorna la lista con el nombre indicado desde la caché, o la consulta con
+    load si alguna de las tablas de los modelos cambió desde la última vez.
+
+    La lista retornada es compartida, por lo que no debe modificarse.
+    """
+    version = tuple(versions.get_versions_with_epoch(*models).values())
+
+    cached = _cache.get(name)
+    hit = cached is not None and cached[0] == version
+    with _lock:
+        stats = _stats.setdefault(name, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+    if hit:
+        return cached[1]
+
+    value = load()
+    with _lock:
+        _cache[name] = (version, value)
+    return value
+
+
+def users() -> List[dict]:
+    """Retorna el id, cédula, nombres y apellidos de todos los usuarios."""
+
+    def load():
+        # SELECT id, id_number, names, surnames FROM user
+        stmt = db.select(User.id, User.id_number, User.names, User.surnames)
+        return [u._asdict() for u in db.session.execute(stmt.order_by(User.id))]
+
+    return _cached("users", (User,), load)
+
+
+def departments() -> List[dict]:
+    """Retorna el id y la descripción de todos los departamentos."""
+
+    def load():
+        # SELECT id, description FROM department
+        stmt = db.select(Department.id, Department.description)
+        return [d._asdict() for d in db.session.execute(stmt.order_by(Department.id))]
+
+    return _cached("departments", (Department,), load)
+
+
+def measure_units() -> List[dict]:
+    """Retorna el id, dimensión y unidad de todas las unidades de medida."""
+
+    def load():
+        # SELECT id, dimension, unit FROM measure_unit
+        stmt = db.select(
+            MeasureUnit.id, MeasureUnit.dimension, MeasureUnit.unit
+        ).order_by(MeasureUnit.id)
+        return [m._asdict() for m in db.session.execute(stmt)]
+
+    return _cached("measure_units", (MeasureUnit,), load)
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    """
+    Retorna la cantidad de aciertos (hits) y fallos (misses) de la caché por
+    lista desde que inició el proceso.
+    """
+    with _lock:
+        return {name: dict(counts) for name, counts in _stats.items()}
+
+
+def clear_cache():
+    """Vacía la caché de listas."""
+    with _lock:
+        _cache.clear()
+
+
+@db.event.listens_for(TableVersion.__table__, "after_create")
+@db.event.listens_for(TableVersion.__table__, "after_drop")
+def _reset_cache(target, connection, **kw):
+    """
+    Vacía la caché cuando la tabla de versiones se crea o se elimina, ya que
+    las versiones vuelven a empezar desde cero.
+    """
+    clear_cache()
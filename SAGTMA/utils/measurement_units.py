@@ -1,7 +1,7 @@
 import re
 
-from SAGTMA.models import MeasureUnit, db
-from SAGTMA.utils import events
+from SAGTMA.models import MeasureUnit, MaterialSupply, db
+from SAGTMA.utils import events, versions
 
 
 class MeasureUnitError(ValueError):
@@ -78,6 +78,9 @@ def register_measure_unit(dimension: str, unit: str):
 
     db.session.add(new_measure_unit)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(MeasureUnit)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Unidades de medida",
@@ -110,6 +113,9 @@ def delete_measure_unit(measure_unit_id: int):
     # Elimina la unidad de medida de la base de datos
     db.session.delete(deleted_measure_unit)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(MeasureUnit, MaterialSupply)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Unidades de medida",
@@ -164,6 +170,9 @@ def edit_measure_unit(measure_unit_id: int, dimension: str, unit: str):
     edited_measure_unit.dimension = dimension
     edited_measure_unit.unit = unit
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(MeasureUnit)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Unidades de medida",
@@ -1,5 +1,17 @@
-from SAGTMA.models import Role, User, ProjectDetail, db
-from SAGTMA.utils import events
+from flask import abort, flash, g, redirect, session, url_for
+
+from SAGTMA.models import (
+    Event,
+    Role,
+    User,
+    ProjectDetail,
+    ActionPlan,
+    Activity,
+    HumanTalent,
+    MaterialSupply,
+    db,
+)
+from SAGTMA.utils import event_stats, events, versions
 from SAGTMA.utils.auth import hash_password
 from SAGTMA.utils.validations import validate_id, validate_name
 
@@ -126,15 +138,32 @@ def register_user(
     new_user = User(id_number, username, names, surnames, hash_password(password), role)
     db.session.add(new_user)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(User)
+
     # Registra el evento en la base de datos
     events.add_event("Perfiles de Usuarios", f"Agregar usuario '{new_user.username}'")
 
 
 # ========== Obtención de datos ==========
-def get_current_user(user_id: int) -> User:
-    """Retorna el usuario con el id ingresado."""
-    stmt = db.select(User).where(User.id == user_id)
-    return db.session.execute(stmt).first()[0]
+def current_user() -> User:
+    """
+    Retorna el usuario que inició sesión.
+
+    El usuario se consulta solo cuando se necesita, a lo sumo una vez por
+    request, y se guarda en flask.g para el resto de la misma. Si el usuario
+    se eliminó mientras tenía la sesión iniciada, se cierra su sesión y se
+    redirige a la página de inicio de sesión.
+    """
+    if "user" not in g:
+        stmt = db.select(User).where(User.id == session["id"])
+        user = db.session.execute(stmt).scalar()
+        if user is None:
+            session.clear()
+            flash("Necesitas iniciar sesión primero")
+            abort(redirect(url_for("login")))
+        g.user = user
+    return g.user
 
 
 # ========== Edición de datos ==========
@@ -204,6 +233,9 @@ def edit_user(
     edited_user.surnames = surnames
     edited_user.role = new_role
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(User)
+
     # Registra el evento en la base de datos
     events.add_event("Perfiles de Usuarios", f"Editar usuario '{username}'")
 
@@ -241,9 +273,16 @@ def delete_user(user_id: int):
             "El usuario no puede ser eliminado porque es encargado de alguna(s) actividad(es)"
         )
 
-    # Elimina el usuario de la base de datos
+    # Elimina el usuario de la base de datos, junto con sus eventos, que se
+    # restan de los conteos
+    event_stats.remove_from_rollups(Event.user_id == deleted_user.id)
     db.session.delete(deleted_user)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(
+        User, ProjectDetail, ActionPlan, Activity, HumanTalent, MaterialSupply
+    )
+
     # Registra el evento en la base de datos
     events.add_event(
         "Perfiles de Usuarios", f"Eliminar usuario '{deleted_user.username}'"
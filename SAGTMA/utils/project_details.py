@@ -1,7 +1,18 @@
 import re
 
-from SAGTMA.models import Project, ProjectDetail, Vehicle, Department, User, db
-from SAGTMA.utils import events
+from SAGTMA.models import (
+    Project,
+    ProjectDetail,
+    Vehicle,
+    Department,
+    User,
+    ActionPlan,
+    Activity,
+    HumanTalent,
+    MaterialSupply,
+    db,
+)
+from SAGTMA.utils import events, versions
 from SAGTMA.utils.validations import validate_input_text
 
 
@@ -122,6 +133,9 @@ def register_project_detail(
     # Agrega el detalle de proyecto a la base de datos
     db.session.add(detail)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(ProjectDetail)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Datos de proyectos", f"Agregar detalle al proyecto '{project.description}'"
@@ -222,6 +236,9 @@ def edit_project_detail(
 
     edited_detail.observations = observations
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(ProjectDetail)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Datos de proyectos",
@@ -247,6 +264,9 @@ def delete_project_detail(detail_id: int):
     # Elimina el detalle de proyecto de la base de datos
     db.session.delete(detail)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(ProjectDetail, ActionPlan, Activity, HumanTalent, MaterialSupply)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Datos de proyectos",
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Dict, Optional
 
 from SAGTMA.models import (
     ActionPlan,
@@ -10,7 +11,8 @@ from SAGTMA.models import (
     HumanTalent,
     db,
 )
-from SAGTMA.utils import events
+from SAGTMA.utils import changes, events, versions
+from SAGTMA.utils.resources import format_date
 from SAGTMA.utils.validations import validate_date, validate_input_text
 
 
@@ -269,6 +271,9 @@ def register_activity_action_plan(
         )
         db.session.add(activity)
 
+        # Suma el costo de la actividad al plan de acción y al detalle
+        add_activity_cost(action_plan, total)
+
         # Registra el evento en la base de datos
         events.add_event(
             "Planes de Acción",
@@ -287,6 +292,12 @@ def register_activity_action_plan(
             .where(ActionPlan.action == action)
         )
 
+        # Verifica si el detalle de proyecto ya tiene planes de acción
+        smt = db.select(ActionPlan.id).where(
+            ActionPlan.project_detail_id == project_detail_id
+        )
+        first = db.session.execute(smt.limit(1)).first() is None
+
         # Crea un plan de acción
         action_plan = ActionPlan(action, project_detail_id)
 
@@ -307,6 +318,9 @@ def register_activity_action_plan(
         )
         db.session.add(activity)
 
+        # Suma el costo de la actividad al plan de acción y al detalle
+        add_activity_cost(action_plan, total, first)
+
         # Registra los eventos en la base de datos
         events.add_event("Planes de Acción", f"Agregar plan de acción '{action}'")
 
@@ -339,6 +353,9 @@ def register_activity_action_plan(
     db.session.add(human_talent)
     db.session.add(materials_supplies)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(ActionPlan, Activity, HumanTalent, MaterialSupply, ProjectDetail)
+
     # Registra los eventos en la base de datos
     events.add_event(
         "Talentos Humanos",
@@ -350,9 +367,6 @@ def register_activity_action_plan(
         f"Agregar material y suministro '{materials_supplies.description}' a la actividad '{activity.description}'",
     )
 
-    # Actualiza el monto del dato del proyecto
-    update_project_total(human_talent.activity.action_plan.project_detail)
-
 
 # ========== Eliminar Actividades de Planes de Acción ==========
 def delete_activity_action_plan(action_plan_id: int, activity_id: int):
@@ -377,23 +391,23 @@ def delete_activity_action_plan(action_plan_id: int, activity_id: int):
         raise ActionPlanError("La actividad no existe.")
     deleted_activity = activity_query[0]
 
-    # Elimina la actividad
+    # Elimina la actividad y resta su costo del plan de acción y del detalle
     db.session.delete(deleted_activity)
+    add_activity_cost(action_plan, -deleted_activity.cost)
 
-    project_detail = action_plan.project_detail
     # Si el plan de acción asociado se quedó sin actividades, se elimina también
     if not action_plan.activities:
         db.session.delete(action_plan)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(ActionPlan, Activity, HumanTalent, MaterialSupply, ProjectDetail)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Planes de acción",
         f"Eliminar actividad '{deleted_activity.description}' del plan de acción '{action_plan.action}'",
     )
 
-    # Actualiza el monto del dato del proyecto
-    update_project_total(project_detail)
-
 
 # ========== Editar Actividades de Planes de Acción ==========
 def edit_activity_action_plan(
@@ -587,6 +601,12 @@ def edit_activity_action_plan(
     # Edita el plan de acción
     edited_action_plan.action = action
 
+    # Suma la diferencia de costo de la actividad al plan de acción y al
+    # detalle
+    add_activity_cost(
+        edited_activity.action_plan, total_activity - edited_activity.cost
+    )
+
     # Edita la actividad
     edited_activity.description = activity
     edited_activity.start_date = start_date_t
@@ -605,6 +625,9 @@ def edit_activity_action_plan(
     edited_material_supply.amount = amount_ms
     edited_material_supply.cost = total_ms
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(ActionPlan, Activity, HumanTalent, MaterialSupply, ProjectDetail)
+
     # Registra los eventos en la base de datos
     events.add_event(
         "Planes de acción",
@@ -621,21 +644,258 @@ def edit_activity_action_plan(
         f"Editar material y suministro '{edited_material_supply.activity.description}' del plan de acción '{edited_activity.action_plan.action}'",
     )
 
-    # Actualiza el monto del dato del proyecto
-    update_project_total(edited_human_talent.activity.action_plan.project_detail)
+
+# ========== Consulta de Planes de Acción ==========
+def get_action_plan_tree(
+    project_detail_id: Optional[int] = None,
+    action_plan_id: Optional[int] = None,
+    activity_id: Optional[int] = None,
+    human_talent_id: Optional[int] = None,
+    material_supply_id: Optional[int] = None,
+) -> Dict[int, dict]:
+    """
+    Retorna los planes de acción que cumplen los filtros indicados, por id,
+    con sus actividades y los talentos humanos y materiales de cada una. Los
+    filtros vacíos (por ejemplo, un parámetro de la request sin valor) se
+    ignoran.
+
+    Siempre ejecuta tres consultas (planes y actividades, talentos humanos y
+    materiales) que solo leen las columnas necesarias, sin importar la
+    cantidad de actividades, y arma el árbol en una pasada por consulta.
+    """
+    filters = []
+    if project_detail_id:
+        filters.append(ActionPlan.project_detail_id == project_detail_id)
+    if action_plan_id:
+        filters.append(ActionPlan.id == action_plan_id)
+    if activity_id:
+        filters.append(Activity.id == activity_id)
+
+    # Si se filtra por talento humano o material, la actividad debe tenerlo y
+    # solo se retorna ese
+    talent_filters = []
+    if human_talent_id:
+        talent_filters.append(HumanTalent.id == human_talent_id)
+        filters.append(
+            Activity.id.in_(db.select(HumanTalent.activity_id).where(*talent_filters))
+        )
+    material_filters = []
+    if material_supply_id:
+        material_filters.append(MaterialSupply.id == material_supply_id)
+        filters.append(
+            Activity.id.in_(
+                db.select(MaterialSupply.activity_id).where(*material_filters)
+            )
+        )
+
+    # SELECT ... FROM action_plan JOIN activity ON ... WHERE filters...
+    stmt = (
+        db.select(
+            ActionPlan.id.label("action_plan_id"),
+            ActionPlan.action,
+            ActionPlan.cost.label("action_plan_cost"),
+            Activity.id,
+            Activity.description,
+            Activity.start_date,
+            Activity.deadline,
+            Activity.charge_person_id,
+            Activity.work_hours,
+            Activity.cost,
+        )
+        .join(Activity, ActionPlan.id == Activity.action_plan_id)
+        .where(*filters)
+        .order_by(ActionPlan.id, Activity.id)
+    )
+
+    action_plans = {}
+    activities = {}
+    for row in db.session.execute(stmt):
+        if row.action_plan_id not in action_plans:
+            action_plans[row.action_plan_id] = {
+                "id": row.action_plan_id,
+                "action": row.action,
+                "cost": row.action_plan_cost,
+                "activities": [],
+            }
+
+        activity = {
+            "id": row.id,
+            "description": row.description,
+            "start_date": format_date(row.start_date),
+            "deadline": format_date(row.deadline),
+            "charge_person_id": row.charge_person_id,
+            "work_hours": row.work_hours,
+            "cost": row.cost,
+            "human_talents": [],
+            "material_supplies": [],
+        }
+        activities[row.id] = activity
+        action_plans[row.action_plan_id]["activities"].append(activity)
+
+    if not activities:
+        return action_plans
+
+    # Las actividades de los hijos se seleccionan con una subconsulta en vez de
+    # enviar sus ids, para no depender de la cantidad de actividades
+    activity_ids = (
+        db.select(Activity.id)
+        .join(ActionPlan, ActionPlan.id == Activity.action_plan_id)
+        .where(*filters)
+    )
+
+    # SELECT ... FROM human_talent WHERE activity_id IN (SELECT ...)
+    stmt = (
+        db.select(
+            HumanTalent.id,
+            HumanTalent.activity_id,
+            HumanTalent.amount,
+            HumanTalent.cost,
+        )
+        .where(HumanTalent.activity_id.in_(activity_ids), *talent_filters)
+        .order_by(HumanTalent.id)
+    )
+    for row in db.session.execute(stmt):
+        activity = activities[row.activity_id]
+        activity["human_talents"].append(
+            {
+                "id": row.id,
+                "amount_persons": row.amount,
+                "cost_hl": row.cost / activity["work_hours"],
+            }
+        )
+
+    # SELECT ... FROM material_supply WHERE activity_id IN (SELECT ...)
+    stmt = (
+        db.select(
+            MaterialSupply.id,
+            MaterialSupply.activity_id,
+            MaterialSupply.category,
+            MaterialSupply.description,
+            MaterialSupply.amount,
+            MaterialSupply.measure_unit_id,
+            MaterialSupply.cost,
+        )
+        .where(MaterialSupply.activity_id.in_(activity_ids), *material_filters)
+        .order_by(MaterialSupply.id)
+    )
+    for row in db.session.execute(stmt):
+        activities[row.activity_id]["material_supplies"].append(
+            {
+                "id": row.id,
+                "category": row.category,
+                "description": row.description,
+                "amount": row.amount,
+                "unit_id": row.measure_unit_id,
+                "cost": row.cost / row.amount,
+            }
+        )
+
+    return action_plans
 
 
 # ========== Utilidades ==========
-def update_project_total(project_detail):
-    """Actualiza en la base de datos el monto total de los planes de acción
-    asociados al dato del proyecto.
+def add_activity_cost(action_plan: ActionPlan, delta: float, first: bool = False):
+    """
+    Suma delta, la diferencia entre el costo nuevo y el anterior de una
+    actividad, al total del plan de acción y al monto de su detalle de
+    proyecto. Se actualizan en la base de datos (SET cost = cost + delta) al
+    confirmar la transacción, junto con la actividad.
 
-    Args:
-        project_detail (ProjectDetail): Dato del proyecto.
+    Si first es verdadero la actividad es la primera del detalle de proyecto,
+    cuyo monto hasta entonces se ingresaba a mano y pasa a ser delta.
     """
-    total = 0
-    for action_plan in project_detail.action_plans:
-        for activity in action_plan.activities:
-            total += activity.cost
-    project_detail.cost = total
+    project_detail = action_plan.project_detail
+    action_plan.cost = ActionPlan.cost + delta
+    project_detail.cost = delta if first else ProjectDetail.cost + delta
+
+
+def _cost_rollups() -> list:
+    """
+    Retorna, para los planes de acción y los detalles de proyecto, el modelo,
+    el total calculado a partir de los costos de sus actividades y la
+    condición de las filas con actividades cuyo total guardado es distinto.
+    """
+    # (SELECT SUM(cost) FROM activity
+    #   WHERE activity.action_plan_id = action_plan.id)
+    plan_total = (
+        db.select(db.func.sum(Activity.cost))
+        .where(Activity.action_plan_id == ActionPlan.id)
+        .scalar_subquery()
+    )
+
+    # (SELECT SUM(activity.cost) FROM activity JOIN action_plan ON ...
+    #   WHERE action_plan.project_detail_id = project_detail.id)
+    detail_total = (
+        db.select(db.func.sum(Activity.cost))
+        .join(ActionPlan, ActionPlan.id == Activity.action_plan_id)
+        .where(ActionPlan.project_detail_id == ProjectDetail.id)
+        .scalar_subquery()
+    )
+
+    return [
+        (
+            ActionPlan,
+            plan_total,
+            db.and_(
+                ActionPlan.id.in_(db.select(Activity.action_plan_id)),
+                ActionPlan.cost != plan_total,
+            ),
+        ),
+        (
+            ProjectDetail,
+            detail_total,
+            db.and_(
+                ProjectDetail.id.in_(
+                    db.select(ActionPlan.project_detail_id).join(
+                        Activity, Activity.action_plan_id == ActionPlan.id
+                    )
+                ),
+                ProjectDetail.cost != detail_total,
+            ),
+        ),
+    ]
+
+
+def cost_rollup_statements() -> list:
+    """
+    Retorna las sentencias que recalculan desde cero el total de cada plan de
+    acción y el monto de cada detalle de proyecto con actividades, a partir de
+    los costos de sus actividades. Solo se actualizan las filas cuyo total
+    cambia; los detalles de proyecto sin actividades conservan su monto.
+
+    Las sentencias usan subconsultas correlacionadas en lugar de UPDATE ...
+    FROM, que requiere SQLite 3.33 o posterior.
+    """
+    # UPDATE action_plan SET cost = (SELECT SUM(cost) ...)
+    #   WHERE id IN (SELECT action_plan_id FROM activity)
+    #   AND cost != (SELECT SUM(cost) ...)
+    return [
+        db.update(model).values(cost=total).where(stale)
+        for model, total, stale in _cost_rollups()
+    ]
+
+
+def recompute_costs() -> int:
+    """
+    Recalcula el total de cada plan de acción y el monto de cada detalle de
+    proyecto a partir de los costos de sus actividades, para reparar
+    diferencias con los que se mantienen con add_activity_cost. Retorna la
+    cantidad de planes de acción y detalles de proyecto corregidos.
+    """
+    rowcount = 0
+    for model, total, stale in _cost_rollups():
+        # Registra los cambios, que no pasan por el ORM, solo de las filas
+        # cuyo total cambia
+        changes.record_updates(model, db.select(model.id).where(stale))
+
+        result = db.session.execute(
+            db.update(model).values(cost=total).where(stale),
+            execution_options={"synchronize_session": False},
+        )
+        if result.rowcount:
+            versions.bump(model)
+        rowcount += result.rowcount
+
     db.session.commit()
+
+    return rowcount
@@ -1,7 +1,15 @@
 from datetime import date
 
-from SAGTMA.models import Project, db
-from SAGTMA.utils import events
+from SAGTMA.models import (
+    Project,
+    ProjectDetail,
+    ActionPlan,
+    Activity,
+    HumanTalent,
+    MaterialSupply,
+    db,
+)
+from SAGTMA.utils import events, versions
 from SAGTMA.utils.validations import validate_date
 
 
@@ -66,6 +74,9 @@ def create_project(description: str, start_date: str, deadline: str):
     new_project = Project(description, start_date_t, deadline_t)
     db.session.add(new_project)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Project)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Portafolio de Proyectos", f"Agregar proyecto '{new_project.description}'"
@@ -120,6 +131,9 @@ def edit_project(project_id: int, description: str, start_date: str, deadline: s
     edited_project.start_date = start_date_t
     edited_project.end_date = deadline_t
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Project)
+
     # Registra el evento en la base de datos
     events.add_event("Portafolio de Proyectos", f"Modificar proyecto '{description}'")
 
@@ -141,6 +155,11 @@ def delete_project(project_id: int):
     # Elimina el proyecto
     db.session.delete(deleted_project)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(
+        Project, ProjectDetail, ActionPlan, Activity, HumanTalent, MaterialSupply
+    )
+
     # Registra el evento en la base de datos
     events.add_event(
         "Portafolio de Proyectos", f"Eliminar proyecto '{deleted_project.description}'"
@@ -167,6 +186,9 @@ def toggle_project_status(project_id: int):
     # Determina el nuevo estado del proyecto
     state = "Activo" if project.active else "Inactivo"
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Project)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Portafolio de Proyectos",
@@ -0,0 +1,324 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from flask import json as flask_json
+
+from SAGTMA.models import db
+
+# Cantidad máxima de filas por página de la API
+MAX_LIMIT = 1000
+
+# Cantidad de filas por lote al recorrer un recurso sin paginar
+STREAM_BATCH_SIZE = 500
+
+
+class ResourceError(ValueError):
+    pass
+
+
+def format_date(value: datetime.date) -> str:
+    """Formatea una fecha como 'YYYY-MM-DD'."""
+    # Más rápido que strftime, y también descarta la hora de un datetime
+    return datetime.date.isoformat(value)
+
+
+def build_serializer(
+    fields: Sequence[str], formats: Mapping[str, Callable]
+) -> Callable[[tuple], dict]:
+    """
+    Retorna una función que convierte una fila con las columnas de los campos
+    indicados, en ese orden, en un diccionario, aplicando el formato de los
+    campos que lo tengan a los valores que no sean None.
+
+    Los campos con formato se buscan una sola vez, al crear la función, y no
+    en cada fila.
+    """
+    fields = tuple(fields)
+    formatted = [
+        (i, name, formats[name]) for i, name in enumerate(fields) if name in formats
+    ]
+
+    if not formatted:
+        return lambda row: dict(zip(fields, row))
+
+    def serialize(row: tuple) -> dict:
+        data = dict(zip(fields, row))
+        for i, name, format_value in formatted:
+            value = row[i]
+            if value is not None:
+                data[name] = format_value(value)
+        return data
+
+    return serialize
+
+
+class Resource:
+    """
+    Descripción de un recurso de la API: los campos que expone, la columna
+    de la que se obtiene cada uno y, opcionalmente, cómo formatear su valor.
+
+    La clave del recurso (por defecto, la columna id del modelo) desempata el
+    orden de las filas para que la paginación por cursor sea estable.
+    """
+
+    def __init__(
+        self,
+        model,
+        fields: Dict[str, Any],
+        formats: Optional[Dict[str, Callable]] = None,
+        key: Any = None,
+    ):
+        self.model = model
+        self.fields = fields
+        self.formats = formats or {}
+        self.key = key if key is not None else model.id
+        self._serializers: Dict[Tuple[str, ...], Callable[[tuple], dict]] = {}
+
+    def serializer(self, fields: Sequence[str]) -> Callable[[tuple], dict]:
+        """
+        Retorna la función que convierte una fila con las columnas de los
+        campos indicados, en ese orden, en el diccionario a retornar. Se
+        crea una sola vez por combinación de campos.
+        """
+        fields = tuple(fields)
+        serialize = self._serializers.get(fields)
+        if serialize is None:
+            serialize = build_serializer(fields, self.formats)
+            self._serializers[fields] = serialize
+        return serialize
+
+
+# ========== Parámetros de la request ==========
+def parse_fields(resource: Resource, fields: Optional[str]) -> List[str]:
+    """
+    Convierte el parámetro fields ("a,b,c") en la lista de campos a retornar;
+    si no se indica se retornan todos.
+
+    Lanza una excepción ResourceError si algún campo no existe.
+    """
+    if not fields:
+        return list(resource.fields)
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    invalid = [name for name in names if name not in resource.fields]
+    if invalid or not names:
+        raise ResourceError("Los campos válidos son: " + ", ".join(resource.fields))
+    return names
+
+
+def parse_sort(resource: Resource, sort: Optional[str]) -> List[Tuple[Any, bool]]:
+    """
+    Convierte el parámetro sort ("a,-b") en la lista de columnas por las que
+    ordenar y si el orden es descendente. Siempre termina por la clave del
+    recurso.
+
+    Lanza una excepción ResourceError si algún campo no existe.
+    """
+    keys = []
+    for name in (sort or "").split(","):
+        name = name.strip()
+        if not name:
+            continue
+
+        descending = name.startswith("-")
+        name = name.lstrip("-")
+        if name not in resource.fields:
+            raise ResourceError(
+                "Los campos de ordenamiento válidos son: " + ", ".join(resource.fields)
+            )
+        keys.append((resource.fields[name], descending))
+
+    if not any(column is resource.key for column, _ in keys):
+        keys.append((resource.key, False))
+    return keys
+
+
+def parse_limit(limit: Optional[str]) -> Optional[int]:
+    """
+    Convierte el parámetro limit en la cantidad de filas por página, entre 1
+    y MAX_LIMIT. Si no se indica no se pagina.
+
+    Lanza una excepción ResourceError si no es un número.
+    """
+    if limit is None:
+        return None
+
+    try:
+        return min(max(int(limit), 1), MAX_LIMIT)
+    except ValueError:
+        raise ResourceError("El límite indicado no es válido")
+
+
+# ========== Cursores ==========
+def encode_cursor(values: tuple) -> str:
+    """Codifica los valores de ordenamiento de la última fila de una página."""
+    values = [v.isoformat() if isinstance(v, datetime.date) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(keys: List[Tuple[Any, bool]], cursor: str) -> list:
+    """
+    Decodifica un cursor generado por encode_cursor para las columnas de
+    ordenamiento indicadas.
+
+    Lanza una excepción ResourceError si el cursor no es válido.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+
+        for i, (column, _) in enumerate(keys):
+            python_type = column.type.python_type
+            if python_type in (datetime.date, datetime.datetime):
+                values[i] = python_type.fromisoformat(values[i])
+    except (binascii.Error, ValueError, TypeError, NotImplementedError):
+        raise ResourceError("El cursor indicado no es válido")
+
+    return values
+
+
+def _after(keys: List[Tuple[Any, bool]], values: list):
+    """
+    Retorna la condición de las filas posteriores a la del cursor en el orden
+    indicado:
+
+        k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+    """
+    conditions = []
+    for i, (column, descending) in enumerate(keys):
+        previous = [c == v for (c, _), v in zip(keys[:i], values[:i])]
+        following = column < values[i] if descending else column > values[i]
+        conditions.append(db.and_(*previous, following))
+
+    return db.or_(*conditions)
+
+
+# ========== Consulta ==========
+def _select(resource: Resource, args: Mapping[str, str], filters: tuple):
+    """
+    Construye la consulta de las filas de un recurso según los parámetros de
+    la request. Retorna la consulta, los campos a retornar, las columnas de
+    ordenamiento y el límite.
+    """
+    fields = parse_fields(resource, args.get("fields"))
+    keys = parse_sort(resource, args.get("sort"))
+    limit = parse_limit(args.get("limit"))
+
+    # SELECT fields..., sort keys... FROM resource WHERE filters...
+    #   ORDER BY sort keys...
+    columns = [resource.fields[name].label(name) for name in fields]
+    sort_columns = [column.label(f"_sort{i}") for i, (column, _) in enumerate(keys)]
+    stmt = (
+        db.select(*columns, *sort_columns)
+        .select_from(resource.model)
+        .where(*filters)
+        .order_by(*(c.desc() if desc else c.asc() for c, desc in keys))
+    )
+
+    cursor = args.get("cursor")
+    if cursor:
+        stmt = stmt.where(_after(keys, decode_cursor(keys, cursor)))
+
+    return stmt, fields, keys, limit
+
+
+def list_resource(
+    resource: Resource,
+    args: Optional[Mapping[str, str]] = None,
+    filters: tuple = (),
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Consulta las filas de un recurso que cumplen los filtros indicados, según
+    los parámetros de la request:
+
+    - fields: campos a retornar, separados por comas. Solo se consultan sus
+      columnas (y las de ordenamiento).
+    - sort: campos por los que ordenar, separados por comas; un '-' delante
+      indica orden descendente.
+    - limit: cantidad de filas por página.
+    - cursor: cursor de la página, retornado por la consulta anterior.
+
+    Retorna las filas como diccionarios y el cursor de la página siguiente, o
+    None si es la última.
+
+    Lanza una excepción ResourceError si algún parámetro no es válido.
+    """
+    stmt, fields, _, limit = _select(resource, args or {}, filters)
+    if limit is not None:
+        # Consulta una fila más para saber si hay una página siguiente
+        stmt = stmt.limit(limit + 1)
+
+    result = db.session.execute(stmt).fetchall()
+
+    next_cursor = None
+    if limit is not None and len(result) > limit:
+        result = result[:limit]
+        next_cursor = encode_cursor(tuple(result[-1][len(fields) :]))
+
+    serialize = resource.serializer(fields)
+    return [serialize(row) for row in result], next_cursor
+
+
+def iter_resource(
+    resource: Resource,
+    args: Optional[Mapping[str, str]] = None,
+    filters: tuple = (),
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Igual que list_resource, pero sin paginar: retorna un generador que
+    recorre todas las filas (desde el cursor, si se indica) por lotes del lado
+    del servidor, sin cargarlas todas en memoria.
+
+    Los parámetros se validan de inmediato, pero la consulta no se ejecuta
+    hasta que se comienza a iterar el generador.
+
+    Lanza una excepción ResourceError si algún parámetro no es válido.
+    """
+    stmt, fields, _, _ = _select(resource, args or {}, filters)
+    stmt = stmt.execution_options(yield_per=batch_size)
+    serialize = resource.serializer(fields)
+
+    def rows():
+        for row in db.session.execute(stmt):
+            yield serialize(row)
+
+    return rows()
+
+
+# ========== Respuestas por partes ==========
+def stream_json(items: Iterable, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """
+    Convierte los elementos de un iterable en un arreglo JSON que se produce
+    por partes, de a batch_size elementos, para transmitirlo en una respuesta
+    sin armarlo completo en memoria.
+    """
+    yield "["
+
+    chunk = []
+    separator = ""
+    for item in items:
+        chunk.append(flask_json.dumps(item))
+        if len(chunk) == batch_size:
+            yield separator + ",".join(chunk)
+            chunk.clear()
+            separator = ","
+
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]"
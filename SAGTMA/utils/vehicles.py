@@ -1,7 +1,20 @@
+import re
 from datetime import date
-
-from SAGTMA.models import Vehicle, Client, ProjectDetail, db
-from SAGTMA.utils import events
+from typing import List, Optional
+
+from SAGTMA.models import (
+    Vehicle,
+    Client,
+    ProjectDetail,
+    ActionPlan,
+    Activity,
+    HumanTalent,
+    MaterialSupply,
+    compact_key,
+    db,
+    search_key,
+)
+from SAGTMA.utils import events, versions
 from SAGTMA.utils.validations import validate_name
 
 
@@ -174,6 +187,9 @@ def register_client_vehicle(
     # Anade el vehiculo a la lista de vehiculos del cliente
     client.vehicles.append(new_vehicle)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Vehicle)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Vehículos de los Clientes",
@@ -253,6 +269,9 @@ def edit_vehicle(
     edited_vehicle.color = color
     edited_vehicle.problem = problem
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(Vehicle)
+
     # Registra el evento en la base de datos
     events.add_event(
         "Vehículos de los Clientes",
@@ -283,8 +302,102 @@ def delete_vehicle(vehicle_id: int) -> int:
     # Elimina el vehiculo de la base de datos
     db.session.delete(deleted_vehicle)
 
+    # Actualiza la versión de las tablas modificadas
+    versions.bump(
+        Vehicle, ProjectDetail, ActionPlan, Activity, HumanTalent, MaterialSupply
+    )
+
     # Registra el evento en la base de datos
     events.add_event(
         "Vehículos de los Clientes",
         f"Eliminar vehiculo '{deleted_vehicle.brand}' del cliente '{deleted_vehicle.owner.id_number}'",
     )
+
+
+# ========== Búsqueda ==========
+# Cantidad de vehículos retornados por defecto y como máximo en una búsqueda
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+
+def _prefix(column, prefix: str):
+    """
+    Retorna la condición de que la columna comience por el prefijo, como un
+    rango para que SQLite pueda usar el índice de la columna.
+    """
+    return db.and_(column >= prefix, column < prefix + "\U0010ffff")
+
+
+def _options(*conditions, limit: Optional[int] = None) -> List[dict]:
+    """
+    Retorna el id, placa, marca y problema de los vehículos que cumplen las
+    condiciones, con la cédula, nombres y apellidos de su dueño, ordenados
+    por placa. Si se indica limit, retorna a lo sumo limit vehículos.
+    """
+    # SELECT vehicle.id, license_plate, brand, client.id_number, names,
+    #   surnames, problem FROM vehicle JOIN client ON owner_id = client.id
+    #   WHERE conditions... ORDER BY license_plate_key
+    stmt = (
+        db.select(
+            Vehicle.id,
+            Vehicle.license_plate,
+            Vehicle.brand,
+            Client.id_number,
+            Client.names,
+            Client.surnames,
+            Vehicle.problem,
+        )
+        .join(Client, Vehicle.owner_id == Client.id)
+        .where(*conditions)
+        .order_by(Vehicle.license_plate_key)
+        .limit(limit)
+    )
+    return [v._asdict() for v in db.session.execute(stmt)]
+
+
+def get_vehicle_option(vehicle_id: int) -> List[dict]:
+    """Retorna el vehículo indicado como en search_vehicles, si existe."""
+    return _options(Vehicle.id == vehicle_id)
+
+
+def search_vehicles(term: str, limit: int = SEARCH_LIMIT) -> List[dict]:
+    """
+    Retorna a lo sumo limit vehículos (entre 1 y MAX_SEARCH_LIMIT) cuya placa,
+    o la cédula, nombres o apellidos de su dueño, comiencen por el término de
+    búsqueda, sin importar mayúsculas, acentos, espacios ni guiones.
+    """
+    limit = min(max(limit, 1), MAX_SEARCH_LIMIT)
+    key, compact = search_key(term), compact_key(term)
+    if not compact:
+        return []
+
+    # Cada condición se busca por separado en su índice, limitada a las
+    # primeras placas que la cumplen, y luego se unen los ids encontrados: las
+    # primeras placas de la unión están entre las de alguna condición
+    queries = [db.select(Vehicle.id).where(_prefix(Vehicle.license_plate_key, compact))]
+    match = re.fullmatch(r"[vejgc]?(\d+)", compact)
+    if match:
+        # Cédula, con o sin la letra inicial
+        queries.append(
+            db.select(Vehicle.id)
+            .join(Client, Vehicle.owner_id == Client.id)
+            .where(_prefix(Client.id_number_key, match[1]))
+        )
+    for column in [Client.name_key, Client.surname_key]:
+        queries.append(
+            db.select(Vehicle.id)
+            .join(Client, Vehicle.owner_id == Client.id)
+            .where(_prefix(column, key))
+        )
+
+    # SQLite no permite LIMIT dentro de un UNION, salvo en subconsultas
+    ids = db.union(
+        *(
+            db.select(
+                q.order_by(Vehicle.license_plate_key).limit(limit).subquery().c.id
+            )
+            for q in queries
+        )
+    ).subquery()
+
+    return _options(Vehicle.id.in_(db.select(ids.c.id)), limit=limit)
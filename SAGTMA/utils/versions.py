@@ -0,0 +1,65 @@
+import hashlib
+from typing import Dict, List
+
+from sqlalchemy.dialects.sqlite import insert
+
+from SAGTMA.models import TABLE_EPOCH, TableVersion, db
+
+
+def bump(*models):
+    """
+    Aumenta en uno la versión de las tablas de los modelos indicados.
+
+    No confirma la transacción, para que la versión cambie junto con los
+    datos; los helpers de utils la confirman al registrar su evento.
+    """
+    # INSERT INTO table_version VALUES (...), (...)
+    #   ON CONFLICT DO UPDATE SET version = version + 1
+    stmt = insert(TableVersion).values(
+        [{"name": model.__tablename__, "version": 1} for model in models]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TableVersion.name],
+        set_={"version": TableVersion.version + 1},
+    )
+    db.session.execute(stmt)
+
+
+def get_versions(*models) -> Dict[str, int]:
+    """
+    Retorna la versión de las tablas de los modelos indicados (0 si nunca
+    cambiaron), con una sola consulta y sin cargar objetos del ORM.
+    """
+    return _get_versions([model.__tablename__ for model in models])
+
+
+def get_versions_with_epoch(*models) -> Dict[str, int]:
+    """
+    Retorna la versión de las tablas de los modelos indicados, como
+    get_versions, junto con el valor aleatorio de la base de datos en la
+    clave TABLE_EPOCH.
+
+    Sirve de clave para lo que se guarda según la versión de las tablas
+    (ETags, cachés): las versiones de una base de datos recreada vuelven a
+    empezar desde cero, pero su valor aleatorio cambia.
+    """
+    return _get_versions([model.__tablename__ for model in models] + [TABLE_EPOCH])
+
+
+def _get_versions(names: List[str]) -> Dict[str, int]:
+    # SELECT name, version FROM table_version WHERE name IN (...)
+    stmt = db.select(TableVersion.name, TableVersion.version).where(
+        TableVersion.name.in_(names)
+    )
+    versions = dict(db.session.execute(stmt).fetchall())
+    return {name: versions.get(name, 0) for name in names}
+
+
+def etag(key: str, *models) -> str:
+    """
+    Retorna un ETag fuerte para una representación identificada por key (por
+    ejemplo, la URL de la request) que depende de las tablas indicadas.
+    """
+    versions = get_versions_with_epoch(*models)
+    data = key + "|" + ",".join(f"{name}:{v}" for name, v in versions.items())
+    return hashlib.sha1(data.encode()).hexdigest()
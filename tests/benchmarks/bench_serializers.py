@@ -0,0 +1,124 @@
+"""
+Compara el tiempo de convertir filas de proyectos en diccionarios para la API:
+
+- orm: objetos del ORM con diccionarios armados a mano y strftime, como lo
+  hacían las rutas de la API originalmente.
+- zip: tuplas de columnas con el diccionario armado recorriendo los campos y
+  sus formatos en cada fila.
+- compilado: tuplas de columnas con la función compilada del recurso.
+
+Se ejecuta con:
+
+    python -m tests.benchmarks.bench_serializers [filas]
+"""
+
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+import SAGTMA
+from SAGTMA.models import Project, db
+
+REPEAT = 5
+
+
+def populate(rows: int):
+    """Añade la cantidad de proyectos indicada."""
+    start = date(2021, 1, 1)
+    db.session.execute(
+        db.insert(Project),
+        [
+            {
+                "description": f"Proyecto {i}",
+                "start_date": start + timedelta(days=i % 365),
+                "end_date": start + timedelta(days=365 + i % 365),
+            }
+            for i in range(rows)
+        ],
+    )
+    db.session.commit()
+
+
+def serialize_orm() -> list:
+    stmt = db.select(Project)
+    return [
+        {
+            "id": p.id,
+            "description": p.description,
+            "start_date": p.start_date.strftime("%Y-%m-%d"),
+            "deadline": p.end_date.strftime("%Y-%m-%d"),
+        }
+        for p in db.session.execute(stmt).scalars()
+    ]
+
+
+def _projects():
+    """Retorna el recurso de proyectos de la API y la consulta de sus columnas."""
+    # Las rutas solo pueden importarse una vez creada la aplicación
+    from SAGTMA.routes.api import PROJECTS
+
+    fields = list(PROJECTS.fields)
+    columns = [PROJECTS.fields[name].label(name) for name in fields]
+    return PROJECTS, fields, db.select(*columns)
+
+
+def serialize_zip() -> list:
+    resource, fields, stmt = _projects()
+    formats = [resource.formats.get(name) for name in fields]
+    return [
+        {
+            name: value if fmt is None or value is None else fmt(value)
+            for name, fmt, value in zip(fields, formats, row)
+        }
+        for row in db.session.execute(stmt)
+    ]
+
+
+def serialize_compiled() -> list:
+    resource, fields, stmt = _projects()
+    serialize = resource.serializer(fields)
+    return [serialize(row) for row in db.session.execute(stmt)]
+
+
+def main(rows: int):
+    app = SAGTMA.flask_app(
+        test_config={
+            "TESTING": True,
+            "DATABASE_NAME": "SAGTMA_benchmark",
+            "EVENT_WRITER_ASYNC": False,
+        }
+    )
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        try:
+            populate(rows)
+
+            expected = serialize_orm()
+            print(f"{rows} filas, mejor de {REPEAT} repeticiones")
+            for name, serialize in [
+                ("orm", serialize_orm),
+                ("zip", serialize_zip),
+                ("compilado", serialize_compiled),
+            ]:
+                assert serialize() == expected
+                # Cada repetición usa una sesión nueva, sin objetos en caché
+                best = min(
+                    timeit.repeat(
+                        lambda: (serialize(), db.session.remove()),
+                        number=1,
+                        repeat=REPEAT,
+                    )
+                )
+                print(f"{name:>10}: {best * 1000:8.1f} ms")
+        finally:
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+            os.remove(os.path.join(app.instance_path, "SAGTMA_benchmark.sqlite"))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
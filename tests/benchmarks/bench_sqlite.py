@@ -0,0 +1,146 @@
+"""
+Compara la concurrencia de lecturas y escrituras con cada perfil de pragmas de
+SQLite (ver SAGTMA/utils/database.py):
+
+- default: pragmas por defecto de SQLite (rollback journal).
+- production: WAL, synchronous NORMAL, busy_timeout, cache_size y mmap_size.
+
+Durante unos segundos un hilo inserta proyectos, uno por transacción, mientras
+otros hilos leen proyectos. Se reporta cuántas escrituras y lecturas se
+completaron, la mayor espera de una escritura, y cuántas operaciones fallaron
+por encontrar la base de datos bloqueada.
+
+Se ejecuta con:
+
+    python -m tests.benchmarks.bench_sqlite [segundos] [lectores]
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+import SAGTMA
+from SAGTMA.models import Project, db
+
+ROWS = 20000
+
+
+def populate(rows: int):
+    """Añade la cantidad de proyectos indicada."""
+    start = date(2021, 1, 1)
+    db.session.execute(
+        db.insert(Project),
+        [
+            {
+                "description": f"Proyecto {i}",
+                "start_date": start + timedelta(days=i % 365),
+                "end_date": start + timedelta(days=365 + i % 365),
+            }
+            for i in range(rows)
+        ],
+    )
+    db.session.commit()
+
+
+def write(app, stop: threading.Event, stats: dict):
+    """Inserta proyectos de a uno, confirmando cada uno, hasta que se detenga."""
+    with app.app_context():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                description = f"Proyecto nuevo {stats['writes'] + stats['errors']}"
+                db.session.add(Project(description, date(2023, 1, 1), date(2024, 1, 1)))
+                db.session.commit()
+                stats["writes"] += 1
+            except OperationalError:
+                db.session.rollback()
+                stats["errors"] += 1
+            stats["max_wait"] = max(stats["max_wait"], time.perf_counter() - start)
+        db.session.remove()
+
+
+def read(app, stop: threading.Event, stats: dict, lock: threading.Lock):
+    """Lee los últimos proyectos hasta que se detenga."""
+    stmt = db.select(Project.id, Project.description).order_by(
+        Project.start_date.desc()
+    )
+    with app.app_context():
+        while not stop.is_set():
+            try:
+                db.session.execute(stmt.limit(500)).fetchall()
+                db.session.rollback()
+                with lock:
+                    stats["reads"] += 1
+            except OperationalError:
+                db.session.rollback()
+                with lock:
+                    stats["errors"] += 1
+        db.session.remove()
+
+
+def run(profile: str, seconds: float, readers: int) -> dict:
+    """Ejecuta la carga concurrente con el perfil indicado."""
+    name = f"SAGTMA_benchmark_{profile}"
+    app = SAGTMA.flask_app(
+        test_config={
+            "TESTING": True,
+            "DATABASE_NAME": name,
+            "DATABASE_PROFILE": profile,
+            "EVENT_WRITER_ASYNC": False,
+        }
+    )
+
+    stats = {"writes": 0, "reads": 0, "errors": 0, "max_wait": 0.0}
+    try:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            populate(ROWS)
+
+        stop, lock = threading.Event(), threading.Lock()
+        threads = [threading.Thread(target=write, args=(app, stop, stats))]
+        threads += [
+            threading.Thread(target=read, args=(app, stop, stats, lock))
+            for _ in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+
+        path = os.path.join(app.instance_path, f"{name}.sqlite")
+        for suffix in ["", "-wal", "-shm", "-journal"]:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    return stats
+
+
+def main(seconds: float, readers: int):
+    print(f"{seconds:g} s, 1 escritor y {readers} lectores, {ROWS} filas")
+    for profile in ["default", "production"]:
+        stats = run(profile, seconds, readers)
+        print(
+            f"{profile:>10}: {stats['writes'] / seconds:8.1f} escrituras/s "
+            f"{stats['reads'] / seconds:8.1f} lecturas/s "
+            f"espera máxima {stats['max_wait'] * 1000:7.1f} ms "
+            f"{stats['errors']} bloqueos"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 5,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+    )
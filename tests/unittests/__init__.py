@@ -1,12 +1,29 @@
+import contextlib
 import unittest
 
+from flask import g
+from flask.testing import FlaskClient
+
 import SAGTMA
 from SAGTMA.models import Role, User, Event, db
 from SAGTMA.utils.profiles import hash_password
 
 
+class _TestClient(FlaskClient):
+    """
+    Cliente de pruebas que descarta el usuario guardado en flask.g por la
+    request anterior, ya que todas las requests de una prueba comparten su
+    contexto de aplicación.
+    """
+
+    def open(self, *args, **kwargs):
+        g.pop("user", None)
+        return super().open(*args, **kwargs)
+
+
 class BaseTestClass(unittest.TestCase):
     app = SAGTMA.test_app()
+    app.test_client_class = _TestClient
 
     def setUp(self):
         # Puebla la base de datos para el conjunto de tests, si es necesario
@@ -55,6 +72,21 @@ class BaseTestClass(unittest.TestCase):
 
         db.session.commit()
 
+    @contextlib.contextmanager
+    def _listen_queries(self, fn):
+        """
+        Llama a fn antes de cada consulta a la base de datos, en cualquiera de
+        sus motores (el de solo lectura atiende las requests GET).
+        """
+        engines = list(db.engines.values())
+        for engine in engines:
+            db.event.listen(engine, "before_cursor_execute", fn)
+        try:
+            yield
+        finally:
+            for engine in engines:
+                db.event.remove(engine, "before_cursor_execute", fn)
+
     def login_user(self, username: str, password: str):
         """Inicia sesión con un usuario"""
         return self.client.post(
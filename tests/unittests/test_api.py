@@ -0,0 +1,265 @@
+import json
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlparse
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import Department, MeasureUnit, db
+from SAGTMA.utils import resources, versions
+
+
+class TestApi(BaseTestClass):
+    def populate_db(self):
+        super().populate_db()
+
+        # Añade departamentos y unidades de medida
+        for description in ["Mecánica", "Eléctrica", "Pintura", "Latonería", "Frenos"]:
+            db.session.add(Department(description))
+        for dimension, unit in [(1, "kg"), (2, "kg"), (1, "l")]:
+            db.session.add(MeasureUnit(dimension, unit))
+        db.session.commit()
+
+    def _pages(self, url: str) -> list:
+        """Recorre las páginas de un endpoint siguiendo el header Link."""
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            pages.append(res.json)
+
+            link = res.headers.get("Link")
+            url = link[1 : link.index(">")] if link else None
+
+        return pages
+
+    def test_fields(self):
+        """Testea que solo se consultan y retornan los campos pedidos."""
+        self._login_admin()
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            if "FROM department" in statement:
+                statements.append(statement)
+
+        with self._listen_queries(capture):
+            # La respuesta se transmite por partes: se consulta al leerla
+            rows = self.client.get("/api/v1/departments?fields=description").json
+
+        self.assertEqual(rows[0], {"description": "Mecánica"})
+        (statement,) = statements
+        select = statement[: statement.index("FROM")]
+        self.assertNotIn("department.description AS _sort", select)
+        self.assertEqual(select.count("department.description"), 1)
+
+    def test_sort(self):
+        """Testea el ordenamiento ascendente y descendente."""
+        self._login_admin()
+
+        res = self.client.get("/api/v1/departments?sort=description&fields=description")
+        self.assertEqual(
+            [d["description"] for d in res.json],
+            ["Eléctrica", "Frenos", "Latonería", "Mecánica", "Pintura"],
+        )
+
+        res = self.client.get("/api/v1/measurement-units/?sort=-unit,-dimension")
+        self.assertEqual(
+            [(u["unit"], u["dimension"]) for u in res.json],
+            [("l", 1), ("kg", 2), ("kg", 1)],
+        )
+
+    def test_pagination(self):
+        """Testea que las páginas cubren todas las filas sin repetirlas."""
+        self._login_admin()
+
+        pages = self._pages("/api/v1/departments?limit=2&sort=-description")
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(
+            [d["description"] for page in pages for d in page],
+            ["Pintura", "Mecánica", "Latonería", "Frenos", "Eléctrica"],
+        )
+
+        # Los parámetros se conservan en el enlace a la página siguiente
+        res = self.client.get("/api/v1/departments?limit=2&fields=id")
+        query = parse_qs(urlparse(res.headers["Link"][1:-13]).query)
+        self.assertEqual(query["fields"], ["id"])
+        self.assertEqual(query["limit"], ["2"])
+
+    def test_pagination_with_ties(self):
+        """Testea la paginación ordenando por un campo con valores repetidos."""
+        self._login_admin()
+
+        pages = self._pages("/api/v1/measurement-units/?limit=1&sort=unit")
+        self.assertEqual([u["id"] for page in pages for u in page], [1, 2, 3])
+
+    def test_pagination_nested_response(self):
+        """Testea la paginación de endpoints que retornan otros datos."""
+        self._login_admin()
+
+        res = self.client.get("/api/v1/users?limit=1&fields=username")
+        self.assertEqual(res.json["users"], [{"username": "admin"}])
+        self.assertNotIn("Link", res.headers)
+
+    def test_invalid_parameters(self):
+        """Testea que los parámetros inválidos retornan un error."""
+        self._login_admin()
+
+        for query in ["fields=password", "sort=password", "limit=a", "cursor=abc"]:
+            res = self.client.get(f"/api/v1/users?{query}")
+            self.assertEqual(res.status_code, 400, query)
+            self.assertIn("error", res.json)
+
+    def test_etag(self):
+        """Testea que una respuesta sin cambios se revalida con 304."""
+        self._login_admin()
+
+        res = self.client.get("/api/v1/departments")
+        etag = res.headers["ETag"]
+        self.assertEqual(res.headers["Cache-Control"], "private, no-cache")
+
+        # Sin cambios no se consulta la tabla de departamentos ni el usuario
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            if "FROM department" in statement or "FROM user" in statement:
+                statements.append(statement)
+
+        with self._listen_queries(capture):
+            res = self.client.get(
+                "/api/v1/departments", headers={"If-None-Match": etag}
+            )
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers["ETag"], etag)
+        self.assertEqual(statements, [])
+
+        # Los parámetros forman parte del ETag
+        res = self.client.get("/api/v1/departments?fields=id")
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_etag_changes_on_write(self):
+        """Testea que el ETag cambia al modificar la tabla con los helpers."""
+        self._login_admin()
+        etag = self.client.get("/api/v1/departments").headers["ETag"]
+
+        self.client.post(
+            "/workshop-departments/register/", data={"description": "Carrocería"}
+        )
+
+        res = self.client.get("/api/v1/departments", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+        self.assertIn("Carrocería", [d["description"] for d in res.json])
+
+        # Las demás tablas conservan su versión
+        self.assertEqual(
+            versions.get_versions(Department, MeasureUnit),
+            {"department": 1, "measure_unit": 0},
+        )
+
+    def test_etag_changes_on_new_database(self):
+        """Testea que los ETags de una base de datos recreada no coinciden."""
+        self._login_admin()
+        etag = self.client.get("/api/v1/departments").headers["ETag"]
+
+        # Recrea la base de datos con los mismos datos y versiones
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        self.populate_db()
+        self._login_admin()
+
+        res = self.client.get("/api/v1/departments", headers={"If-None-Match": etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.headers["ETag"], etag)
+
+    def test_streaming(self):
+        """Testea que los recursos sin paginar se transmiten por lotes."""
+        self._login_admin()
+
+        res = self.client.get("/api/v1/departments?sort=-id&fields=id")
+        self.assertNotIn("Content-Length", res.headers)
+        self.assertEqual(res.json, [{"id": i} for i in range(5, 0, -1)])
+        self.assertIn("ETag", res.headers)
+
+        # Con límite se pagina sin transmitir por partes
+        res = self.client.get("/api/v1/departments?limit=10")
+        self.assertIn("Content-Length", res.headers)
+        self.assertEqual(len(res.json), 5)
+
+        # Los parámetros se validan antes de comenzar a transmitir
+        res = self.client.get("/api/v1/departments?fields=password")
+        self.assertEqual(res.status_code, 400)
+
+    def test_stream_json(self):
+        """Testea el arreglo JSON producido por partes."""
+        items = [{"id": i, "description": "Mecánica"} for i in range(5)]
+        for batch_size in [1, 2, 5, 10]:
+            chunks = list(resources.stream_json(iter(items), batch_size))
+            self.assertEqual(json.loads("".join(chunks)), items)
+        self.assertEqual("".join(resources.stream_json([])), "[]")
+
+    def test_serializer(self):
+        """Testea las funciones compiladas que convierten filas en diccionarios."""
+        resource = resources.Resource(
+            Department,
+            {"id": Department.id, "description": Department.description},
+            {"description": str.upper},
+        )
+        serialize = resource.serializer(["description", "id"])
+        self.assertIs(resource.serializer(("description", "id")), serialize)
+        self.assertEqual(serialize(("a", 1)), {"description": "A", "id": 1})
+        self.assertEqual(serialize((None, 2)), {"description": None, "id": 2})
+
+        self.assertEqual(resources.format_date(date(999, 1, 2)), "0999-01-02")
+        self.assertEqual(
+            resources.format_date(datetime(2023, 4, 1, 12, 30)), "2023-04-01"
+        )
+
+    def test_batch(self):
+        """Testea que el endpoint batch ejecuta y combina las sub-requests."""
+        self._login_admin()
+
+        res = self.client.post(
+            "/api/v1/batch",
+            json={
+                "requests": [
+                    {"path": "/api/v1/departments?limit=2", "params": {"sort": "id"}},
+                    {"path": "/api/v1/measurement-units/", "params": {"fields": "id"}},
+                    {"path": "/api/v1/projects"},
+                    {"path": "/api/v1/inexistente"},
+                ]
+            },
+        )
+        self.assertEqual(res.status_code, 200)
+        departments, units, projects, missing = res.json["responses"]
+
+        self.assertEqual(departments["status"], 200)
+        self.assertEqual([d["id"] for d in departments["body"]], [1, 2])
+        self.assertIn("cursor=", departments["headers"]["Link"])
+        self.assertEqual(
+            departments["headers"]["ETag"],
+            self.client.get("/api/v1/departments?limit=2&sort=id").headers["ETag"],
+        )
+        self.assertEqual(units["body"], [{"id": 1}, {"id": 2}, {"id": 3}])
+
+        # Cada sub-request verifica los roles de su ruta
+        self.assertEqual(projects["status"], 403)
+        self.assertIsNone(projects["body"])
+        self.assertEqual(missing["status"], 404)
+
+    def test_batch_invalid(self):
+        """Testea que los cuerpos inválidos del endpoint batch retornan un error."""
+        self._login_admin()
+
+        for data in [
+            None,
+            {"requests": []},
+            {"requests": [{"path": "/user-profiles/"}]},
+            {"requests": [{"path": "/api/v1/batch"}]},
+            {"requests": [{"path": "/api/v1/events/stream"}]},
+            {"requests": [{"path": "/api/v1/users", "params": "a"}]},
+            {"requests": [{"path": "/api/v1/users"}] * 21},
+        ]:
+            res = self.client.post("/api/v1/batch", json=data)
+            self.assertEqual(res.status_code, 400, data)
+            self.assertIn("error", res.json)
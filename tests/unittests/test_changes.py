@@ -0,0 +1,150 @@
+from sqlalchemy.orm import Session
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import Change, Department, db
+
+
+class TestChanges(BaseTestClass):
+    def populate_db(self):
+        super().populate_db()
+
+        # Añade departamentos
+        for description in ["Mecánica", "Pintura"]:
+            db.session.add(Department(description))
+        db.session.commit()
+
+    def _changes(self, since, **params) -> dict:
+        res = self.client.get(
+            "/api/v1/changes", query_string={"since": since, **params}
+        )
+        self.assertEqual(res.status_code, 200)
+        return res.json
+
+    def test_changes(self):
+        """Testea que se retornan solo los cambios posteriores al token."""
+        self._login_admin()
+        token = self.client.get("/api/v1/changes").json["token"]
+
+        self.client.post(
+            "/workshop-departments/register/", data={"description": "Frenos"}
+        )
+        self.client.post(
+            "/workshop-departments/1/edit/", data={"description": "Electricidad"}
+        )
+        self.client.post("/workshop-departments/2/delete/")
+
+        res = self._changes(token)
+        self.assertEqual(
+            res["changes"],
+            [
+                {
+                    "table": "department",
+                    "id": 3,
+                    "operation": "insert",
+                    "row": {"id": 3, "description": "Frenos"},
+                },
+                {
+                    "table": "department",
+                    "id": 1,
+                    "operation": "update",
+                    "row": {"id": 1, "description": "Electricidad"},
+                },
+                {"table": "department", "id": 2, "operation": "delete", "row": None},
+            ],
+        )
+        self.assertFalse(res["more"])
+
+        # Desde el nuevo token no hay cambios
+        self.assertEqual(self._changes(res["token"])["changes"], [])
+
+    def test_changes_coalesced(self):
+        """Testea que solo se retorna el último cambio de cada fila."""
+        self._login_admin()
+        token = self.client.get("/api/v1/changes").json["token"]
+
+        for description in ["Electricidad", "Latonería"]:
+            self.client.post(
+                "/workshop-departments/1/edit/", data={"description": description}
+            )
+        self.client.post(
+            "/workshop-departments/register/", data={"description": "Frenos"}
+        )
+        self.client.post("/workshop-departments/3/delete/")
+
+        res = self._changes(token)
+        self.assertEqual(
+            [(c["id"], c["operation"], c["row"]) for c in res["changes"]],
+            [(1, "update", {"id": 1, "description": "Latonería"}), (3, "delete", None)],
+        )
+
+    def test_changes_pagination(self):
+        """Testea la lectura de los cambios por partes."""
+        self._login_admin()
+        token = self.client.get("/api/v1/changes").json["token"]
+
+        for description in ["Frenos", "Latonería", "Electricidad"]:
+            self.client.post(
+                "/workshop-departments/register/", data={"description": description}
+            )
+
+        seen = []
+        more = True
+        while more:
+            res = self._changes(token, limit=2)
+            seen += [c["row"]["description"] for c in res["changes"]]
+            token, more = res["token"], res["more"]
+
+        self.assertEqual(seen, ["Frenos", "Latonería", "Electricidad"])
+
+    def test_changes_by_role(self):
+        """Testea que solo se retornan las tablas visibles para el rol."""
+        self._login_admin()
+        token = self.client.get("/api/v1/changes").json["token"]
+
+        # Cambios de una tabla no visible para el Administrador
+        db.session.add(Change(table_name="client", row_id=1, operation="insert"))
+        db.session.commit()
+
+        self.assertEqual(self._changes(token)["changes"], [])
+
+        for params in [
+            {"since": "a"},
+            {"since": "-1"},
+            {"since": "0", "tables": "client"},
+        ]:
+            res = self.client.get("/api/v1/changes", query_string=params)
+            self.assertEqual(res.status_code, 400, params)
+
+    def test_prune_changes(self):
+        """Testea que los cambios viejos se eliminan y sus tokens expiran."""
+        self._login_admin()
+        token = self.client.get("/api/v1/changes").json["token"]
+
+        for description in ["Frenos", "Latonería"]:
+            self.client.post(
+                "/workshop-departments/register/", data={"description": description}
+            )
+        latest = self.client.get("/api/v1/changes").json["token"]
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["prune-changes", "--older-than", "0"])
+        self.assertIn(f"{latest - 1} cambios eliminados", result.output)
+
+        # El último cambio se conserva, así que el token actual sigue válido
+        self.assertEqual(self._changes(latest)["changes"], [])
+
+        res = self.client.get("/api/v1/changes", query_string={"since": token})
+        self.assertEqual(res.status_code, 410)
+        self.assertEqual(res.json["token"], latest)
+
+    def test_other_sessions_not_recorded(self):
+        """Testea que solo se registran los cambios de la sesión de la aplicación."""
+        count = db.select(db.func.count()).select_from(Change)
+        before = db.session.execute(count).scalar()
+
+        with Session(db.engine) as other:
+            other.add(Department("Frenos"))
+            other.commit()
+
+        self.assertEqual(db.session.execute(count).scalar(), before)
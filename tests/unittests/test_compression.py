@@ -0,0 +1,153 @@
+import gzip
+import unittest
+
+from flask import url_for
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import Department, db
+from SAGTMA.utils import compression
+
+
+class TestCompression(BaseTestClass):
+    def populate_db(self):
+        super().populate_db()
+
+        # Añade suficientes departamentos para superar el tamaño mínimo
+        for i in range(50):
+            db.session.add(Department(f"Departamento {i}"))
+        db.session.commit()
+
+    def test_compress_json(self):
+        """Testea la compresión gzip de las respuestas JSON."""
+        self._login_admin()
+        plain = self.client.get("/api/v1/departments?limit=100")
+
+        res = self.client.get(
+            "/api/v1/departments?limit=100", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", res.headers["Vary"])
+        self.assertEqual(gzip.decompress(res.data), plain.data)
+        self.assertLess(len(res.data), len(plain.data))
+
+        # Sin Accept-Encoding no se comprime
+        self.assertNotIn("Content-Encoding", plain.headers)
+
+        # El ETag de la respuesta comprimida es débil, y sirve para revalidarla
+        self.assertTrue(res.headers["ETag"].startswith("W/"))
+        res = self.client.get(
+            "/api/v1/departments?limit=100",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["ETag"]},
+        )
+        self.assertEqual(res.status_code, 304)
+
+    def test_compress_stream(self):
+        """Testea la compresión de las respuestas transmitidas por partes."""
+        self._login_admin()
+        plain = self.client.get("/api/v1/departments")
+
+        res = self.client.get(
+            "/api/v1/departments", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(res.data), plain.data)
+
+    @unittest.skipUnless(compression.brotli, "brotli no está instalado")
+    def test_compress_brotli(self):
+        """Testea la compresión Brotli, preferida sobre gzip."""
+        brotli = compression.brotli
+        self._login_admin()
+        plain = self.client.get("/api/v1/departments?limit=100")
+
+        res = self.client.get(
+            "/api/v1/departments?limit=100", headers={"Accept-Encoding": "gzip, br"}
+        )
+        self.assertEqual(res.headers["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(res.data), plain.data)
+
+        # Respuesta transmitida por partes
+        plain = self.client.get("/api/v1/departments")
+        res = self.client.get("/api/v1/departments", headers={"Accept-Encoding": "br"})
+        self.assertEqual(res.headers["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(res.data), plain.data)
+
+        # Archivo estático precomprimido
+        with self.app.test_request_context():
+            url = url_for("static", filename="css/bootstrap.min.css")
+        with open(f"{self.app.static_folder}/css/bootstrap.min.css", "rb") as f:
+            data = f.read()
+
+        res = self.client.get(url, headers={"Accept-Encoding": "br;q=1, gzip;q=0.5"})
+        self.assertEqual(res.headers["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(res.data), data)
+        res.close()
+
+    def test_min_size(self):
+        """Testea que las respuestas pequeñas no se comprimen."""
+        self._login_admin()
+
+        res = self.client.get(
+            "/api/v1/departments?limit=1", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertLess(len(res.data), self.app.config["COMPRESS_MIN_SIZE"])
+        self.assertNotIn("Content-Encoding", res.headers)
+
+    def test_unsupported_encoding(self):
+        """Testea que no se comprime si el cliente no acepta las codificaciones."""
+        self._login_admin()
+
+        res = self.client.get(
+            "/api/v1/departments?limit=100", headers={"Accept-Encoding": "deflate"}
+        )
+        self.assertNotIn("Content-Encoding", res.headers)
+        res = self.client.get(
+            "/api/v1/departments?limit=100", headers={"Accept-Encoding": "gzip;q=0"}
+        )
+        self.assertNotIn("Content-Encoding", res.headers)
+
+    def test_static_precompressed(self):
+        """Testea los archivos estáticos precomprimidos y su caché."""
+        with self.app.test_request_context():
+            url = url_for("static", filename="css/bootstrap.min.css")
+
+        static_file = self.app.extensions["static_files"]["css/bootstrap.min.css"]
+        self.assertTrue(url.endswith(f"?v={static_file.version}"))
+
+        with open(f"{self.app.static_folder}/css/bootstrap.min.css", "rb") as f:
+            data = f.read()
+
+        res = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(res.headers["Content-Encoding"], "gzip")
+        self.assertEqual(res.mimetype, "text/css")
+        self.assertEqual(gzip.decompress(res.data), data)
+        self.assertIn("immutable", res.headers["Cache-Control"])
+
+        # Revalidación con el ETag
+        res = self.client.get(
+            url,
+            headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["ETag"]},
+        )
+        self.assertEqual(res.status_code, 304)
+
+        # Sin Accept-Encoding se sirve el archivo original
+        res = self.client.get(url)
+        self.assertNotIn("Content-Encoding", res.headers)
+        self.assertEqual(res.data, data)
+        res.close()
+
+        # Sin la versión actual no se guarda en caché por mucho tiempo
+        res = self.client.get("/static/css/bootstrap.min.css?v=vieja")
+        self.assertNotIn("immutable", res.headers.get("Cache-Control", ""))
+        res.close()
+
+    def test_compress_helper(self):
+        """Testea la compresión con cada codificación soportada."""
+        data = b"SAGTMA " * 100
+        for encoding in compression.encodings():
+            compressed = compression.compress(data, encoding, 6, 4)
+            self.assertLess(len(compressed), len(data))
+            if encoding == "gzip":
+                self.assertEqual(gzip.decompress(compressed), data)
+            else:
+                self.assertEqual(compression.brotli.decompress(compressed), data)
@@ -0,0 +1,116 @@
+import sqlite3
+
+from sqlalchemy.exc import OperationalError
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import READ_ONLY_BIND, Department, db
+from SAGTMA.utils import database
+
+
+class TestDatabase(BaseTestClass):
+    def _pragma(self, name: str):
+        return db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+
+    def test_pragmas_applied(self):
+        """Testea que cada conexión usa los pragmas del perfil de producción."""
+        self.assertEqual(self.app.config["DATABASE_PROFILE"], "production")
+        self.assertEqual(self._pragma("journal_mode"), "wal")
+        self.assertEqual(self._pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(self._pragma("busy_timeout"), 5000)
+        self.assertEqual(self._pragma("cache_size"), -64000)
+        self.assertEqual(self._pragma("mmap_size"), 256 * 1024 * 1024)
+        self.assertEqual(self._pragma("foreign_keys"), 1)
+
+    def test_get_pragmas(self):
+        """Testea la combinación de los pragmas del perfil y de la configuración."""
+        self.assertEqual(database.get_pragmas("default", {}), {})
+
+        pragmas = database.get_pragmas(
+            "production", {"busy_timeout": 100, "foreign_keys": None}
+        )
+        self.assertEqual(pragmas["busy_timeout"], 100)
+        self.assertEqual(pragmas["journal_mode"], "WAL")
+        self.assertNotIn("foreign_keys", pragmas)
+
+        with self.assertRaises(database.DatabaseError):
+            database.get_pragmas("inexistente", {})
+
+    def test_apply_pragmas(self):
+        """Testea la aplicación de los pragmas a una conexión de sqlite3."""
+        connection = sqlite3.connect(":memory:")
+        try:
+            database.apply_pragmas(
+                connection, {"foreign_keys": "ON", "cache_size": -1000}
+            )
+            self.assertEqual(connection.execute("PRAGMA foreign_keys").fetchone(), (1,))
+            self.assertEqual(
+                connection.execute("PRAGMA cache_size").fetchone(), (-1000,)
+            )
+        finally:
+            connection.close()
+
+    def _engines(self, f) -> set:
+        """Retorna los nombres de los motores usados por las consultas de f."""
+        names = {engine: key or "read_write" for key, engine in db.engines.items()}
+        used = set()
+
+        def capture(conn, cursor, statement, *args):
+            used.add(names[conn.engine])
+
+        with self._listen_queries(capture):
+            f()
+        return used
+
+    def test_read_only_engine(self):
+        """Testea que el motor de solo lectura no permite escribir."""
+        with db.engines[READ_ONLY_BIND].connect() as connection:
+            self.assertEqual(
+                connection.exec_driver_sql("PRAGMA query_only").scalar(), 1
+            )
+            with self.assertRaises(OperationalError):
+                connection.exec_driver_sql(
+                    "INSERT INTO department (description) VALUES ('Pintura')"
+                )
+
+    def test_routing(self):
+        """Testea que las requests GET leen del motor de solo lectura."""
+        self._login_admin()
+
+        self.assertEqual(
+            self._engines(lambda: self.client.get("/api/v1/departments?limit=10")),
+            {READ_ONLY_BIND},
+        )
+        self.assertEqual(
+            self._engines(
+                lambda: self.client.post(
+                    "/workshop-departments/register/", data={"description": "Frenos"}
+                )
+            ),
+            {"read_write"},
+        )
+
+        res = self.client.get("/api/v1/departments?limit=10")
+        self.assertEqual([d["description"] for d in res.json], ["Frenos"])
+
+    def test_write_in_read_request(self):
+        """Testea que tras escribir en una request GET se lee lo escrito."""
+        stmt = db.select(Department.description)
+        with self.app.test_request_context():
+            self.assertEqual(
+                self._engines(lambda: db.session.execute(stmt).all()),
+                {READ_ONLY_BIND},
+            )
+
+            db.session.add(Department("Pintura"))
+            used = self._engines(
+                lambda: self.assertEqual(db.session.execute(stmt).all(), [("Pintura",)])
+            )
+            self.assertEqual(used, {"read_write"})
+
+            # Al terminar la transacción se vuelve a leer del de solo lectura
+            db.session.rollback()
+            self.assertEqual(
+                self._engines(lambda: db.session.execute(stmt).all()),
+                {READ_ONLY_BIND},
+            )
@@ -0,0 +1,242 @@
+import datetime
+import json
+import os
+import re
+import tempfile
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import Event, User, db
+from SAGTMA.utils import event_archive, event_modules
+
+
+class TestEventArchive(BaseTestClass):
+    def setUp(self):
+        super().setUp()
+
+        # Usa un directorio temporal para los segmentos
+        self.archive_dir = tempfile.TemporaryDirectory()
+        self.old_archive_dir = self.app.config["EVENT_ARCHIVE_DIR"]
+        self.app.config["EVENT_ARCHIVE_DIR"] = self.archive_dir.name
+
+        # Añade eventos de enero y febrero de 2023
+        for month, module in [(1, "Viejo"), (2, "Nuevo")]:
+            for day in range(1, 4):
+                event = Event(
+                    db.session.get(User, 1),
+                    event_modules.module_id(module),
+                    f"Evento {day}",
+                )
+                event.time = datetime.datetime(2023, month, day)
+                db.session.add(event)
+        db.session.commit()
+
+    def tearDown(self):
+        self.app.config["EVENT_ARCHIVE_DIR"] = self.old_archive_dir
+        self.archive_dir.cleanup()
+        super().tearDown()
+
+    def _count_events(self) -> int:
+        stmt = db.select(db.func.count()).select_from(Event)
+        return db.session.execute(stmt).scalar()
+
+    def test_archive_events(self):
+        """Testea que los eventos viejos se mueven a un segmento indexado."""
+        count = event_archive.archive_events(datetime.datetime(2023, 2, 1))
+
+        self.assertEqual(count, 3)
+        self.assertEqual(self._count_events(), 3)
+
+        (entry,) = event_archive.load_index()
+        self.assertEqual(entry["modules"], ["Viejo"])
+        self.assertEqual(entry["count"], 3)
+        self.assertEqual(entry["end"], datetime.datetime(2023, 1, 3))
+
+    def test_archive_events_keeps_unarchived_events(self):
+        """Testea que solo se eliminan los eventos escritos en el segmento."""
+        original = event_archive.json.dump
+
+        def dump_and_insert(*args, **kwargs):
+            # Un evento atrasado llega mientras se escribe el segmento
+            event = Event(
+                db.session.get(User, 1),
+                event_modules.module_id("Viejo"),
+                "Evento atrasado",
+            )
+            event.time = datetime.datetime(2023, 1, 2, 12)
+            db.session.add(event)
+            db.session.flush()
+            original(*args, **kwargs)
+
+        event_archive.json.dump = dump_and_insert
+        try:
+            count = event_archive.archive_events(datetime.datetime(2023, 2, 1))
+        finally:
+            event_archive.json.dump = original
+
+        self.assertEqual(count, 3)
+        self.assertEqual(self._count_events(), 4)
+
+    def test_archive_events_segment_names(self):
+        """Testea que un segmento nuevo no sobrescribe a los existentes."""
+        event_archive.archive_events(datetime.datetime(2023, 1, 2))
+        event_archive.archive_events(datetime.datetime(2023, 1, 3))
+
+        # Elimina el primer segmento
+        os.remove(os.path.join(self.archive_dir.name, "segment-000001.ndjson.gz"))
+        os.remove(os.path.join(self.archive_dir.name, "segment-000001.json"))
+
+        event_archive.archive_events(datetime.datetime(2023, 2, 1))
+        self.assertEqual(
+            sorted(entry["file"] for entry in event_archive.load_index()),
+            ["segment-000002.ndjson.gz", "segment-000003.ndjson.gz"],
+        )
+
+    def test_archive_events_failed_delete(self):
+        """Testea que no se publica el segmento si falla la eliminación."""
+        original = db.session.commit
+
+        def failing_commit():
+            raise RuntimeError("Error al confirmar")
+
+        db.session.commit = failing_commit
+        try:
+            with self.assertRaises(RuntimeError):
+                event_archive.archive_events(datetime.datetime(2023, 2, 1))
+        finally:
+            db.session.commit = original
+
+        self.assertEqual(event_archive.load_index(), [])
+        self.assertEqual(os.listdir(self.archive_dir.name), [])
+        self.assertEqual(self._count_events(), 6)
+
+    def test_archive_events_nothing_to_archive(self):
+        """Testea que no se crean segmentos vacíos."""
+        self.assertEqual(event_archive.archive_events(datetime.datetime(2022, 1, 1)), 0)
+        self.assertEqual(event_archive.load_index(), [])
+
+    def test_search_archive(self):
+        """Testea la búsqueda en los segmentos archivados."""
+        event_archive.archive_events(datetime.datetime(2023, 2, 1))
+
+        found = event_archive.search_archive("evento 2")
+        self.assertEqual([e["description"] for e in found], ["Evento 2"])
+
+        found = event_archive.search_archive(
+            start=datetime.datetime(2023, 1, 2), end=datetime.datetime(2023, 1, 3)
+        )
+        self.assertEqual([e["time"].day for e in found], [2])
+
+        self.assertFalse(event_archive.needs_archive(datetime.datetime(2023, 2, 1)))
+        self.assertTrue(event_archive.needs_archive(datetime.datetime(2023, 1, 1)))
+
+    def test_search_archive_word_prefix(self):
+        """Testea que el archivo se busca por prefijos de palabras, como el log."""
+        event_archive.archive_events(datetime.datetime(2023, 2, 1))
+
+        def _search(term: str) -> list:
+            return sorted(e["time"].day for e in event_archive.search_archive(term))
+
+        self.assertEqual(_search("EVENTO"), [1, 2, 3])
+        self.assertEqual(_search("viej 3"), [3])
+        self.assertEqual(_search("víejo"), [1, 2, 3])
+        self.assertEqual(_search("admin evento 1"), [1])
+
+        # Las subcadenas que no comienzan una palabra no coinciden
+        self.assertEqual(_search("vento"), [])
+        self.assertEqual(_search("evento 4"), [])
+
+    def test_needs_archive_cached(self):
+        """Testea que los índices se leen solo cuando cambian los segmentos."""
+        calls = []
+        original = event_archive.load_index
+
+        def counting_load_index():
+            calls.append(1)
+            return original()
+
+        event_archive.load_index = counting_load_index
+        try:
+            self.assertFalse(event_archive.needs_archive(None))
+            event_archive.archive_events(datetime.datetime(2023, 2, 1))
+            for _ in range(3):
+                self.assertTrue(event_archive.needs_archive(None))
+        finally:
+            event_archive.load_index = original
+
+        self.assertEqual(len(calls), 2)
+
+    def test_search_archive_before(self):
+        """Testea que la búsqueda continúa a partir de una posición."""
+        event_archive.archive_events(datetime.datetime(2023, 2, 1))
+
+        first = event_archive.search_archive(limit=2)
+        self.assertEqual([e["time"].day for e in first], [3, 2])
+
+        last = first[-1]
+        rest = event_archive.search_archive(before=(last["time"], last["id"]))
+        self.assertEqual([e["time"].day for e in rest], [1])
+
+    def test_archive_events_command(self):
+        """Testea el comando archive-events."""
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["archive-events", "--older-than", "0"])
+
+        self.assertIn("6 eventos archivados", result.output)
+        self.assertEqual(self._count_events(), 0)
+
+    def test_logger_shows_archived_events(self):
+        """Testea que el logger busca en los eventos archivados."""
+        event_archive.archive_events(datetime.datetime(2023, 2, 1))
+        self._login_admin()
+
+        res = self.client.get("/event-logger/?start=2023-01-01&end=2023-01-31")
+        self.assertIn(b"Eventos archivados", res.data)
+
+        res = self.client.get("/event-logger/?start=2023-02-01")
+        self.assertNotIn(b"Eventos archivados", res.data)
+
+    def test_logger_archived_events_cursor(self):
+        """Testea que el logger pagina los eventos archivados."""
+        event_archive.archive_events(datetime.datetime(2023, 2, 1))
+        self._login_admin()
+
+        old_page_size = self.app.config["EVENT_LOGGER_PAGE_SIZE"]
+        self.app.config["EVENT_LOGGER_PAGE_SIZE"] = 2
+        try:
+            res = self.client.get("/event-logger/?start=2023-01-01&end=2023-01-31")
+            self.assertIn(b"Evento 3", res.data)
+            self.assertNotIn(b"Evento 1", res.data)
+
+            match = re.search(rb"archive_cursor=([\w%-]+)", res.data)
+            self.assertIsNotNone(match)
+            archive_cursor = match.group(1).decode()
+
+            res = self.client.get(
+                "/event-logger/?start=2023-01-01&end=2023-01-31"
+                f"&archive_cursor={archive_cursor}"
+            )
+            self.assertIn(b"Evento 1", res.data)
+            self.assertNotIn(b"Evento 3", res.data)
+            self.assertNotIn(b"archive_cursor=", res.data)
+        finally:
+            self.app.config["EVENT_LOGGER_PAGE_SIZE"] = old_page_size
+
+    def test_export_includes_archived_events(self):
+        """Testea que la exportación incluye los eventos archivados."""
+        event_archive.archive_events(datetime.datetime(2023, 2, 1))
+        self._login_admin()
+
+        res = self.client.get(
+            "/event-logger/export/ndjson/?start=2023-01-02&end=2023-02-02"
+        )
+        rows = [json.loads(line) for line in res.data.decode().splitlines()]
+        self.assertEqual(
+            [(row["module"], row["description"]) for row in rows],
+            [
+                ("Viejo", "Evento 2"),
+                ("Viejo", "Evento 3"),
+                ("Nuevo", "Evento 1"),
+                ("Nuevo", "Evento 2"),
+            ],
+        )
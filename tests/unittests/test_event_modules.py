@@ -0,0 +1,106 @@
+import datetime
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.migrations import migrate_event_modules
+from SAGTMA.models import Event, EventModule, db
+from SAGTMA.utils import event_modules
+
+
+class TestEventModules(BaseTestClass):
+    def test_module_id_is_cached(self):
+        """Testea que los ids de los módulos conocidos no se consultan de nuevo."""
+        _id = event_modules.module_id("Pruebas")
+        db.session.commit()
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self._listen_queries(count_statements):
+            self.assertEqual(event_modules.module_id("Pruebas"), _id)
+            self.assertEqual(event_modules.find_module_id("Pruebas"), _id)
+
+        self.assertEqual(statements, [])
+
+    def test_module_id_rollback(self):
+        """Testea que los módulos de una transacción deshecha no quedan en caché."""
+        event_modules.module_id("Pruebas")
+        db.session.rollback()
+
+        self.assertIsNone(event_modules.find_module_id("Pruebas"))
+
+    def test_events_share_modules(self):
+        """Testea que cada módulo se guarda una sola vez."""
+        self._login_admin()
+        for term in ["a", "b", "c"]:
+            self.client.post("/measurement-units/", data={"uom-filter": term})
+
+        stmt = db.select(EventModule.name).join(Event)
+        self.assertEqual(
+            db.session.execute(stmt).scalars().all(), ["Unidades de Medida"] * 3
+        )
+
+    def test_api_events_module_filter(self):
+        """Testea el filtro por módulo del endpoint de eventos."""
+        self._login_admin()
+        self.client.post("/measurement-units/", data={"uom-filter": "a"})
+        self.client.post("/workshop-departments/", data={"dept-filter": "a"})
+
+        res = self.client.get("/api/v1/events?module=Unidades de Medida").json
+        self.assertEqual([e["module"] for e in res["events"]], ["Unidades de Medida"])
+
+        res = self.client.get("/api/v1/events?module=Inexistente").json
+        self.assertEqual(res["events"], [])
+
+    def test_migrate_event_modules(self):
+        """Testea la migración de eventos con el módulo como texto."""
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.sqlite')}")
+            with engine.begin() as connection:
+                connection.exec_driver_sql(
+                    "CREATE TABLE event (id INTEGER PRIMARY KEY, user_id INTEGER, "
+                    "module VARCHAR(80), description VARCHAR(80), time DATETIME)"
+                )
+                connection.exec_driver_sql(
+                    "CREATE TABLE event_rollup (module VARCHAR(80), user_id INTEGER, "
+                    "hour DATETIME, count INTEGER)"
+                )
+                for i, module in enumerate(["Viejo", "Nuevo", "Viejo"], start=1):
+                    connection.exec_driver_sql(
+                        "INSERT INTO event VALUES (?, 1, ?, 'Evento', ?)",
+                        (i, module, datetime.datetime(2023, 1, i).isoformat(" ")),
+                    )
+
+                db.metadata.create_all(connection)
+                connection.exec_driver_sql(
+                    "INSERT INTO role (id, name) VALUES (1, 'Administrador')"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO user (id, role_id, id_number, username, names, "
+                    "surnames, password) VALUES (1, 1, 'V-1', 'admin', 'A', 'B', 'x')"
+                )
+
+                self.assertTrue(migrate_event_modules(connection))
+                self.assertFalse(migrate_event_modules(connection))
+
+                rows = connection.exec_driver_sql(
+                    "SELECT event.id, event_module.name, event.level, event.count "
+                    "FROM event JOIN event_module ON event_module.id = event.module_id "
+                    "ORDER BY event.id"
+                ).fetchall()
+                found = connection.exec_driver_sql(
+                    "SELECT rowid FROM event_fts WHERE event_fts MATCH 'viejo'"
+                ).fetchall()
+            engine.dispose()
+
+        self.assertEqual(
+            [tuple(r) for r in rows],
+            [(1, "Viejo", "info", 1), (2, "Nuevo", "info", 1), (3, "Viejo", "info", 1)],
+        )
+        self.assertEqual(sorted(r for r, in found), [1, 3])
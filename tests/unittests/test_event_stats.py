@@ -0,0 +1,168 @@
+import datetime
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import Event, EventModule, EventRollup, db
+from SAGTMA.utils import event_stats
+from SAGTMA.utils.event_writer import EventWriter, write_events
+
+
+class TestEventStats(BaseTestClass):
+    def _rollups(self) -> list:
+        stmt = (
+            db.select(
+                EventModule.name,
+                EventRollup.user_id,
+                EventRollup.hour,
+                EventRollup.count,
+            )
+            .join(EventModule, EventRollup.module_id == EventModule.id)
+            .order_by(EventModule.name, EventRollup.hour)
+        )
+        return [tuple(r) for r in db.session.execute(stmt).fetchall()]
+
+    def test_add_event_updates_rollups(self):
+        """Testea que cada evento registrado se suma a los conteos."""
+        self._login_admin()
+
+        self.client.post("/workshop-departments/", data={"dept-filter": "a"})
+        self.client.post("/workshop-departments/", data={"dept-filter": "b"})
+
+        ((module, user_id, hour, count),) = self._rollups()
+        self.assertEqual(module, "Departamentos del Taller")
+        self.assertEqual(user_id, 1)
+        self.assertEqual(hour.minute, 0)
+        self.assertEqual(count, 2)
+
+    def test_writer_updates_rollups(self):
+        """Testea que el escritor en segundo plano actualiza los conteos por lote."""
+        time = datetime.datetime(2023, 1, 1, 10, 30)
+        writer = EventWriter(self.app, flush_interval=60, batch_size=100)
+        writer.start()
+        for minute in (0, 15, 75):
+            writer.put(
+                {
+                    "user_id": 1,
+                    "module": "Pruebas",
+                    "description": "Evento",
+                    "time": time + datetime.timedelta(minutes=minute),
+                }
+            )
+        writer.stop()
+
+        db.session.expire_all()
+        self.assertEqual(
+            self._rollups(),
+            [
+                ("Pruebas", 1, datetime.datetime(2023, 1, 1, 10), 2),
+                ("Pruebas", 1, datetime.datetime(2023, 1, 1, 11), 1),
+            ],
+        )
+
+    def test_rebuild_rollups(self):
+        """Testea que la reconstrucción coincide con los conteos incrementales."""
+        self._login_admin()
+        for term in ["a", "b", "c"]:
+            self.client.post("/measurement-units/", data={"uom-filter": term})
+        incremental = self._rollups()
+
+        db.session.execute(db.delete(EventRollup))
+        db.session.commit()
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["rebuild-event-rollups"])
+
+        self.assertIn("1 conteos de eventos generados", result.output)
+        self.assertEqual(self._rollups(), incremental)
+
+    def _assert_rollups_match_rebuild(self):
+        incremental = self._rollups()
+        event_stats.rebuild_rollups()
+        self.assertEqual(self._rollups(), incremental)
+
+    def test_delete_event_updates_rollups(self):
+        """Testea que al eliminar un evento se resta de los conteos."""
+        self._login_admin()
+        for term in ["a", "b"]:
+            self.client.post("/measurement-units/", data={"uom-filter": term})
+
+        stmt = db.select(Event.id).order_by(Event.id)
+        event_id = db.session.execute(stmt).scalars().first()
+        self.client.post(f"/event-logger/delete/{event_id}/")
+
+        self._assert_rollups_match_rebuild()
+
+    def test_delete_user_updates_rollups(self):
+        """Testea que los eventos de un usuario eliminado se restan de los conteos."""
+        self._login_admin()
+        self.client.post(
+            "/user-profiles/register/",
+            data={
+                "id-number": "V-12451845",
+                "username": "usuario",
+                "names": "Test",
+                "surnames": "User",
+                "password": "Test123.",
+                "confirm-password": "Test123.",
+                "role": "3",
+            },
+        )
+        write_events(
+            [
+                {
+                    "user_id": 2,
+                    "module": "Pruebas",
+                    "description": "Evento",
+                    "time": datetime.datetime(2023, 1, 1, 10),
+                }
+            ]
+        )
+        db.session.commit()
+
+        self.client.post("/user-profiles/2/delete/")
+
+        self.assertNotIn(2, [user_id for _, user_id, _, _ in self._rollups()])
+        self._assert_rollups_match_rebuild()
+
+    def test_api_event_stats(self):
+        """Testea el endpoint de estadísticas de eventos."""
+        self._login_admin()
+        self.client.post("/workshop-departments/", data={"dept-filter": "a"})
+        self.client.post("/measurement-units/", data={"uom-filter": "a"})
+        self.client.post("/measurement-units/", data={"uom-filter": "b"})
+
+        res = self.client.get("/api/v1/event-stats?group=module").json
+        self.assertEqual(
+            res["stats"],
+            [
+                {"module": "Unidades de Medida", "count": 2},
+                {"module": "Departamentos del Taller", "count": 1},
+            ],
+        )
+
+        res = self.client.get("/api/v1/event-stats?group=user,day").json
+        today = datetime.date.today().isoformat()
+        self.assertEqual(res["stats"], [{"user": "admin", "day": today, "count": 3}])
+
+    def test_api_event_stats_invalid_group(self):
+        """Testea que un campo de agrupación inválido retorna un error."""
+        self._login_admin()
+
+        res = self.client.get("/api/v1/event-stats?group=description")
+        self.assertEqual(res.status_code, 400)
+
+    def test_get_stats_invalid_group(self):
+        """Testea que get_stats no acepta campos de agrupación inválidos."""
+        with self.assertRaises(event_stats.EventStatsError):
+            event_stats.get_stats(["description"])
+
+    def test_deduplicated_events_count_in_rollups(self):
+        """Testea que los eventos agrupados suman todas sus repeticiones."""
+        self._login_admin()
+        for _ in range(3):
+            self.client.post("/measurement-units/", data={"uom-filter": "a"})
+        incremental = self._rollups()
+        self.assertEqual(incremental[0][3], 3)
+
+        event_stats.rebuild_rollups()
+        self.assertEqual(self._rollups(), incremental)
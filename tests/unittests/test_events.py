@@ -0,0 +1,372 @@
+import datetime
+import json
+
+from flask import session
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import Event, User, db
+from SAGTMA.utils import events
+from SAGTMA.utils.event_writer import EventWriter, write_events
+
+
+class TestEvents(BaseTestClass):
+    def _event_row(self, description: str) -> dict:
+        return {
+            "user_id": 1,
+            "module": "Pruebas",
+            "description": description,
+            "time": datetime.datetime.now(),
+        }
+
+    def _count_events(self) -> int:
+        stmt = db.select(db.func.count()).select_from(Event)
+        return db.session.execute(stmt).scalar()
+
+    def test_sync_writer(self):
+        """Testea que sin escritor en segundo plano los eventos se escriben de inmediato."""
+        self._login_admin()
+
+        self.client.post("/event-logger/", data={"event-filter": "admin"})
+
+        self.assertNotIn("event_writer", self.app.extensions)
+        self._test_logger_works()
+
+    def test_background_writer_flushes_on_stop(self):
+        """Testea que el escritor en segundo plano escribe los eventos encolados."""
+        writer = EventWriter(self.app, flush_interval=60, batch_size=3)
+        writer.start()
+
+        for i in range(7):
+            writer.put(self._event_row(f"Evento {i}"))
+        writer.stop()
+
+        db.session.expire_all()
+        self.assertEqual(self._count_events(), 7)
+
+    def test_background_writer_flush_interval(self):
+        """Testea que el escritor en segundo plano escribe tras el intervalo."""
+        writer = EventWriter(self.app, flush_interval=0.05, batch_size=100)
+        writer.start()
+
+        writer.put(self._event_row("Evento"))
+        writer._stopped.wait(0.5)
+
+        db.session.expire_all()
+        self.assertEqual(self._count_events(), 1)
+        writer.stop()
+
+    def test_background_writer_skips_failed_rows(self):
+        """Testea que un evento inválido no descarta el resto de su lote."""
+        writer = EventWriter(self.app, flush_interval=0.05, batch_size=100)
+
+        # Evento de un usuario que no existe, entre dos eventos válidos
+        writer.put(self._event_row("Evento 1"))
+        writer.put({**self._event_row("Evento perdido"), "user_id": 999})
+        writer.put(self._event_row("Evento 2"))
+
+        with self.assertLogs(self.app.logger, level="ERROR") as logs:
+            writer.start()
+            writer._stopped.wait(0.5)
+
+        self.assertTrue(writer._thread.is_alive())
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("Evento perdido", logs.output[0])
+
+        # El escritor sigue escribiendo eventos
+        writer.put(self._event_row("Evento 3"))
+        writer.stop()
+
+        db.session.expire_all()
+        stmt = db.select(Event.description).order_by(Event.id)
+        self.assertEqual(
+            db.session.execute(stmt).scalars().all(),
+            ["Evento 1", "Evento 2", "Evento 3"],
+        )
+
+    def _add_events(self, amount: int):
+        start = datetime.datetime(2023, 1, 1)
+        for i in range(amount):
+            row = self._event_row(f"Evento {i}")
+            row["time"] = start + datetime.timedelta(minutes=i)
+            write_events([row])
+        db.session.commit()
+
+    def test_paginate_events(self):
+        """Testea la paginación por cursor del logger en ambas direcciones."""
+        self._add_events(7)
+        stmt = events.search_events()
+
+        page, next_cursor, prev_cursor = events.paginate_events(stmt, None, "next", 3)
+        self.assertEqual(
+            [e.description for e in page], ["Evento 6", "Evento 5", "Evento 4"]
+        )
+        self.assertIsNone(prev_cursor)
+
+        page, next_cursor, prev_cursor = events.paginate_events(
+            stmt, next_cursor, "next", 3
+        )
+        self.assertEqual(
+            [e.description for e in page], ["Evento 3", "Evento 2", "Evento 1"]
+        )
+
+        page, next_cursor, _ = events.paginate_events(stmt, next_cursor, "next", 3)
+        self.assertEqual([e.description for e in page], ["Evento 0"])
+        self.assertIsNone(next_cursor)
+
+        page, _, prev_cursor = events.paginate_events(stmt, prev_cursor, "prev", 3)
+        self.assertEqual(
+            [e.description for e in page], ["Evento 6", "Evento 5", "Evento 4"]
+        )
+        self.assertIsNone(prev_cursor)
+
+    def test_paginate_events_invalid_cursor(self):
+        """Testea que un cursor inválido lanza una excepción."""
+        with self.assertRaises(events.EventError):
+            events.paginate_events(events.search_events(), "no-es-un-cursor", "next", 3)
+
+    def test_api_events(self):
+        """Testea la paginación de la API de eventos."""
+        self._add_events(5)
+        self._login_admin()
+
+        res = self.client.get("/api/v1/events?limit=2").json
+        self.assertEqual(len(res["events"]), 2)
+        self.assertIsNotNone(res["next"])
+
+        res = self.client.get(f"/api/v1/events?limit=2&cursor={res['next']}").json
+        self.assertEqual(res["events"][0]["description"], "Evento 2")
+
+    def test_export_events_csv(self):
+        """Testea la exportación del log de eventos en CSV."""
+        self._add_events(3)
+        self._login_admin()
+
+        res = self.client.get(
+            "/event-logger/export/csv/?start=2023-01-01&end=2023-01-01"
+        )
+        lines = res.get_data(as_text=True).splitlines()
+
+        self.assertEqual(res.mimetype, "text/csv")
+        self.assertEqual(lines[0], "id,username,module,description,time")
+        self.assertEqual(len(lines), 4)
+        self.assertIn("Evento 0", lines[1])
+
+    def test_export_events_ndjson(self):
+        """Testea la exportación del log de eventos en NDJSON con filtros."""
+        self._add_events(3)
+        self._login_admin()
+
+        res = self.client.get(
+            "/event-logger/export/ndjson/?q=evento&start=2023-01-01&end=2023-01-01"
+        )
+        lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+
+        self.assertEqual(
+            [e["description"] for e in lines], ["Evento 0", "Evento 1", "Evento 2"]
+        )
+        self.assertEqual(lines[0]["username"], "admin")
+
+    def test_export_events_invalid_format(self):
+        """Testea que un formato de exportación inválido no se acepta."""
+        with self.assertRaises(events.EventError):
+            events.export_events(events.search_events(), "xml")
+
+    def _search(self, term: str, ranked: bool = False) -> list:
+        stmt = events.search_events(term, ranked=ranked)
+        return [e.description for e, in db.session.execute(stmt).fetchall()]
+
+    def test_search_events_prefix(self):
+        """Testea la búsqueda de eventos por prefijos de palabras."""
+        for description in ["Editar acción", "Eliminar usuario", "Editar usuario"]:
+            row = self._event_row(description)
+            write_events([row])
+        db.session.commit()
+
+        self.assertEqual(
+            sorted(self._search("edit")), ["Editar acción", "Editar usuario"]
+        )
+        self.assertEqual(self._search("edi usu"), ["Editar usuario"])
+        self.assertEqual(self._search("accion"), ["Editar acción"])
+        self.assertEqual(len(self._search("admin")), 3)
+
+    def test_search_events_ranked(self):
+        """Testea que la búsqueda ordena los eventos por relevancia."""
+        for description in ["Buscar 'x'", "Editar x", "Editar 'editar'"]:
+            row = self._event_row(description)
+            write_events([row])
+        db.session.commit()
+
+        self.assertEqual(self._search("editar", ranked=True)[0], "Editar 'editar'")
+
+    def test_search_events_index_sync(self):
+        """Testea que el índice de texto completo sigue los cambios de eventos y usuarios."""
+        write_events([self._event_row("Evento")])
+        db.session.commit()
+
+        # Cambia el nombre del usuario
+        user = db.session.get(User, 1)
+        user.username = "superadmin"
+        db.session.commit()
+        self.assertEqual(self._search("superadmin"), ["Evento"])
+
+        # Elimina el evento
+        db.session.execute(db.delete(Event))
+        db.session.commit()
+        self.assertEqual(self._search("evento"), [])
+
+    def test_add_event_reuses_current_user(self):
+        """Testea que el usuario de la request se consulta una sola vez."""
+        user_queries = []
+
+        def count_user_queries(conn, cursor, statement, *args):
+            if statement.startswith("SELECT user."):
+                user_queries.append(statement)
+
+        with self.app.test_request_context():
+            session["id"] = 1
+            with self._listen_queries(count_user_queries):
+                for i in range(3):
+                    events.add_event("Pruebas", f"Evento {i}")
+
+        self.assertEqual(len(user_queries), 1)
+        self.assertEqual(self._count_events(), 3)
+
+    def _search_rows(self, *minutes: int) -> list:
+        start = datetime.datetime(2023, 1, 1)
+        return [
+            {
+                **self._event_row("Buscar 'a'"),
+                "time": start + datetime.timedelta(minutes=minute),
+                "level": events.SEARCH,
+                "count": 1,
+            }
+            for minute in minutes
+        ]
+
+    def test_search_events_are_deduplicated(self):
+        """Testea que las búsquedas repetidas se agrupan en un solo evento."""
+        self._login_admin()
+
+        for _ in range(3):
+            self.client.post("/workshop-departments/", data={"dept-filter": "a"})
+
+        (event,) = db.session.execute(db.select(Event)).scalars()
+        self.assertEqual(event.level, events.SEARCH)
+        self.assertEqual(event.count, 3)
+
+        res = self.client.get("/api/v1/events").json
+        self.assertEqual(res["events"][0]["count"], 3)
+
+    def test_dedup_window(self):
+        """Testea que solo se agrupan las repeticiones dentro de la ventana."""
+        self.app.config["EVENT_DEDUP_WINDOW"] = 60
+        try:
+            writer = EventWriter(self.app, flush_interval=60, batch_size=100)
+            writer.start()
+            # Las dos primeras en el mismo lote, la tercera en uno posterior
+            for row in self._search_rows(0, 1):
+                writer.put(row)
+            writer.stop()
+
+            write_events(self._search_rows(1, 3))
+            db.session.commit()
+        finally:
+            self.app.config["EVENT_DEDUP_WINDOW"] = 300
+
+        stmt = db.select(Event.count).order_by(Event.time)
+        self.assertEqual(db.session.execute(stmt).scalars().all(), [3, 1])
+
+    def test_info_events_are_not_deduplicated(self):
+        """Testea que los eventos que no son búsquedas no se agrupan."""
+        with self.app.test_request_context():
+            session["id"] = 1
+            for _ in range(2):
+                events.add_event("Pruebas", "Evento")
+
+        self.assertEqual(self._count_events(), 2)
+
+    def test_event_sampling(self):
+        """Testea que los eventos de un nivel se muestrean según la configuración."""
+        self.app.config["EVENT_SAMPLING"] = {"search": 0.0}
+        try:
+            with self.app.test_request_context():
+                session["id"] = 1
+                events.add_event("Pruebas", "Buscar 'a'", events.SEARCH)
+                events.add_event("Pruebas", "Evento")
+        finally:
+            self.app.config["EVENT_SAMPLING"] = {"info": 1.0, "search": 1.0}
+
+        (event,) = db.session.execute(db.select(Event)).scalars()
+        self.assertEqual(event.level, events.INFO)
+
+    def _stream(self, url: str, **kwargs) -> list:
+        """Retorna los eventos transmitidos por una conexión del logger en vivo."""
+        self.app.config["EVENT_STREAM_TIMEOUT"] = 0
+        try:
+            res = self.client.get(url, **kwargs)
+        finally:
+            self.app.config["EVENT_STREAM_TIMEOUT"] = 60.0
+
+        self.assertEqual(res.mimetype, "text/event-stream")
+        return [
+            json.loads(line[len("data: ") :])
+            for line in res.get_data(as_text=True).splitlines()
+            if line.startswith("data: ")
+        ]
+
+    def test_stream_events(self):
+        """Testea que el logger en vivo transmite los eventos nuevos."""
+        self._login_admin()
+        self.client.post("/measurement-units/", data={"uom-filter": "a"})
+        last_id = events.last_event_id()
+
+        # Sin last_id solo se transmiten los eventos posteriores a la conexión
+        self.assertEqual(self._stream("/api/v1/events/stream"), [])
+
+        self.client.post("/workshop-departments/", data={"dept-filter": "a"})
+        self.client.post("/measurement-units/", data={"uom-filter": "b"})
+
+        streamed = self._stream(f"/api/v1/events/stream?last_id={last_id}")
+        self.assertEqual(
+            [e["description"] for e in streamed], ["Buscar 'a'", "Buscar 'b'"]
+        )
+        self.assertEqual(streamed[0]["module"], "Departamentos del Taller")
+        self.assertEqual(streamed[0]["username"], "admin")
+
+        # Reanuda desde el último evento recibido
+        streamed = self._stream(
+            "/api/v1/events/stream", headers={"Last-Event-ID": str(last_id + 1)}
+        )
+        self.assertEqual([e["id"] for e in streamed], [last_id + 2])
+
+    def test_stream_events_filters(self):
+        """Testea los filtros por módulo y usuario del logger en vivo."""
+        self._login_admin()
+        self.client.post("/measurement-units/", data={"uom-filter": "a"})
+        self.client.post("/workshop-departments/", data={"dept-filter": "a"})
+
+        streamed = self._stream(
+            "/api/v1/events/stream?last_id=0&module=Departamentos del Taller"
+        )
+        self.assertEqual([e["module"] for e in streamed], ["Departamentos del Taller"])
+
+        self.assertEqual(self._stream("/api/v1/events/stream?last_id=0&user=otro"), [])
+
+    def test_stream_events_invalid_last_id(self):
+        """Testea que un last_id inválido retorna un error."""
+        self._login_admin()
+
+        res = self.client.get("/api/v1/events/stream?last_id=abc")
+        self.assertEqual(res.status_code, 400)
+
+    def test_logger_live_tail(self):
+        """Testea que el logger solo transmite en vivo en la primera página sin filtros."""
+        self._login_admin()
+        self.client.post("/measurement-units/", data={"uom-filter": "a"})
+
+        res = self.client.get("/event-logger/")
+        self.assertIn(b"data-stream-url", res.data)
+
+        res = self.client.get("/event-logger/?q=unidades")
+        self.assertNotIn(b"data-stream-url", res.data)
@@ -1,5 +1,6 @@
 from tests.unittests import BaseTestClass
 from SAGTMA.utils.auth import check_password, hash_password
+from SAGTMA.models import Event, User, db
 
 
 class TestLogin(BaseTestClass):
@@ -43,3 +44,22 @@ class TestLogin(BaseTestClass):
 
     def test_check_password_distinct(self):
         self.assertFalse(check_password("Hola123.", hash_password("Hola123")))
+
+    def test_session_of_deleted_user(self):
+        """Testea que la sesión de un usuario eliminado se cierra."""
+        self.client.post(
+            "/login/",
+            data={"username": "admin", "password": "Admin123."},
+            follow_redirects=True,
+        )
+
+        db.session.execute(db.delete(Event))
+        db.session.execute(db.delete(User))
+        db.session.commit()
+
+        # El usuario se consulta al registrar el evento de búsqueda
+        res = self.client.post(
+            "/user-profiles/", data={"user-filter": "admin"}, follow_redirects=True
+        )
+
+        self.assertIn(b"Iniciar Sesi", res.data)
@@ -0,0 +1,108 @@
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import TABLE_EPOCH, Department, TableVersion, db
+from SAGTMA.utils import lookups
+
+
+class TestLookups(BaseTestClass):
+    def populate_db(self):
+        super().populate_db()
+
+        # Añade un departamento
+        db.session.add(Department("Mecánica"))
+        db.session.commit()
+
+    def _count_statements(self, table: str, f) -> int:
+        """Retorna la cantidad de consultas a la tabla indicada que ejecuta f."""
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            if f"FROM {table}" in statement:
+                statements.append(statement)
+
+        with self._listen_queries(capture):
+            f()
+
+        return len(statements)
+
+    def test_users_cache(self):
+        """Testea que los usuarios se consultan de nuevo solo si cambian."""
+        self._login_admin()
+        self.assertEqual(len(lookups.users()), 1)
+        self.assertEqual(self._count_statements("user", lookups.users), 0)
+
+        self.client.post(
+            "/user-profiles/register/",
+            data={
+                "id-number": "V-12345678",
+                "username": "usuario",
+                "names": "Nuevo",
+                "surnames": "Usuario",
+                "password": "Usuario123.",
+                "confirm-password": "Usuario123.",
+                "role": "2",
+            },
+        )
+
+        self.assertEqual(self._count_statements("user", lookups.users), 1)
+        self.assertEqual(len(lookups.users()), 2)
+
+    def test_departments_cache(self):
+        """Testea que los helpers de departamentos invalidan la caché."""
+        self._login_admin()
+        self.assertEqual(
+            [d["description"] for d in lookups.departments()], ["Mecánica"]
+        )
+
+        self.client.post(
+            "/workshop-departments/register/", data={"description": "Pintura"}
+        )
+        self.assertEqual(
+            [d["description"] for d in lookups.departments()], ["Mecánica", "Pintura"]
+        )
+
+        self.client.post("/workshop-departments/1/delete/")
+        self.assertEqual([d["description"] for d in lookups.departments()], ["Pintura"])
+
+    def test_measure_units_cache(self):
+        """Testea que los helpers de unidades de medida invalidan la caché."""
+        self._login_admin()
+        self.assertEqual(lookups.measure_units(), [])
+
+        self.client.post(
+            "/measurement-units/register/", data={"dimension": "2", "unit": "kg"}
+        )
+        self.assertEqual(
+            lookups.measure_units(), [{"id": 1, "dimension": 2, "unit": "kg"}]
+        )
+
+    def test_cache_of_other_database(self):
+        """Testea que la caché no se reutiliza en una base de datos recreada."""
+        self.assertEqual(len(lookups.users()), 1)
+
+        # Otra base de datos con las mismas versiones de las tablas
+        db.session.execute(
+            db.update(TableVersion)
+            .where(TableVersion.name == TABLE_EPOCH)
+            .values(version=TableVersion.version + 1)
+        )
+        db.session.commit()
+
+        self.assertEqual(self._count_statements("user", lookups.users), 1)
+
+    def test_stats(self):
+        """Testea los contadores de aciertos y fallos de la caché."""
+        self._login_admin()
+        before = lookups.stats().get("departments", {"hits": 0, "misses": 0})
+
+        for _ in range(3):
+            lookups.departments()
+        self.client.post(
+            "/workshop-departments/register/", data={"description": "Pintura"}
+        )
+        lookups.departments()
+
+        res = self.client.get("/api/v1/cache-stats")
+        after = res.json["lookups"]["departments"]
+        self.assertEqual(after["misses"] - before["misses"], 2)
+        self.assertEqual(after["hits"] - before["hits"], 2)
@@ -0,0 +1,141 @@
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA import migrations
+from SAGTMA.models import TABLE_EPOCH, Department, ProjectDetail, TableVersion, db
+
+
+def _indexes(connection) -> set:
+    return {
+        name
+        for name, in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND name NOT LIKE 'sqlite_autoindex_%'"
+        )
+    }
+
+
+class TestMigrations(BaseTestClass):
+    def test_foreign_key_indexes(self):
+        """Testea que las claves foráneas de las uniones frecuentes tienen índice."""
+        with db.engine.connect() as connection:
+            indexes = _indexes(connection)
+            self.assertEqual(
+                migrations.get_version(connection), migrations.MIGRATIONS[-1][0]
+            )
+
+        for index in [
+            "ix_project_detail_project_id",
+            "ix_project_detail_vehicle_id",
+            "ix_project_detail_department_id",
+            "ix_project_detail_project_manager_id",
+            "ix_action_plan_project_detail_id",
+            "ix_activity_action_plan_id",
+            "ix_activity_charge_person_id",
+            "ix_human_talent_activity_id",
+            "ix_material_supply_activity_id",
+            "ix_material_supply_measure_unit_id",
+            "ix_vehicle_owner_id",
+            "ix_user_role_id",
+            "ix_event_user_id_time",
+        ]:
+            self.assertIn(index, indexes)
+
+        # Los detalles de un proyecto se buscan por su índice
+        stmt = db.select(ProjectDetail.id).where(ProjectDetail.project_id == 1)
+        sql = str(stmt.compile(db.engine, compile_kwargs={"literal_binds": True}))
+        plan = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        self.assertIn("ix_project_detail_project_id", plan[0][-1])
+
+    def test_migrate(self):
+        """Testea la migración de una base de datos existente sin los índices."""
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.sqlite')}")
+            with engine.begin() as connection:
+                # Base de datos con el esquema actual pero sin índices ni versión
+                db.metadata.create_all(connection)
+                expected = _indexes(connection)
+                for index in expected:
+                    connection.exec_driver_sql(f"DROP INDEX {index}")
+                connection.execute(db.insert(Department), {"description": "Pintura"})
+
+                self.assertEqual(migrations.migrate(connection), ["indexes"])
+                self.assertEqual(_indexes(connection), expected)
+                self.assertEqual(
+                    migrations.get_version(connection), migrations.MIGRATIONS[-1][0]
+                )
+
+                # Las migraciones ya aplicadas no se vuelven a ejecutar
+                connection.exec_driver_sql("DROP INDEX ix_vehicle_owner_id")
+                self.assertEqual(migrations.migrate(connection), [])
+                self.assertNotIn("ix_vehicle_owner_id", _indexes(connection))
+
+                # Los datos se conservan
+                departments = connection.execute(
+                    db.select(Department.description)
+                ).fetchall()
+            engine.dispose()
+
+        self.assertEqual([d for d, in departments], ["Pintura"])
+
+    def test_migrate_action_plan_costs(self):
+        """Testea que la migración añade y calcula el total de los planes."""
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.sqlite')}")
+            with engine.begin() as connection:
+                # Base de datos de la versión 4, sin el total de los planes
+                db.metadata.create_all(connection)
+                connection.exec_driver_sql("ALTER TABLE action_plan DROP COLUMN cost")
+                connection.exec_driver_sql("PRAGMA user_version = 4")
+                connection.exec_driver_sql(
+                    "INSERT INTO project_detail (id, project_id, vehicle_id, "
+                    "department_id, project_manager_id, solution, cost, observations) "
+                    "VALUES (1, 1, 1, 1, 1, 'Lavado', 0, '')"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO action_plan (id, action, project_detail_id) "
+                    "VALUES (1, 'Lavar', 1), (2, 'Secar', 1)"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO activity (action_plan_id, description, start_date, "
+                    "deadline, work_hours, charge_person_id, cost) VALUES "
+                    "(1, 'a', '2022-01-01', '2022-01-01', 1, 1, 10), "
+                    "(1, 'b', '2022-01-01', '2022-01-01', 1, 1, 5), "
+                    "(2, 'c', '2022-01-01', '2022-01-01', 1, 1, 7)"
+                )
+
+                self.assertEqual(migrations.migrate(connection), ["action_plan_costs"])
+                plans = connection.exec_driver_sql(
+                    "SELECT id, cost FROM action_plan ORDER BY id"
+                ).fetchall()
+                detail = connection.exec_driver_sql(
+                    "SELECT cost FROM project_detail"
+                ).scalar()
+            engine.dispose()
+
+        self.assertEqual(plans, [(1, 15), (2, 7)])
+        self.assertEqual(detail, 22)
+
+    def test_migrate_table_epoch(self):
+        """Testea que la migración guarda el valor aleatorio de la base de datos."""
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.sqlite')}")
+            with engine.begin() as connection:
+                # Base de datos de la versión 5, sin el valor aleatorio
+                db.metadata.create_all(connection)
+                connection.exec_driver_sql("DELETE FROM table_version")
+                connection.exec_driver_sql("PRAGMA user_version = 5")
+
+                self.assertEqual(migrations.migrate(connection), ["table_epoch"])
+                epoch = connection.execute(
+                    db.select(TableVersion.version).where(
+                        TableVersion.name == TABLE_EPOCH
+                    )
+                ).scalar()
+            engine.dispose()
+
+        self.assertIsNotNone(epoch)
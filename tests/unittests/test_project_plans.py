@@ -14,6 +14,7 @@ from SAGTMA.models import (
     HumanTalent,
     MaterialSupply,
     MeasureUnit,
+    Change,
 )
 from SAGTMA.utils.auth import hash_password
 import SAGTMA.utils.project_plans as pp
@@ -84,7 +85,7 @@ class ProjectPlansTests(BaseTestClass):
 
         # Añade una actividad, talento humano y material a esa acción
         activity = Activity(
-            0, 0, "Preparar el material", date(2021, 4, 1), date(2023, 4, 1), 8, 80
+            0, 2, "Preparar el material", date(2021, 4, 1), date(2023, 4, 1), 8, 80
         )
         activity.id = 0
 
@@ -339,3 +340,191 @@ class ProjectPlansTests(BaseTestClass):
 
         stmt = db.select(Activity).where(Activity.id == 0)
         self.assertIsNotNone(db.session.execute(stmt).first())
+
+    def test_api_action_plans(self):
+        """Testea el árbol de planes de acción de la API"""
+        self._login_manager()
+        self._post_register_activity(
+            {
+                "id": 0,
+                "activity": "Prueba",
+                "start-date": "2022-04-01",
+                "deadline": "2022-04-01",
+                "work-hours": "4",
+                "charge-person": "2",
+                "amount-person-hl": "2",
+                "cost-hl": "5",
+                "category-ms": "Materiales",
+                "description-ms": "Jabón",
+                "amount-ms": "2",
+                "measure-unit-ms": "0",
+                "cost-ms": "3",
+                "new-action": "Pulido",
+            }
+        )
+
+        res = self.client.get("/api/v1/action-plans?id=0").json
+        self.assertEqual(
+            [
+                (plan["action"], [a["description"] for a in plan["activities"]])
+                for plan in res["actionPlans"].values()
+            ],
+            [("Lavado", ["Preparar el material"]), ("Pulido", ["Prueba"])],
+        )
+        self.assertEqual([u["id"] for u in res["users"]], [1, 2])
+        self.assertEqual(
+            res["measureUnits"], [{"id": 0, "dimension": 6, "unit": "Centímetros"}]
+        )
+
+        # Filtra por talento humano y material
+        res = self.client.get(
+            "/api/v1/action-plans",
+            query_string={
+                "action_id": 0,
+                "human_talent_id": 0,
+                "material_supply_id": 0,
+            },
+        ).json
+        (activity,) = res["actionPlans"]["0"]["activities"]
+        self.assertEqual(
+            activity["human_talents"],
+            [{"id": 0, "amount_persons": 1, "cost_hl": 7 / 8}],
+        )
+        self.assertEqual(activity["material_supplies"][0]["unit_id"], 0)
+
+        res = self.client.get("/api/v1/action-plans?action_id=0&human_talent_id=2")
+        self.assertEqual(res.json["actionPlans"], {})
+
+        # Los filtros vacíos se ignoran
+        res = self.client.get("/api/v1/action-plans?id=&action_id=").json
+        self.assertEqual(len(res["actionPlans"]), 2)
+
+    def _costs(self, detail_id: int = 0) -> tuple:
+        """Retorna el monto del detalle de proyecto y los totales de sus planes."""
+        db.session.expire_all()
+        detail = db.session.get(ProjectDetail, detail_id)
+        plans = db.session.execute(
+            db.select(ActionPlan.id, ActionPlan.cost)
+            .where(ActionPlan.project_detail_id == detail_id)
+            .order_by(ActionPlan.id)
+        ).all()
+        return detail.cost, [tuple(plan) for plan in plans]
+
+    def _activity_data(self, hours: str, cost_hl: str, amount_ms: str, cost_ms: str):
+        return {
+            "activity": f"Actividad {hours} {cost_hl} {amount_ms} {cost_ms}",
+            "start-date": "2022-04-01",
+            "deadline": "2022-04-01",
+            "work-hours": hours,
+            "charge-person": "2",
+            "amount-person-hl": "1",
+            "cost-hl": cost_hl,
+            "category-ms": "Materiales",
+            "description-ms": "Jabón",
+            "amount-ms": amount_ms,
+            "measure-unit-ms": "0",
+            "cost-ms": cost_ms,
+        }
+
+    def test_costs_incremental(self):
+        """Testea que los totales se actualizan con la diferencia de costos"""
+        self._login_manager()
+
+        # Los datos de prueba no tienen los totales calculados, ni del plan ni
+        # del detalle de proyecto
+        self.assertEqual(pp.recompute_costs(), 2)
+        self.assertEqual(self._costs(), (80, [(0, 80)]))
+
+        # Actividad de 8 * 1 + 2 * 3 = 14 en un plan existente
+        self._post_register_activity(
+            {
+                "id": 0,
+                "action-type-hidden": "existing",
+                "existing-action": "0",
+                **self._activity_data("8", "1", "2", "3"),
+            }
+        )
+        self.assertEqual(self._costs(), (94, [(0, 94)]))
+
+        # Actividad de 4 * 5 + 1 * 1 = 21 en un plan nuevo
+        self._post_register_activity(
+            {"id": 0, "new-action": "Pulido", **self._activity_data("4", "5", "1", "1")}
+        )
+        self.assertEqual(self._costs(), (115, [(0, 94), (1, 21)]))
+
+        # La actividad de 80 pasa a costar 8 * 1 + 1 * 1 = 9
+        self._post_edit_activity(
+            {
+                "id": 0,
+                "action": "Lavado",
+                "activity-id": "0",
+                "project-detail-id": "0",
+                "human-talent-id": "0",
+                "material-supply-id": "0",
+                **self._activity_data("8", "1", "1", "1"),
+            }
+        )
+        self.assertEqual(self._costs(), (44, [(0, 23), (1, 21)]))
+
+        self.client.post(
+            "/action-plans/0/delete/",
+            data={"project-detail-id": "0", "delete-activity-id": "0"},
+        )
+        self.assertEqual(self._costs(), (35, [(0, 14), (1, 21)]))
+
+        # Recalcular no cambia los totales mantenidos ni registra cambios
+        count_changes = db.select(db.func.count()).select_from(Change)
+        before = db.session.execute(count_changes).scalar()
+        self.assertEqual(pp.recompute_costs(), 0)
+        self.assertEqual(self._costs(), (35, [(0, 14), (1, 21)]))
+        self.assertEqual(db.session.execute(count_changes).scalar(), before)
+
+        # Los cambios de los montos se registran para la sincronización
+        self.assertIn(
+            ("project_detail", 0),
+            db.session.execute(db.select(Change.table_name, Change.row_id)).all(),
+        )
+
+    def test_recompute_stale_action_plans(self):
+        """Testea que se reparan y reportan los totales de los planes de acción"""
+        pp.recompute_costs()
+
+        # Solo el total del plan de acción difiere de sus actividades
+        db.session.execute(db.update(ActionPlan).values(cost=1))
+        db.session.commit()
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["recompute-costs"])
+
+        self.assertIn(
+            "1 planes de acción y detalles de proyecto corregidos", result.output
+        )
+        self.assertEqual(self._costs(), (80, [(0, 80)]))
+
+    def test_costs_first_activity(self):
+        """Testea que la primera actividad reemplaza el monto ingresado a mano"""
+        self._login_manager()
+        detail = ProjectDetail(0, 0, 0, 1, "Otra", 500, "N/A")
+        detail.id = 1
+        db.session.add(detail)
+        db.session.commit()
+
+        self._post_register_activity(
+            {
+                "id": 1,
+                "new-action": "Pintura",
+                **self._activity_data("4", "5", "1", "1"),
+            }
+        )
+        ((plan_id, _),) = self._costs(1)[1]
+        self.assertEqual(self._costs(1), (21, [(plan_id, 21)]))
+
+        # Al eliminar la única actividad también se elimina su plan
+        (activity_id,) = db.session.execute(
+            db.select(Activity.id).where(Activity.action_plan_id == plan_id)
+        ).one()
+        self.client.post(
+            f"/action-plans/{plan_id}/delete/",
+            data={"project-detail-id": "1", "delete-activity-id": str(activity_id)},
+        )
+        self.assertEqual(self._costs(1), (0, []))
@@ -0,0 +1,196 @@
+from datetime import date
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.models import (
+    ActionPlan,
+    Activity,
+    Client,
+    Department,
+    HumanTalent,
+    MaterialSupply,
+    MeasureUnit,
+    Project,
+    ProjectDetail,
+    Role,
+    User,
+    Vehicle,
+    db,
+)
+from SAGTMA.utils import versions
+from SAGTMA.utils.auth import hash_password
+
+
+class TestQueryCounts(BaseTestClass):
+    def populate_db(self):
+        super().populate_db()
+
+        # Añade un usuario Gerente de Operaciones
+        stmt = db.select(Role).where(Role.name == "Gerente de Operaciones")
+        (self.manager_role,) = db.session.execute(stmt).fetchone()
+        manager = User(
+            "V-1000000",
+            "manager",
+            "Bad",
+            "Bunny",
+            hash_password("Manager123."),
+            self.manager_role,
+        )
+
+        # Añade un proyecto y una unidad de medida
+        project = Project("Proyecto Automotriz 1", date(2021, 4, 1), date(2023, 4, 1))
+        unit = MeasureUnit(6, "Centímetros")
+
+        db.session.add_all([manager, project, unit])
+        db.session.commit()
+
+        self.manager_id = manager.id
+        self.project_id = project.id
+        self.unit_id = unit.id
+        self.rows = 0
+        self.detail_id = self._add_rows(1)
+
+    def _add_rows(self, amount: int) -> int:
+        """
+        Añade clientes, vehículos, departamentos y detalles de proyecto, y
+        planes de acción al primer detalle de proyecto, cada uno con un
+        responsable distinto. Retorna el id del primer detalle de proyecto.
+        """
+        for _ in range(amount):
+            self.rows += 1
+            i = self.rows
+
+            client = Client(
+                f"V-{2000000 + i}",
+                "Cliente",
+                "De Prueba",
+                date(1974, 3, 16),
+                "+584254635122",
+                "testclient@locatel.com.ve",
+                "Wock to Poland",
+            )
+            client.vehicles.append(
+                Vehicle(
+                    f"ABC-{i:03d}",
+                    "Toyota",
+                    "Corolla",
+                    2018,
+                    "A123456789",
+                    "987654321B",
+                    "Negro",
+                    "Clutch no funciona",
+                )
+            )
+            dept = Department(f"Departamento {i}")
+            person = User(
+                f"V-{3000000 + i}",
+                f"persona{i}",
+                "Persona",
+                "De Prueba",
+                hash_password("Persona123."),
+                self.manager_role,
+            )
+            db.session.add_all([client, dept, person])
+            db.session.flush()
+
+            detail = ProjectDetail(
+                self.project_id,
+                client.vehicles[0].id,
+                dept.id,
+                self.manager_id,
+                "Solución",
+                80,
+                "N/A",
+            )
+            db.session.add(detail)
+            db.session.flush()
+            if i == 1:
+                self.detail_id = detail.id
+
+            action = ActionPlan(f"Acción {i}", self.detail_id)
+            db.session.add(action)
+            db.session.flush()
+            activity = Activity(
+                action.id,
+                person.id,
+                "Actividad",
+                date(2021, 4, 1),
+                date(2023, 4, 1),
+                8,
+                80,
+            )
+            db.session.add(activity)
+            db.session.flush()
+            db.session.add_all(
+                [
+                    HumanTalent(activity.id, 8, 1, 48),
+                    MaterialSupply(
+                        activity.id, self.unit_id, "Materiales", "Lija", 1, 32
+                    ),
+                ]
+            )
+
+        versions.bump(
+            Client,
+            Vehicle,
+            Department,
+            User,
+            ProjectDetail,
+            ActionPlan,
+            Activity,
+            HumanTalent,
+            MaterialSupply,
+            MeasureUnit,
+        )
+        db.session.commit()
+        return self.detail_id
+
+    def _count_queries(self, url: str) -> int:
+        """Retorna la cantidad de consultas que ejecuta una request GET."""
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self._listen_queries(count):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200, url)
+        return len(statements)
+
+    def _assert_fixed_query_count(self, urls: list):
+        """
+        Testea que las rutas ejecutan la misma cantidad de consultas sin
+        importar la cantidad de filas.
+        """
+        before = {url: self._count_queries(url) for url in urls}
+        self._add_rows(5)
+        after = {url: self._count_queries(url) for url in urls}
+
+        self.assertEqual(after, before)
+
+    def test_manager_views(self):
+        """Testea las rutas del Gerente de Operaciones."""
+        self._login_manager()
+
+        self._assert_fixed_query_count(
+            [
+                "/api/v1/project-details",
+                "/api/v1/project-details-dropdown-data",
+                f"/api/v1/action-plans-dropdown-data?id={self.detail_id}",
+                "/api/v1/action-plans",
+                f"/project-details/{self.project_id}/",
+                f"/action-plans/{self.detail_id}/",
+                f"/human-talents/{self.detail_id}/",
+                f"/materials-supplies/{self.detail_id}/",
+            ]
+        )
+
+    def test_admin_views(self):
+        """Testea las rutas del Administrador."""
+        self._login_admin()
+        self.client.post("/workshop-departments/", data={"dept-filter": "a"})
+
+        self._assert_fixed_query_count(
+            ["/api/v1/users", "/user-profiles/", "/event-logger/", "/api/v1/events"]
+        )
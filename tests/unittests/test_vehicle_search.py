@@ -0,0 +1,216 @@
+import datetime
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+
+from tests.unittests import BaseTestClass
+
+from SAGTMA.migrations import migrate_search_keys
+from SAGTMA.models import (
+    Client,
+    Role,
+    User,
+    Vehicle,
+    compact_key,
+    db,
+    search_key,
+)
+from SAGTMA.utils import vehicles
+from SAGTMA.utils.profiles import hash_password
+
+
+class TestVehicleSearch(BaseTestClass):
+    def populate_db(self):
+        super().populate_db()
+
+        stmt = db.select(Role).where(Role.name == "Gerente de Operaciones")
+        (manager,) = db.session.execute(stmt).fetchone()
+
+        # Añade un usuario Gerente de Operaciones
+        manager_user = User(
+            "V-1000000",
+            "manager",
+            "Bad",
+            "Bunny",
+            hash_password("Manager123."),
+            manager,
+        )
+        db.session.add(manager_user)
+
+        # Añade clientes con sus vehículos
+        for i, (id_number, names, surnames, plate) in enumerate(
+            [
+                ("V-11122345", "José Ángel", "Núñez Pérez", "ABC-123"),
+                ("V-22233456", "María", "González", "ABD 456"),
+                ("E-33344567", "Pedro", "Ñáñez", "XYZ-789"),
+            ]
+        ):
+            client = Client(
+                id_number,
+                names,
+                surnames,
+                datetime.date(1974, 3, 16),
+                "+584254635122",
+                f"cliente{i}@correo.com",
+                "Caracas",
+            )
+            client.vehicles.append(
+                Vehicle(
+                    plate,
+                    "Toyota",
+                    "Corolla",
+                    2018,
+                    f"A12345678{i}",
+                    f"98765432{i}B",
+                    "Negro",
+                    "Clutch no funciona",
+                )
+            )
+            db.session.add(client)
+        db.session.commit()
+
+    def _plates(self, term: str, limit: int = vehicles.SEARCH_LIMIT) -> list:
+        return [v["license_plate"] for v in vehicles.search_vehicles(term, limit)]
+
+    def test_search_keys(self):
+        """Testea las claves normalizadas de clientes y vehículos."""
+        self.assertEqual(search_key("  José   ÁNGEL "), "jose angel")
+        self.assertEqual(compact_key("ABD 456"), "abd456")
+
+        stmt = db.select(Client).where(Client.id_number == "V-11122345")
+        client = db.session.execute(stmt).scalar_one()
+        self.assertEqual(client.id_number_key, "11122345")
+        self.assertEqual(client.name_key, "jose angel nunez perez")
+        self.assertEqual(client.surname_key, "nunez perez")
+        self.assertEqual(client.vehicles[0].license_plate_key, "abc123")
+
+        # Las claves se actualizan al editar
+        client.surnames = "Ramírez"
+        db.session.commit()
+        self.assertEqual(client.surname_key, "ramirez")
+
+    def test_search_vehicles(self):
+        """Testea la búsqueda por prefijo de la placa o del dueño."""
+        # Placa, sin importar mayúsculas, espacios ni guiones
+        self.assertEqual(self._plates("ab"), ["ABC-123", "ABD 456"])
+        self.assertEqual(self._plates("abd-4"), ["ABD 456"])
+        self.assertEqual(self._plates("ABC123"), ["ABC-123"])
+
+        # Cédula, con o sin la letra inicial
+        self.assertEqual(self._plates("2223"), ["ABD 456"])
+        self.assertEqual(self._plates("E-333"), ["XYZ-789"])
+
+        # Nombres o apellidos, sin importar acentos
+        self.assertEqual(self._plates("jose"), ["ABC-123"])
+        self.assertEqual(self._plates("NUNEZ"), ["ABC-123"])
+        self.assertEqual(self._plates("nañ"), ["XYZ-789"])
+        self.assertEqual(self._plates("maría gon"), ["ABD 456"])
+
+        # Sin coincidencias o sin término
+        self.assertEqual(self._plates("zzz"), [])
+        self.assertEqual(self._plates(" - "), [])
+
+    def test_search_limit(self):
+        """Testea que se retornan a lo sumo limit vehículos."""
+        self.assertEqual(self._plates("a", 1), ["ABC-123"])
+        self.assertEqual(len(self._plates("a", 0)), 1)
+
+    def test_search_limit_first_plates(self):
+        """Testea que con límite se retornan las primeras placas que coinciden."""
+        stmt = db.select(Client).where(Client.id_number == "V-11122345")
+        client = db.session.execute(stmt).scalar_one()
+        for i, plate in enumerate(["ZZZ-999", "AAA-111"]):
+            client.vehicles.append(
+                Vehicle(
+                    plate,
+                    "Toyota",
+                    "Corolla",
+                    2018,
+                    f"B12345678{i}",
+                    f"88765432{i}B",
+                    "Negro",
+                    "Clutch no funciona",
+                )
+            )
+        db.session.commit()
+
+        self.assertEqual(self._plates("jose", 2), ["AAA-111", "ABC-123"])
+
+    def test_api_search_vehicles(self):
+        """Testea el endpoint de búsqueda de vehículos."""
+        self._login_manager()
+
+        res = self.client.get("/api/v1/vehicles/search?q=abd")
+        self.assertEqual(res.status_code, 200)
+        (vehicle,) = res.json["vehicles"]
+        self.assertEqual(vehicle["license_plate"], "ABD 456")
+        self.assertEqual(vehicle["id_number"], "V-22233456")
+        self.assertEqual(vehicle["problem"], "Clutch no funciona")
+
+        res = self.client.get(f"/api/v1/vehicles/search?id={vehicle['id']}")
+        self.assertEqual(res.json["vehicles"], [vehicle])
+
+        res = self.client.get("/api/v1/vehicles/search?q=a&limit=x")
+        self.assertEqual(res.status_code, 400)
+
+        # Los datos de los dropdowns ya no incluyen los vehículos
+        res = self.client.get("/api/v1/project-details-dropdown-data")
+        self.assertNotIn("vehicles", res.json)
+
+    def test_migrate_search_keys(self):
+        """Testea la migración de clientes y vehículos sin claves de búsqueda."""
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'old.sqlite')}")
+            with engine.begin() as connection:
+                connection.exec_driver_sql(
+                    "CREATE TABLE client (id INTEGER PRIMARY KEY, "
+                    "id_number VARCHAR(10), names VARCHAR(50), surnames VARCHAR(50), "
+                    "birthdate DATE, phone_number VARCHAR(20), email VARCHAR(50), "
+                    "address VARCHAR(120))"
+                )
+                connection.exec_driver_sql(
+                    "CREATE TABLE vehicle (id INTEGER PRIMARY KEY, owner_id INTEGER, "
+                    "license_plate VARCHAR(10), brand VARCHAR(50), model VARCHAR(50), "
+                    "year INTEGER, body_number VARCHAR(50), engine_number VARCHAR(50), "
+                    "color VARCHAR(50), problem VARCHAR(120))"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO client VALUES (1, 'V-11122345', 'José', 'Núñez', "
+                    "'1974-03-16', '+58', 'a@b.com', 'Caracas')"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO vehicle VALUES (1, 1, 'ABC-123', 'Toyota', 'Corolla', "
+                    "2018, 'A1', 'B1', 'Negro', 'Clutch')"
+                )
+                db.metadata.create_all(connection)
+
+                self.assertTrue(migrate_search_keys(connection))
+                self.assertFalse(migrate_search_keys(connection))
+
+                client = connection.exec_driver_sql(
+                    "SELECT id_number_key, name_key, surname_key FROM client"
+                ).one()
+                plate = connection.exec_driver_sql(
+                    "SELECT license_plate_key FROM vehicle"
+                ).scalar()
+                indexes = {
+                    name
+                    for name, in connection.exec_driver_sql(
+                        "SELECT name FROM sqlite_master WHERE type = 'index'"
+                    )
+                }
+            engine.dispose()
+
+        self.assertEqual(tuple(client), ("11122345", "jose nunez", "nunez"))
+        self.assertEqual(plate, "abc123")
+        self.assertTrue(
+            {
+                "ix_client_name_key",
+                "ix_client_surname_key",
+                "ix_client_id_number_key",
+                "ix_vehicle_license_plate_key",
+                "ix_vehicle_owner_id",
+            }
+            <= indexes
+        )